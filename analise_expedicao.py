@@ -0,0 +1,103 @@
+"""
+Agregados do CSV de expedição para as abas da Expedição
+
+Tempo Conferência, Controle de Ondas e Rotas no Piso leem o mesmo CSV e o
+agrupavam de novo a cada execução da página (o Streamlit executa todas as abas
+de st.tabs a cada interação). AnaliseExpedicao calcula uma única vez, ao
+carregar o arquivo, os agregados por operador, por onda, por dia e de tempo no
+piso; as abas apenas exibem o que já está calculado.
+"""
+
+import pandas as pd
+
+# Colunas das tabelas de rotas no piso (top 20 e rotas com 20+ minutos)
+COLUNAS_ROTAS_PISO = ['AT/TO', 'Corridor Cage', 'Validation Operator', 'City', 'Tempo_No_Piso_Min', 'Total Scanned Orders']
+
+def classificar_performance_produtividade(at_to_count) -> str:
+    """Classificação do operador pela quantidade de AT/TO expedidos"""
+    if at_to_count >= 10:
+        return '🟢 Excelente'
+    elif at_to_count >= 7:
+        return '🟡 Bom'
+    elif at_to_count >= 4:
+        return '🟠 Atenção'
+    else:
+        return '🔴 Crítico'
+
+def classificar_tempo_piso(tempo) -> str:
+    """Classificação de uma rota pelo tempo parada no piso (minutos)"""
+    if tempo <= 30:
+        return '🟢 Normal'
+    elif tempo <= 60:
+        return '🟡 Atenção'
+    elif tempo <= 120:
+        return '🟠 Crítico'
+    else:
+        return '🔴 Muito Crítico'
+
+class AnaliseExpedicao:
+    """Agregados por operador, onda, dia e tempo no piso de um CSV de expedição (ver ler_csv_expedicao)"""
+
+    def __init__(self, df_expedicao: pd.DataFrame):
+        df = df_expedicao
+        self.total_registros = len(df)
+        self.operadores_unicos = df['Validation Operator'].nunique()
+        self.ondas_unicas = df['Onda'].nunique()
+        self.tempo_medio_conferencia = df['Tempo_Conferencia_Min'].mean()
+
+        self._calcular_operadores(df)
+        self._calcular_ondas(df)
+        self._calcular_piso(df)
+
+    def _calcular_operadores(self, df: pd.DataFrame):
+        """Tempo de conferência e produtividade por operador (um único agrupamento)"""
+        ranking = df.groupby('Validation Operator').agg(
+            Total_AT_TO=('AT/TO', 'count'),
+            Total_Pedidos=('Total Scanned Orders', 'sum'),
+            Tempo_Medio_Min=('Tempo_Conferencia_Min', 'mean')
+        )
+        tempo_por_operador = ranking['Tempo_Medio_Min']
+
+        self.tempo_medio_por_operador = tempo_por_operador.mean()
+        validos = tempo_por_operador.dropna()
+        self.operador_mais_rapido = (validos.idxmin(), validos.min()) if not validos.empty else (None, None)
+        self.operador_mais_lento = (validos.idxmax(), validos.max()) if not validos.empty else (None, None)
+
+        ranking = ranking.rename_axis('Operador').reset_index().sort_values('Total_AT_TO', ascending=False)
+        ranking['Performance'] = ranking['Total_AT_TO'].map(classificar_performance_produtividade)
+        self.ranking_produtividade = ranking.reset_index(drop=True)
+
+    def _calcular_ondas(self, df: pd.DataFrame):
+        """Tempo de finalização de cada onda por dia e a sequência de ondas de cada dia"""
+        ondas = df.groupby(['Onda', 'Data']).agg({
+            'Validation Start Time': 'min',
+            'Validation End Time': 'max',
+            'Total Scanned Orders': 'sum',
+            'AT/TO': 'count'
+        }).reset_index()
+        ondas['Tempo_Finalizacao_Onda_Min'] = (ondas['Validation End Time'] - ondas['Validation Start Time']).dt.total_seconds() / 60
+        self.ondas = ondas.sort_values(['Data', 'Onda'])
+
+        sequencia = self.ondas.groupby('Data').agg({
+            'Onda': lambda x: sorted(x.tolist()),
+            'Tempo_Finalizacao_Onda_Min': 'sum',
+            'Total Scanned Orders': 'sum'
+        }).reset_index()
+        sequencia['Sequencia_Ondas'] = sequencia['Onda'].map(lambda letras: ' → '.join(letras))
+        sequencia['Tempo_Total_Dia'] = sequencia['Tempo_Finalizacao_Onda_Min'].round(1)
+        self.sequencia_por_dia = sequencia
+
+    def _calcular_piso(self, df: pd.DataFrame):
+        """Rotas com tempo no piso positivo: classificação, percentis e rankings"""
+        piso = df[df['Tempo_No_Piso_Min'] > 0].copy()
+        piso['Classificacao_Tempo'] = piso['Tempo_No_Piso_Min'].map(classificar_tempo_piso)
+        self.piso = piso
+
+        self.classificacao_piso = piso['Classificacao_Tempo'].value_counts()
+        percentis = piso['Tempo_No_Piso_Min'].quantile([0.75, 0.90, 0.95])
+        self.percentis_piso = {75: percentis[0.75], 90: percentis[0.90], 95: percentis[0.95]}
+
+        self.top_rotas_piso = piso.nlargest(20, 'Tempo_No_Piso_Min')[COLUNAS_ROTAS_PISO]
+        self.rotas_20_mais = piso[piso['Tempo_No_Piso_Min'] >= 20].sort_values('Tempo_No_Piso_Min', ascending=False)
+        self.tempo_piso_por_operador = piso.groupby('Validation Operator')['Tempo_No_Piso_Min'].mean() \
+            .sort_values(ascending=False).head(15)
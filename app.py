@@ -15,12 +15,19 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
-import numpy as np
 from datetime import datetime, timedelta
-import json
 import os
 from streamlit_option_menu import option_menu
-from config import CORES, MENSAGENS, SUPABASE
+from config import CORES, MENSAGENS, SUPABASE, COLUNAS_CONSULTA, CAMPOS_DADOS_OPERACAO
+from modelo_operacao import obter_modelo
+from analise_expedicao import AnaliseExpedicao, COLUNAS_ROTAS_PISO
+from eventos import registrar_consumidor
+from notificacoes import consumidor_streamlit, exibir_notificacoes
+
+# O núcleo (database/utils) não usa o Streamlit: o app exibe os eventos dele.
+# Registrado antes de importar utils para mostrar as mensagens de conexão do banco.
+registrar_consumidor(consumidor_streamlit)
+
 from utils import (
     processar_upload_planilha, exportar_dados_excel, gerar_relatorio_resumo,
     salvar_dados_operacao, carregar_dados_operacao, salvar_dados_validacao,
@@ -31,10 +38,16 @@ from utils import (
     exportar_flutuantes_excel, processar_csv_dados_diarios, processar_multiplos_csvs_dados_diarios,
     agrupar_operadores_duplicados, obter_estatisticas_duplicacao_operadores, diagnosticar_operador,
     verificar_normalizacao_operador, buscar_operadores_por_padrao, carregar_pacotes_flutuantes_com_mapeamento,
+    listar_operadores_flutuantes, contar_flutuantes_por_operador_na_data,
     formatar_tempo_minutos, calcular_tempo_para_target, analisar_evolucao_tempo,
     carregar_expedicao_consolidado, obter_recomendacao_operadores_top_6,
-    processar_csv_expedicao_consolidado, salvar_expedicao_consolidado,
-    backup_dados
+    importar_expedicao_consolidado, IMPORTACAO_GRAVADA, IMPORTACAO_REPETIDA, buscar_importacao, hash_conteudo_arquivo, descrever_importacao,
+    backup_dados, obter_ranking_flutuantes_periodo, obter_flutuantes_por_data_operador,
+    importar_csv_flutuantes_em_blocos,
+    processar_arquivos_em_paralelo, limpar_cache_banco, sincronizar_replica_local,
+    limpar_dados_locais, ler_backup,
+    ler_csv_validacao, processar_csv_validacao, ler_upload_em_cache,
+    verificar_colunas_csv, ler_csv_expedicao, COLUNAS_CSV_EXPEDICAO
 )
 
 # Função para formatar tempo (minutos em horas quando apropriado)
@@ -209,7 +222,7 @@ st.markdown(f"""
 """, unsafe_allow_html=True)
 
 # Função para carregar dados (com integração ao banco)
-@st.cache_data
+@st.cache_data(ttl=SUPABASE['cache_ttl']['dados_operacao'], show_spinner=False)
 def load_data():
     try:
         dados = carregar_dados_operacao()
@@ -227,6 +240,7 @@ def load_data():
 def reload_data():
     try:
         st.cache_data.clear()
+        limpar_cache_banco()
         dados = carregar_dados_operacao()
         if dados is None:
             return []
@@ -239,10 +253,12 @@ def reload_data():
         return []
 
 # Função para salvar dados (com integração ao banco)
-def save_data(data):
+def save_data(data, alterados=None, removidos=None):
     try:
         show_temp_message(f"Iniciando salvamento de {len(data)} registros...", "info", 5)
-        resultado = salvar_dados_operacao(data)
+        resultado = salvar_dados_operacao(data, alterados=alterados, removidos=removidos)
+        # O cache de leituras do banco já é invalidado na gravação; falta o da página
+        load_data.clear()
         if resultado:
             show_temp_message("Salvamento concluído com sucesso!", "success", 5)
         else:
@@ -252,116 +268,49 @@ def save_data(data):
         show_temp_message(f"ERRO NA FUNÇÃO SAVE_DATA: {type(e).__name__} - {str(e)}", "error", 15)
         return False
 
-# Função para processar CSV de validação
-def processar_csv_validacao(uploaded_file):
-    try:
-        df = pd.read_csv(uploaded_file)
-        
-        # Verificar se as colunas necessárias existem
-        colunas_necessarias = [
-            'AT/TO', 'Corridor/Cage', 'Total Initial Orders Inside AT/TO',
-            'Total Final Orders Inside AT/TO', 'Total Scanned Orders',
-            'Missorted Orders', 'Missing Orders', 'Validation Start Time',
-            'Validation End Time', 'Validation Operator', 'Revalidation Operator',
-            'Revalidated Count', 'AT/TO Validation Status', 'Remark'
-        ]
-        
-        colunas_faltantes = [col for col in colunas_necessarias if col not in df.columns]
-        if colunas_faltantes:
-            st.error(f"Colunas faltantes no CSV: {', '.join(colunas_faltantes)}")
-            return None
-        
-        # Converter colunas de data
-        df['Validation Start Time'] = pd.to_datetime(df['Validation Start Time'])
-        df['Validation End Time'] = pd.to_datetime(df['Validation End Time'])
-        
-        # Adicionar coluna de data
-        df['Data'] = df['Validation Start Time'].dt.date
-        
-        # Calcular tempo de validação em minutos
-        df['Tempo_Validacao_Min'] = (df['Validation End Time'] - df['Validation Start Time']).dt.total_seconds() / 60
-        
-        # Calcular erros de sorting (apenas Missorted Orders + Missing Orders)
-        # Ignorar linhas onde Total Final Orders Inside AT/TO é 0
-        df['Erros_Sorting'] = np.where(
-            df['Total Final Orders Inside AT/TO'] > 0,
-            df['Missorted Orders'] + df['Missing Orders'],
-            0
-        )
-        
-        # Calcular taxa de erro baseada no Total Final Orders (sem considerar os erros)
-        # Ignorar linhas onde Total Final Orders Inside AT/TO é 0
-        df['Taxa_Erro_Sorting'] = np.where(
-            df['Total Final Orders Inside AT/TO'] > 0,
-            (df['Erros_Sorting'] / df['Total Final Orders Inside AT/TO'] * 100),
-            0
-        )
-        
-        return df
-        
-    except Exception as e:
-        st.error(f"Erro ao processar CSV: {e}")
-        return None
+def exibir_resultado_importacao_expedicao(resultado: str, upload_expedicao: dict):
+    """Mensagem do resultado de importar_expedicao_consolidado; após gravar, atualiza o registro do upload na sessão"""
+    if resultado == IMPORTACAO_GRAVADA:
+        upload_expedicao['importacao'] = buscar_importacao('expedicao', upload_expedicao['hash'])
+        st.success("🎉 Dados históricos armazenados com sucesso!")
+        st.info("💡 Agora você pode usar a aba 'Expedição Consolidado' para análises avançadas")
+        st.balloons()
+    elif resultado == IMPORTACAO_REPETIDA:
+        st.info("♻️ Este arquivo já foi importado: nada foi gravado. Marque '🔁 Processar e gravar novamente' para gravá-lo de novo.")
+    else:
+        st.error("❌ Falha ao armazenar dados históricos")
 
 # Função para processar múltiplos CSVs
 def processar_multiplos_csvs(uploaded_files):
-    """Processa múltiplos arquivos CSV e retorna um DataFrame consolidado"""
+    """Processa múltiplos arquivos CSV em paralelo e retorna um DataFrame consolidado"""
     dfs = []
     
-    for i, uploaded_file in enumerate(uploaded_files):
-        try:
-            df = processar_csv_validacao(uploaded_file)
-            if df is not None:
-                # Adicionar identificador do arquivo
-                df['Arquivo_Origem'] = uploaded_file.name
-                dfs.append(df)
-                st.success(f"✅ {uploaded_file.name} processado com sucesso!")
-            else:
-                st.error(f"❌ Erro ao processar {uploaded_file.name}")
-        except Exception as e:
-            st.error(f"❌ Erro ao processar {uploaded_file.name}: {e}")
+    inicio = time.perf_counter()
+    resultados = processar_arquivos_em_paralelo(
+        uploaded_files, lambda arquivo: ler_upload_em_cache(arquivo, 'validacao', ler_csv_validacao)
+    )
+    tempo_total = time.perf_counter() - inicio
+    
+    for resultado in resultados:
+        if resultado['erro']:
+            st.error(f"❌ Erro ao processar {resultado['arquivo']}: {resultado['erro']}")
+            continue
+        
+        df = resultado['resultado']
+        # Adicionar identificador do arquivo
+        df['Arquivo_Origem'] = resultado['arquivo']
+        dfs.append(df)
+        st.success(f"✅ {resultado['arquivo']} processado com sucesso! ({len(df)} registros em {resultado['tempo']:.2f}s)")
     
     if dfs:
         # Consolidar todos os DataFrames
         df_consolidado = pd.concat(dfs, ignore_index=True)
-        st.success(f"🎉 **Consolidação concluída!** Total de {len(df_consolidado)} registros de {len(dfs)} arquivos.")
+        st.success(f"🎉 **Consolidação concluída!** Total de {len(df_consolidado)} registros de {len(dfs)} arquivos em {tempo_total:.2f}s.")
         return df_consolidado
     else:
         st.error("❌ Nenhum arquivo foi processado com sucesso.")
         return None
 
-# Função para calcular métricas
-def calcular_metricas(dados):
-    if not dados:
-        return {
-            'total_pacotes': 0,
-            'flutuantes': 0,
-            'flutuantes_revertidos': 0,
-            'erros_sorting': 0,
-            'erros_etiquetagem': 0,
-            'taxa_flutuantes': 0,
-            'taxa_erros_sorting': 0,
-            'taxa_erros_etiquetagem': 0
-        }
-    
-    total_pacotes = sum(d['volume_diario'] for d in dados)
-    flutuantes = sum(d['flutuantes'] for d in dados)
-    # Assumindo que flutuantes_revertidos é um campo opcional, se não existir será 0
-    flutuantes_revertidos = sum(d.get('flutuantes_revertidos', 0) for d in dados)
-    erros_sorting = sum(d['erros_sorting'] for d in dados)
-    erros_etiquetagem = sum(d['erros_etiquetagem'] for d in dados)
-    
-    return {
-        'total_pacotes': total_pacotes,
-        'flutuantes': flutuantes,
-        'flutuantes_revertidos': flutuantes_revertidos,
-        'erros_sorting': erros_sorting,
-        'erros_etiquetagem': erros_etiquetagem,
-        'taxa_flutuantes': (flutuantes / total_pacotes * 100) if total_pacotes > 0 else 0,
-        'taxa_erros_sorting': (erros_sorting / total_pacotes * 100) if total_pacotes > 0 else 0,
-        'taxa_erros_etiquetagem': (erros_etiquetagem / total_pacotes * 100) if total_pacotes > 0 else 0
-    }
-
 # Header principal
 st.markdown("""
 <div class="main-header">
@@ -406,6 +355,9 @@ st.sidebar.markdown(f"""
 </div>
 """, unsafe_allow_html=True)
 
+# Mensagens enfileiradas antes do último st.rerun()
+exibir_notificacoes()
+
 # ABA 1: Dashboard Manual
 if selected == "📊 Dashboard Manual":
     # Botão para recarregar dados
@@ -413,6 +365,7 @@ if selected == "📊 Dashboard Manual":
     with col2:
         if st.button("🔄 Recarregar Dados", type="secondary"):
             st.cache_data.clear()
+            limpar_cache_banco()
             show_temp_message("✅ Cache limpo! Dados recarregados.", "success")
             st.rerun()
     
@@ -420,6 +373,7 @@ if selected == "📊 Dashboard Manual":
     with col2:
         if st.button("💾 Forçar Dados Locais", type="secondary"):
             st.cache_data.clear()
+            limpar_cache_banco()
             # Limpar dados do session_state se existirem
             if 'dados_carregados' in st.session_state:
                 del st.session_state['dados_carregados']
@@ -497,7 +451,7 @@ if selected == "📊 Dashboard Manual":
                     else:
                         # Adicionar novos dados
                         dados_locais.append(novo_dado)
-                        resultado_salvamento = save_data(dados_locais)
+                        resultado_salvamento = save_data(dados_locais, alterados=[novo_dado['data']])
                         
                         if resultado_salvamento:
                             show_temp_message("Novos dados salvos com sucesso!", "success", 5)
@@ -614,7 +568,7 @@ if selected == "📊 Dashboard Manual":
                                         dados_locais[i] = dados_atualizados
                                         break
                                 
-                                resultado = save_data(dados_locais)
+                                resultado = save_data(dados_locais, alterados=[data_selecionada])
                                 if resultado:
                                     show_temp_message("Dados atualizados com sucesso!", "success", 5)
                                     st.rerun()
@@ -625,7 +579,7 @@ if selected == "📊 Dashboard Manual":
                             if st.button("🗑️ Excluir Registro", type="secondary", key="excluir_dados"):
                                 # Remover dados da data selecionada
                                 dados_locais = [d for d in dados_locais if d['data'] != data_selecionada]
-                                resultado = save_data(dados_locais)
+                                resultado = save_data(dados_locais, removidos=[data_selecionada])
                                 if resultado:
                                     show_temp_message("Registro excluído com sucesso!", "success", 5)
                                     st.rerun()
@@ -824,7 +778,8 @@ if selected == "📊 Dashboard Manual":
                                 st.info(f"➕ Adicionados {len(dados_csv_processados)} novos registros")
                             
                             # Salvar dados
-                            resultado_salvamento = save_data(dados_finais)
+                            resultado_salvamento = save_data(dados_finais,
+                                                             alterados=[d['data'] for d in dados_csv_processados])
                             
                             if resultado_salvamento:
                                 show_temp_message("Dados CSV salvos com sucesso!", "success", 5)
@@ -876,11 +831,11 @@ if selected == "📊 Dashboard Manual":
         st.markdown("#### 📅 Filtro por Período")
         
         # Calcular data de início inteligente baseada nos dados disponíveis
+        modelo = obter_modelo(dados)
         if dados:
             # Se há dados, usar a data mais antiga como início padrão
-            datas_disponiveis = [datetime.strptime(d['data'], '%Y-%m-%d').date() for d in dados]
-            data_inicio_padrao = min(datas_disponiveis)
-            data_fim_padrao = max(datas_disponiveis)
+            data_inicio_padrao = modelo.primeira_data
+            data_fim_padrao = modelo.ultima_data
         else:
             # Se não há dados, usar padrão de 30 dias
             data_inicio_padrao = datetime.now().date() - timedelta(days=30)
@@ -948,51 +903,46 @@ if selected == "📊 Dashboard Manual":
                     del st.session_state[key]
             st.rerun()
     
-    # Aplicar filtros aos dados
-    dados_filtrados = dados.copy() if dados else []
+    # Aplicar filtros aos dados: recorte do modelo colunar (somas acumuladas por data)
+    inicio_filtro, fim_filtro = None, None
+    if tipo_filtro == "📅 Período de Data" and data_inicio and data_fim:
+        inicio_filtro, fim_filtro = data_inicio, data_fim
+    elif tipo_filtro == "📅 Semana do Ano" and semana_selecionada:
+        inicio_filtro, fim_filtro = semana_selecionada['inicio'].date(), semana_selecionada['fim'].date()
+    df_filtrado = modelo.periodo(inicio_filtro, fim_filtro)
     
     if tipo_filtro == "📅 Período de Data":
         if data_inicio and data_fim:
-            dados_filtrados = [
-                d for d in dados_filtrados 
-                if data_inicio <= datetime.strptime(d['data'], '%Y-%m-%d').date() <= data_fim
-            ]
-            if dados_filtrados:
-                st.info(f"📅 Filtrado por período: {data_inicio.strftime('%d/%m/%Y')} a {data_fim.strftime('%d/%m/%Y')} ({len(dados_filtrados)} registros)")
+            if not df_filtrado.empty:
+                st.info(f"📅 Filtrado por período: {data_inicio.strftime('%d/%m/%Y')} a {data_fim.strftime('%d/%m/%Y')} ({len(df_filtrado)} registros)")
             else:
                 st.warning(f"⚠️ Nenhum dado encontrado no período: {data_inicio.strftime('%d/%m/%Y')} a {data_fim.strftime('%d/%m/%Y')}")
                 st.info("💡 Dica: Ajuste o período ou selecione 'Todos os Dados' para ver os dados disponíveis")
     
     elif tipo_filtro == "📅 Semana do Ano" and semana_selecionada:
-        dados_filtrados = [
-            d for d in dados_filtrados 
-            if semana_selecionada['inicio'].date() <= datetime.strptime(d['data'], '%Y-%m-%d').date() <= semana_selecionada['fim'].date()
-        ]
-        if dados_filtrados:
-            st.info(f"📅 Filtrado por semana: {semana_selecionada['label']} ({len(dados_filtrados)} registros)")
+        if not df_filtrado.empty:
+            st.info(f"📅 Filtrado por semana: {semana_selecionada['label']} ({len(df_filtrado)} registros)")
         else:
             st.warning(f"⚠️ Nenhum dado encontrado na semana: {semana_selecionada['label']}")
             st.info("💡 Dica: Selecione outra semana ou 'Todos os Dados' para ver os dados disponíveis")
     
     else:
-        st.info(f"📊 Exibindo todos os dados ({len(dados_filtrados)} registros)")
+        st.info(f"📊 Exibindo todos os dados ({len(df_filtrado)} registros)")
 
     # Estatísticas do período filtrado
-    if dados_filtrados:
-        datas_filtradas = [datetime.strptime(d['data'], '%Y-%m-%d').date() for d in dados_filtrados]
-        periodo_info = f"📅 Período: {min(datas_filtradas).strftime('%d/%m/%Y')} a {max(datas_filtradas).strftime('%d/%m/%Y')}"
-        st.success(f"{periodo_info} | 📊 {len(dados_filtrados)} dias de dados")
+    if not df_filtrado.empty:
+        periodo_info = f"📅 Período: {df_filtrado['data'].iloc[0].strftime('%d/%m/%Y')} a {df_filtrado['data'].iloc[-1].strftime('%d/%m/%Y')}"
+        st.success(f"{periodo_info} | 📊 {len(df_filtrado)} dias de dados")
     else:
         # Mostrar informações sobre todos os dados disponíveis
         if dados:
-            datas_disponiveis = [datetime.strptime(d['data'], '%Y-%m-%d').date() for d in dados]
-            periodo_disponivel = f"📅 Dados disponíveis: {min(datas_disponiveis).strftime('%d/%m/%Y')} a {max(datas_disponiveis).strftime('%d/%m/%Y')}"
+            periodo_disponivel = f"📅 Dados disponíveis: {modelo.primeira_data.strftime('%d/%m/%Y')} a {modelo.ultima_data.strftime('%d/%m/%Y')}"
             st.info(f"{periodo_disponivel} | 📊 {len(dados)} dias de dados | 💡 Ajuste os filtros para ver dados específicos")
         else:
             st.warning("📝 Nenhum dado disponível. Adicione dados usando o formulário acima.")
 
     # Calcular métricas com dados filtrados
-    metricas = calcular_metricas(dados_filtrados)
+    metricas = modelo.metricas(inicio_filtro, fim_filtro)
 
     # Status geral da operação
     if dados:
@@ -1065,51 +1015,24 @@ if selected == "📊 Dashboard Manual":
         """, unsafe_allow_html=True)
 
     # Comparação com período anterior (se aplicável)
-    if dados_filtrados and len(dados_filtrados) > 0 and len(dados) > len(dados_filtrados):
+    if not df_filtrado.empty and len(dados) > len(df_filtrado):
         # Verificar se há dados suficientes para comparação
         if len(dados) >= 2:  # Pelo menos 2 dias de dados
             st.markdown("### 📈 Comparação com Período Anterior")
             
-            # NOVA LÓGICA: Comparar por semana do ano em vez de período consecutivo
-            import pandas as pd
-            from datetime import datetime
-            
-            # Converter dados para DataFrame para facilitar análise
-            df_todos = pd.DataFrame(dados)
-            df_filtrados = pd.DataFrame(dados_filtrados)
-            
-            # Adicionar coluna de semana do ano
-            df_todos['data'] = pd.to_datetime(df_todos['data'])
-            df_filtrados['data'] = pd.to_datetime(df_filtrados['data'])
-            df_todos['semana_ano'] = df_todos['data'].dt.isocalendar().week
-            df_filtrados['semana_ano'] = df_filtrados['data'].dt.isocalendar().week
-            
-            # Identificar a semana do período atual
-            semanas_atual = sorted(df_filtrados['semana_ano'].unique())
-            semana_atual = semanas_atual[0] if len(semanas_atual) == 1 else f"{min(semanas_atual)}-{max(semanas_atual)}"
-            
-            # Buscar dados da semana anterior
-            dados_anteriores = []
-            if len(semanas_atual) == 1:
-                # Se todos os dados filtrados são da mesma semana
-                semana_anterior = semanas_atual[0] - 1
-                dados_semana_anterior = df_todos[df_todos['semana_ano'] == semana_anterior]
-                if not dados_semana_anterior.empty:
-                    dados_anteriores = dados_semana_anterior.to_dict('records')
-            else:
-                # Se os dados filtrados abrangem múltiplas semanas, usar lógica anterior como fallback
-                dias_periodo_atual = len(dados_filtrados)
-                dados_anteriores = dados[:-dias_periodo_atual][-dias_periodo_atual:] if len(dados) >= dias_periodo_atual * 2 else []
+            # Semana ISO anterior se o período filtrado cabe numa semana; senão o mesmo número de dias antes dele
+            primeiro_dia, ultimo_dia = df_filtrado['data'].iloc[0], df_filtrado['data'].iloc[-1]
+            anterior_inicio, anterior_fim = modelo.periodo_anterior(primeiro_dia, ultimo_dia)
+            metricas_anteriores = modelo.metricas(anterior_inicio, anterior_fim)
             
-            if dados_anteriores:
-                metricas_anteriores = calcular_metricas(dados_anteriores)
-                
+            if metricas_anteriores['dias'] > 0:
                 # Mostrar informações de debug sobre a comparação
-                if len(semanas_atual) == 1:
-                    semana_anterior = semanas_atual[0] - 1
-                    st.info(f"📊 Comparando Semana {semanas_atual[0]} vs Semana {semana_anterior} (mesmo número de dias)")
+                if modelo.semana_iso(primeiro_dia) == modelo.semana_iso(ultimo_dia):
+                    semana_atual = df_filtrado['semana_iso'].iloc[0]
+                    semana_anterior = anterior_inicio.isocalendar()[1]
+                    st.info(f"📊 Comparando Semana {semana_atual} vs Semana {semana_anterior} (mesmo número de dias)")
                 else:
-                    st.info(f"📊 Comparando período de {len(dados_filtrados)} dias vs período anterior equivalente")
+                    st.info(f"📊 Comparando período de {len(df_filtrado)} dias vs período anterior equivalente")
                 
                 col1, col2, col3, col4 = st.columns(4)
                 
@@ -1172,10 +1095,8 @@ if selected == "📊 Dashboard Manual":
     # Gráficos
     st.markdown("## 📊 Análise Temporal")
 
-    if dados_filtrados:
-        df = pd.DataFrame(dados_filtrados)
-        df['data'] = pd.to_datetime(df['data'])
-        df = df.sort_values('data')
+    if not df_filtrado.empty:
+        df = df_filtrado[['data'] + CAMPOS_DADOS_OPERACAO]
         
         # Gráfico de volume e erros
         fig = make_subplots(
@@ -1306,12 +1227,12 @@ if selected == "📊 Dashboard Manual":
     # Seção de Insights
     st.markdown("## 💡 Insights e Recomendações")
 
-    if dados_filtrados:
-        # Usar dados filtrados para insights
-        dados_para_insights = dados_filtrados[-7:] if len(dados_filtrados) >= 7 else dados_filtrados
-        media_flutuantes = np.mean([d['flutuantes'] for d in dados_para_insights])
-        media_erros_sorting = np.mean([d['erros_sorting'] for d in dados_para_insights])
-        media_erros_etiquetagem = np.mean([d['erros_etiquetagem'] for d in dados_para_insights])
+    if not df_filtrado.empty:
+        # Usar os últimos 7 dias filtrados para insights
+        dados_para_insights = df_filtrado.tail(7)
+        media_flutuantes = dados_para_insights['flutuantes'].mean()
+        media_erros_sorting = dados_para_insights['erros_sorting'].mean()
+        media_erros_etiquetagem = dados_para_insights['erros_etiquetagem'].mean()
         
         col1, col2, col3 = st.columns(3)
         
@@ -1479,28 +1400,8 @@ elif selected == "📈 Relatório CSV":
             if total_flutuantes_banco > 0:
                 st.success(f"✅ Encontrados {total_flutuantes_banco} flutuantes no banco para {data_operacao}")
                 
-                # Buscar dados detalhados de flutuantes
-                df_flutuantes_detalhado = carregar_pacotes_flutuantes(limit=10000)
-                if not df_flutuantes_detalhado.empty:
-                    # Filtrar por data de recebimento
-                    df_flutuantes_detalhado['data_recebimento'] = pd.to_datetime(df_flutuantes_detalhado['data_recebimento'])
-                    df_flutuantes_data = df_flutuantes_detalhado[
-                        df_flutuantes_detalhado['data_recebimento'].dt.date == pd.to_datetime(data_operacao).date()
-                    ]
-                    
-                    if not df_flutuantes_data.empty:
-                        # Contar flutuantes por operador real
-                        flutuantes_por_operador_banco = df_flutuantes_data['operador_real'].value_counts().to_dict()
-                        
-                        # Mapear operadores do CSV para operadores reais do banco
-                        for operador_csv in operadores_unicos:
-                            # Buscar flutuantes para este operador (pode haver variações no nome)
-                            flutuantes_operador = 0
-                            for operador_real, count in flutuantes_por_operador_banco.items():
-                                if operador_csv.lower() in operador_real.lower() or operador_real.lower() in operador_csv.lower():
-                                    flutuantes_operador = count
-                                    break
-                            flutuantes_banco[operador_csv] = flutuantes_operador
+                # Contagem agregada por operador nesta data, casada pelo código [ops]
+                flutuantes_banco = contar_flutuantes_por_operador_na_data(data_operacao, operadores_unicos)
         
         col1, col2 = st.columns([2, 1])
         
@@ -1705,7 +1606,35 @@ elif selected == "📦 Pacotes Flutuantes":
             help="O arquivo deve conter as colunas: Estacao, Semana, Data de Recebimento, Destino, Aging, Tracking Number, Foi Expedido, Operador, Status SPX, Status, Foi encontrado, Descricao do item, Operador Real"
         )
         
-        if uploaded_file is not None:
+        importar_em_blocos = st.checkbox(
+            "📦 Arquivo grande: importar em blocos",
+            value=False,
+            help="Lê, normaliza e grava o arquivo bloco a bloco, sem carregá-lo inteiro em memória. Não exibe preview.",
+            key="importar_flutuantes_em_blocos"
+        )
+        
+        if uploaded_file is not None and importar_em_blocos:
+            modo_salvamento_blocos = st.radio(
+                "Escolha o modo de salvamento:",
+                ["🔄 Upsert (Atualizar + Inserir)", "➕ Apenas Inserir"],
+                help="Upsert: atualiza registros existentes e adiciona novos. Apenas Inserir: adiciona apenas tracking numbers novos, ignorando os já existentes.",
+                key="modo_salvamento_flutuantes_blocos"
+            )
+            
+            if st.button("💾 Importar em Blocos", type="primary", key="importar_flutuantes_blocos"):
+                upsert_mode = "🔄 Upsert (Atualizar + Inserir)" in modo_salvamento_blocos
+                resumo = importar_csv_flutuantes_em_blocos(uploaded_file, uploaded_file.name, upsert_mode)
+                
+                if resumo['blocos'] and not resumo['falhas']:
+                    show_temp_message(
+                        f"✅ {resumo['registros_validos']} registros importados em {resumo['blocos']} blocos "
+                        f"({resumo['inseridos']} inseridos, {resumo['atualizados']} atualizados, {resumo['ignorados']} ignorados)",
+                        "success"
+                    )
+                else:
+                    show_temp_message(f"❌ Importação com falhas em {len(resumo['falhas'])} bloco(s)", "error")
+        
+        elif uploaded_file is not None:
             # Processar CSV
             df_flutuantes = processar_csv_flutuantes(uploaded_file)
             
@@ -1743,7 +1672,7 @@ elif selected == "📦 Pacotes Flutuantes":
                     modo_salvamento = st.radio(
                         "Escolha o modo de salvamento:",
                         ["🔄 Upsert (Atualizar + Inserir)", "➕ Apenas Inserir"],
-                        help="Upsert: atualiza registros existentes e adiciona novos. Apenas Inserir: adiciona todos como novos registros."
+                        help="Upsert: atualiza registros existentes e adiciona novos. Apenas Inserir: adiciona apenas tracking numbers novos, ignorando os já existentes."
                     )
                 
                 with col2:
@@ -1781,7 +1710,7 @@ elif selected == "📦 Pacotes Flutuantes":
         
         with col1:
             # Carregar lista de operadores para o filtro múltiplo
-            df_operadores = carregar_pacotes_flutuantes(10000)  # Carregar mais dados para obter todos os operadores
+            df_operadores = listar_operadores_flutuantes()  # Um nome por linha, agrupado no banco
             if not df_operadores.empty and 'operador_real' in df_operadores.columns:
                 # Aplicar normalização para evitar duplicados na lista
                 df_operadores_normalizado = agrupar_operadores_duplicados(df_operadores)
@@ -1943,47 +1872,46 @@ elif selected == "📦 Pacotes Flutuantes":
             data_inicio = None
             data_fim = None
         
-        # Carregar dados filtrados com mapeamento automático
-        df_flutuantes_ranking = carregar_pacotes_flutuantes_com_mapeamento(10000, operadores_selecionados, data_inicio, data_fim)
+        # Período anterior (mesmo tamanho do período atual) para cálculo de tendência
+        dias_periodo = {
+            "Últimos 15 dias": 15,
+            "Últimos 30 dias": 30,
+            "Últimos 60 dias": 60,
+            "Últimos 90 dias": 90,
+            "Último ano": 365
+        }
+        
+        if periodo_analise in dias_periodo:
+            dias = dias_periodo[periodo_analise]
+            data_periodo_anterior_inicio = (hoje - timedelta(days=dias*2)).strftime('%Y-%m-%d')
+            data_periodo_anterior_fim = (hoje - timedelta(days=dias)).strftime('%Y-%m-%d')
+        else:
+            data_periodo_anterior_inicio = None
+            data_periodo_anterior_fim = None
+        
+        criterios_ranking = {
+            "Total de Flutuantes": 'total',
+            "Flutuantes Recentes (últimos 7 dias)": 'recentes',
+            "Taxa de Encontrados": 'taxa',
+            "Aging Médio": 'aging',
+            "Melhoria de Performance": 'melhoria',  # Menos flutuantes = melhoria
+            "Piora de Performance": 'piora'  # Mais flutuantes = piora
+        }
         
-        if not df_flutuantes_ranking.empty:
-            # Aplicar normalização de operadores duplicados
-            df_flutuantes_ranking = agrupar_operadores_duplicados(df_flutuantes_ranking)
+        # Ranking agregado no banco: uma linha por operador (códigos duplicados já agrupados),
+        # com flutuantes recentes, tendência e ordenação pelo critério selecionado
+        data_7_dias_atras = (hoje - timedelta(days=7)).strftime('%Y-%m-%d')
+        ranking_evolucao = obter_ranking_flutuantes_periodo(
+            data_inicio, data_fim, operadores_selecionados, data_7_dias_atras,
+            data_periodo_anterior_inicio, data_periodo_anterior_fim,
+            criterios_ranking.get(criterio_ordenacao, 'total')
+        )
+        
+        if not ranking_evolucao.empty:
             # Calcular dados de evolução temporal
             st.markdown("### 📈 Análise de Evolução e Performance")
             
-            # Calcular métricas por operador
-            ranking_evolucao = df_flutuantes_ranking.groupby('operador_real').agg({
-                'operador_real': 'count',
-                'foi_encontrado': lambda x: x.sum(),
-                'aging': 'mean',
-                'data_recebimento': ['min', 'max']
-            }).reset_index()
-            
-            # Renomear colunas
-            ranking_evolucao.columns = [
-                'operador_real', 'total_flutuantes', 'flutuantes_encontrados',
-                'aging_medio', 'primeira_data', 'ultima_data'
-            ]
-            
-            # Calcular métricas adicionais
-            ranking_evolucao['flutuantes_nao_encontrados'] = ranking_evolucao['total_flutuantes'] - ranking_evolucao['flutuantes_encontrados']
-            ranking_evolucao['taxa_encontrados'] = (ranking_evolucao['flutuantes_encontrados'] / ranking_evolucao['total_flutuantes'] * 100).round(2)
-            
-            # Calcular flutuantes recentes (últimos 7 dias)
-            data_7_dias_atras = (hoje - timedelta(days=7)).strftime('%Y-%m-%d')
-            df_recentes = df_flutuantes_ranking[df_flutuantes_ranking['data_recebimento'] >= data_7_dias_atras]
-            
-            if not df_recentes.empty:
-                flutuantes_recentes = df_recentes.groupby('operador_real').size().reset_index(name='flutuantes_recentes')
-                ranking_evolucao = ranking_evolucao.merge(flutuantes_recentes, on='operador_real', how='left')
-                ranking_evolucao['flutuantes_recentes'] = ranking_evolucao['flutuantes_recentes'].fillna(0)
-            else:
-                ranking_evolucao['flutuantes_recentes'] = 0
-            
             # Calcular dias desde o último flutuante
-            ranking_evolucao['ultima_data'] = pd.to_datetime(ranking_evolucao['ultima_data'], errors='coerce')
-            # Verificar se a conversão foi bem-sucedida antes de calcular os dias
             ranking_evolucao['dias_ultimo_flutuante'] = ranking_evolucao['ultima_data'].apply(
                 lambda x: (hoje - x.date()).days if pd.notna(x) else 999  # 999 para datas inválidas
             )
@@ -2020,52 +1948,6 @@ elif selected == "📦 Pacotes Flutuantes":
             
             ranking_evolucao['status_performance'] = ranking_evolucao.apply(calcular_status_performance, axis=1)
             
-            # Calcular tendência (comparar últimos 7 dias vs período anterior)
-            if periodo_analise != "Últimos 7 dias" and periodo_analise != "Todos os dados":
-                # Período anterior (mesmo tamanho do período atual)
-                dias_periodo = {
-                    "Últimos 15 dias": 15,
-                    "Últimos 30 dias": 30,
-                    "Últimos 60 dias": 60,
-                    "Últimos 90 dias": 90,
-                    "Último ano": 365
-                }
-                
-                dias = dias_periodo.get(periodo_analise, 30)
-                data_periodo_anterior_inicio = (hoje - timedelta(days=dias*2)).strftime('%Y-%m-%d')
-                data_periodo_anterior_fim = (hoje - timedelta(days=dias)).strftime('%Y-%m-%d')
-                
-                df_periodo_anterior = carregar_pacotes_flutuantes(10000, None, data_periodo_anterior_inicio, data_periodo_anterior_fim)
-                if not df_periodo_anterior.empty and operadores_selecionados:
-                    df_periodo_anterior = df_periodo_anterior[df_periodo_anterior['operador_real'].isin(operadores_selecionados)]
-                
-                if not df_periodo_anterior.empty:
-                    flutuantes_anterior = df_periodo_anterior.groupby('operador_real').size().reset_index(name='flutuantes_anterior')
-                    ranking_evolucao = ranking_evolucao.merge(flutuantes_anterior, on='operador_real', how='left')
-                    ranking_evolucao['flutuantes_anterior'] = ranking_evolucao['flutuantes_anterior'].fillna(0)
-                    ranking_evolucao['tendencia'] = ranking_evolucao['total_flutuantes'] - ranking_evolucao['flutuantes_anterior']
-                    ranking_evolucao['tendencia_percentual'] = ((ranking_evolucao['total_flutuantes'] - ranking_evolucao['flutuantes_anterior']) / ranking_evolucao['flutuantes_anterior'] * 100).fillna(0).round(1)
-                else:
-                    ranking_evolucao['tendencia'] = 0
-                    ranking_evolucao['tendencia_percentual'] = 0
-            else:
-                ranking_evolucao['tendencia'] = 0
-                ranking_evolucao['tendencia_percentual'] = 0
-            
-            # Ordenar baseado no critério selecionado
-            if criterio_ordenacao == "Total de Flutuantes":
-                ranking_evolucao = ranking_evolucao.sort_values('total_flutuantes', ascending=False)
-            elif criterio_ordenacao == "Flutuantes Recentes (últimos 7 dias)":
-                ranking_evolucao = ranking_evolucao.sort_values('flutuantes_recentes', ascending=False)
-            elif criterio_ordenacao == "Taxa de Encontrados":
-                ranking_evolucao = ranking_evolucao.sort_values('taxa_encontrados', ascending=False)
-            elif criterio_ordenacao == "Aging Médio":
-                ranking_evolucao = ranking_evolucao.sort_values('aging_medio', ascending=True)
-            elif criterio_ordenacao == "Melhoria de Performance":
-                ranking_evolucao = ranking_evolucao.sort_values('tendencia', ascending=True)  # Menos flutuantes = melhoria
-            elif criterio_ordenacao == "Piora de Performance":
-                ranking_evolucao = ranking_evolucao.sort_values('tendencia', ascending=False)  # Mais flutuantes = piora
-            
             # Métricas gerais
             col1, col2, col3, col4 = st.columns(4)
             
@@ -2135,7 +2017,7 @@ elif selected == "📦 Pacotes Flutuantes":
                 
                 if operador_selecionado:
                     # Filtrar dados do operador selecionado
-                    df_operador = df_flutuantes_ranking[df_flutuantes_ranking['operador_real'] == operador_selecionado]
+                    df_operador = obter_flutuantes_por_data_operador(data_inicio, data_fim, [operador_selecionado])
                     dados_operador = df_display[df_display['Operador'] == operador_selecionado].iloc[0]
                     
                     col1, col2 = st.columns(2)
@@ -2199,8 +2081,7 @@ elif selected == "📦 Pacotes Flutuantes":
                         
                         # Gráfico de flutuantes por data
                         if not df_operador.empty:
-                            df_operador['data_recebimento'] = pd.to_datetime(df_operador['data_recebimento'])
-                            flutuantes_por_data = df_operador.groupby('data_recebimento').size().reset_index(name='quantidade')
+                            flutuantes_por_data = df_operador.groupby('data_recebimento')['total_flutuantes'].sum().reset_index(name='quantidade')
                             
                             fig = px.line(
                                 flutuantes_por_data,
@@ -2310,169 +2191,184 @@ elif selected == "📦 Pacotes Flutuantes":
             st.markdown("### 📋 Detalhamento dos Flutuantes")
             st.markdown("Tabela completa com todos os flutuantes encontrados nos filtros aplicados, ordenados por data (mais recente primeiro).")
             
-            # Preparar dados para exibição
-            df_detalhamento = df_flutuantes_ranking.copy()
+            # Registros individuais só são baixados sob demanda
+            carregar_detalhamento = st.checkbox(
+                "Carregar registros individuais",
+                value=False,
+                help="Baixa todos os flutuantes do período selecionado. Pode demorar em períodos longos.",
+                key="carregar_detalhamento_flutuantes"
+            )
             
-            # Ordenar por data de recebimento (mais recente primeiro)
-            df_detalhamento = df_detalhamento.sort_values('data_recebimento', ascending=False)
+            if carregar_detalhamento:
+                df_detalhamento = carregar_pacotes_flutuantes_com_mapeamento(
+                    None, operadores_selecionados, data_inicio, data_fim,
+                    colunas=COLUNAS_CONSULTA['detalhamento_flutuantes']
+                )
+                df_detalhamento = agrupar_operadores_duplicados(df_detalhamento)
+            else:
+                df_detalhamento = pd.DataFrame()
             
-            # Formatar dados para melhor visualização
-            df_display_detalhes = df_detalhamento.copy()
+            if not df_detalhamento.empty:
+                # Ordenar por data de recebimento (mais recente primeiro)
+                df_detalhamento = df_detalhamento.sort_values('data_recebimento', ascending=False)
             
-            # Formatar data de recebimento
-            if 'data_recebimento' in df_display_detalhes.columns:
-                df_display_detalhes['data_recebimento'] = pd.to_datetime(df_display_detalhes['data_recebimento'], errors='coerce').dt.strftime('%d/%m/%Y')
+                # Formatar dados para melhor visualização
+                df_display_detalhes = df_detalhamento.copy()
             
-            # Formatar data de importação
-            if 'importado_em' in df_display_detalhes.columns:
-                df_display_detalhes['importado_em'] = pd.to_datetime(df_display_detalhes['importado_em'], errors='coerce').dt.strftime('%d/%m/%Y %H:%M')
+                # Formatar data de recebimento
+                if 'data_recebimento' in df_display_detalhes.columns:
+                    df_display_detalhes['data_recebimento'] = pd.to_datetime(df_display_detalhes['data_recebimento'], errors='coerce').dt.strftime('%d/%m/%Y')
             
-            # Adicionar status visual para foi_encontrado
-            if 'foi_encontrado' in df_display_detalhes.columns:
-                df_display_detalhes['status_encontrado'] = df_display_detalhes['foi_encontrado'].apply(
-                    lambda x: '✅ Encontrado' if x else '❌ Não Encontrado'
-                )
+                # Formatar data de importação
+                if 'importado_em' in df_display_detalhes.columns:
+                    df_display_detalhes['importado_em'] = pd.to_datetime(df_display_detalhes['importado_em'], errors='coerce').dt.strftime('%d/%m/%Y %H:%M')
             
-            # Adicionar status visual para foi_expedido
-            if 'foi_expedido' in df_display_detalhes.columns:
-                df_display_detalhes['status_expedido'] = df_display_detalhes['foi_expedido'].apply(
-                    lambda x: '📦 Expedido' if x else '⏳ Não Expedido'
-                )
+                # Adicionar status visual para foi_encontrado
+                if 'foi_encontrado' in df_display_detalhes.columns:
+                    df_display_detalhes['status_encontrado'] = df_display_detalhes['foi_encontrado'].apply(
+                        lambda x: '✅ Encontrado' if x else '❌ Não Encontrado'
+                    )
             
-            # Adicionar classificação do aging
-            if 'aging' in df_display_detalhes.columns:
-                df_display_detalhes['aging_status'] = df_display_detalhes['aging'].apply(
-                    lambda x: f"{x} dias - {'🔴 Crítico' if x > 15 else '🟡 Atenção' if x > 7 else '🟢 Normal'}"
-                )
+                # Adicionar status visual para foi_expedido
+                if 'foi_expedido' in df_display_detalhes.columns:
+                    df_display_detalhes['status_expedido'] = df_display_detalhes['foi_expedido'].apply(
+                        lambda x: '📦 Expedido' if x else '⏳ Não Expedido'
+                    )
             
-            # Selecionar e renomear colunas para exibição
-            colunas_detalhamento = {
-                'data_recebimento': 'Data Recebimento',
-                'operador_real': 'Operador',
-                'tracking_number': 'Tracking Number',
-                'destino': 'Destino',
-                'aging_status': 'Aging',
-                'status_encontrado': 'Status Encontrado',
-                'status_expedido': 'Status Expedido',
-                'estacao': 'Estação',
-                'descricao_item': 'Descrição do Item',
-                'status_spx': 'Status SPX',
-                'importado_em': 'Importado em'
-            }
+                # Adicionar classificação do aging
+                if 'aging' in df_display_detalhes.columns:
+                    df_display_detalhes['aging_status'] = df_display_detalhes['aging'].apply(
+                        lambda x: f"{x} dias - {'🔴 Crítico' if x > 15 else '🟡 Atenção' if x > 7 else '🟢 Normal'}"
+                    )
+            
+                # Selecionar e renomear colunas para exibição
+                colunas_detalhamento = {
+                    'data_recebimento': 'Data Recebimento',
+                    'operador_real': 'Operador',
+                    'tracking_number': 'Tracking Number',
+                    'destino': 'Destino',
+                    'aging_status': 'Aging',
+                    'status_encontrado': 'Status Encontrado',
+                    'status_expedido': 'Status Expedido',
+                    'estacao': 'Estação',
+                    'descricao_item': 'Descrição do Item',
+                    'status_spx': 'Status SPX',
+                    'importado_em': 'Importado em'
+                }
             
-            # Verificar quais colunas existem e aplicar renomeação
-            colunas_existentes = {k: v for k, v in colunas_detalhamento.items() if k in df_display_detalhes.columns}
-            df_final = df_display_detalhes[list(colunas_existentes.keys())].rename(columns=colunas_existentes)
+                # Verificar quais colunas existem e aplicar renomeação
+                colunas_existentes = {k: v for k, v in colunas_detalhamento.items() if k in df_display_detalhes.columns}
+                df_final = df_display_detalhes[list(colunas_existentes.keys())].rename(columns=colunas_existentes)
             
-            # Métricas do detalhamento
-            col1, col2, col3, col4 = st.columns(4)
+                # Métricas do detalhamento
+                col1, col2, col3, col4 = st.columns(4)
             
-            with col1:
-                total_registros = len(df_final)
-                st.metric("Total de Flutuantes", f"{total_registros:,}")
+                with col1:
+                    total_registros = len(df_final)
+                    st.metric("Total de Flutuantes", f"{total_registros:,}")
             
-            with col2:
-                if 'Status Encontrado' in df_final.columns:
-                    encontrados = len(df_final[df_final['Status Encontrado'] == '✅ Encontrado'])
-                    st.metric("Encontrados", f"{encontrados}")
+                with col2:
+                    if 'Status Encontrado' in df_final.columns:
+                        encontrados = len(df_final[df_final['Status Encontrado'] == '✅ Encontrado'])
+                        st.metric("Encontrados", f"{encontrados}")
             
-            with col3:
-                if 'Status Expedido' in df_final.columns:
-                    expedidos = len(df_final[df_final['Status Expedido'] == '📦 Expedido'])
-                    st.metric("Expedidos", f"{expedidos}")
+                with col3:
+                    if 'Status Expedido' in df_final.columns:
+                        expedidos = len(df_final[df_final['Status Expedido'] == '📦 Expedido'])
+                        st.metric("Expedidos", f"{expedidos}")
             
-            with col4:
-                if 'Aging' in df_final.columns:
-                    aging_medio = df_detalhamento['aging'].mean()
-                    st.metric("Aging Médio", f"{aging_medio:.1f} dias")
-            
-            # Filtros adicionais para a tabela
-            with st.expander("🔧 Filtros Adicionais para Tabela"):
-                col_filtro1, col_filtro2, col_filtro3 = st.columns(3)
-                
-                with col_filtro1:
-                    filtro_encontrado = st.selectbox(
-                        "Status Encontrado:",
-                        options=["Todos", "✅ Encontrado", "❌ Não Encontrado"],
-                        key="filtro_encontrado_detalhes"
-                    )
-                
-                with col_filtro2:
-                    filtro_expedido = st.selectbox(
-                        "Status Expedido:",
-                        options=["Todos", "📦 Expedido", "⏳ Não Expedido"],
-                        key="filtro_expedido_detalhes"
-                    )
+                with col4:
+                    if 'Aging' in df_final.columns:
+                        aging_medio = df_detalhamento['aging'].mean()
+                        st.metric("Aging Médio", f"{aging_medio:.1f} dias")
+            
+                # Filtros adicionais para a tabela
+                with st.expander("🔧 Filtros Adicionais para Tabela"):
+                    col_filtro1, col_filtro2, col_filtro3 = st.columns(3)
+                
+                    with col_filtro1:
+                        filtro_encontrado = st.selectbox(
+                            "Status Encontrado:",
+                            options=["Todos", "✅ Encontrado", "❌ Não Encontrado"],
+                            key="filtro_encontrado_detalhes"
+                        )
                 
-                with col_filtro3:
-                    if 'Estação' in df_final.columns:
-                        estacoes_disponiveis = ["Todas"] + sorted(df_final['Estação'].dropna().unique().tolist())
-                        filtro_estacao = st.selectbox(
-                            "Estação:",
-                            options=estacoes_disponiveis,
-                            key="filtro_estacao_detalhes"
+                    with col_filtro2:
+                        filtro_expedido = st.selectbox(
+                            "Status Expedido:",
+                            options=["Todos", "📦 Expedido", "⏳ Não Expedido"],
+                            key="filtro_expedido_detalhes"
                         )
-                    else:
-                        filtro_estacao = "Todas"
                 
-                # Aplicar filtros adicionais
-                df_filtrado = df_final.copy()
+                    with col_filtro3:
+                        if 'Estação' in df_final.columns:
+                            estacoes_disponiveis = ["Todas"] + sorted(df_final['Estação'].dropna().unique().tolist())
+                            filtro_estacao = st.selectbox(
+                                "Estação:",
+                                options=estacoes_disponiveis,
+                                key="filtro_estacao_detalhes"
+                            )
+                        else:
+                            filtro_estacao = "Todas"
+                
+                    # Aplicar filtros adicionais
+                    df_filtrado = df_final.copy()
                 
-                if filtro_encontrado != "Todos" and 'Status Encontrado' in df_filtrado.columns:
-                    df_filtrado = df_filtrado[df_filtrado['Status Encontrado'] == filtro_encontrado]
+                    if filtro_encontrado != "Todos" and 'Status Encontrado' in df_filtrado.columns:
+                        df_filtrado = df_filtrado[df_filtrado['Status Encontrado'] == filtro_encontrado]
                 
-                if filtro_expedido != "Todos" and 'Status Expedido' in df_filtrado.columns:
-                    df_filtrado = df_filtrado[df_filtrado['Status Expedido'] == filtro_expedido]
+                    if filtro_expedido != "Todos" and 'Status Expedido' in df_filtrado.columns:
+                        df_filtrado = df_filtrado[df_filtrado['Status Expedido'] == filtro_expedido]
                 
-                if filtro_estacao != "Todas" and 'Estação' in df_filtrado.columns:
-                    df_filtrado = df_filtrado[df_filtrado['Estação'] == filtro_estacao]
+                    if filtro_estacao != "Todas" and 'Estação' in df_filtrado.columns:
+                        df_filtrado = df_filtrado[df_filtrado['Estação'] == filtro_estacao]
                 
-                if len(df_filtrado) != len(df_final):
-                    st.info(f"📊 Filtros aplicados: {len(df_filtrado)} de {len(df_final)} registros")
+                    if len(df_filtrado) != len(df_final):
+                        st.info(f"📊 Filtros aplicados: {len(df_filtrado)} de {len(df_final)} registros")
             
-            # Se não há filtros, usar dados completos
-            if 'df_filtrado' not in locals():
-                df_filtrado = df_final
+                # Se não há filtros, usar dados completos
+                if 'df_filtrado' not in locals():
+                    df_filtrado = df_final
             
-            # Exibir tabela
-            if not df_filtrado.empty:
-                st.dataframe(
-                    df_filtrado,
-                    use_container_width=True,
-                    height=400  # Altura fixa para melhor visualização
-                )
+                # Exibir tabela
+                if not df_filtrado.empty:
+                    st.dataframe(
+                        df_filtrado,
+                        use_container_width=True,
+                        height=400  # Altura fixa para melhor visualização
+                    )
                 
-                # Botão para exportar detalhamento
-                if st.button("📥 Exportar Detalhamento para Excel", key="export_detalhamento"):
-                    nome_arquivo = f"detalhamento_flutuantes_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+                    # Botão para exportar detalhamento
+                    if st.button("📥 Exportar Detalhamento para Excel", key="export_detalhamento"):
+                        nome_arquivo = f"detalhamento_flutuantes_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
                     
-                    # Usar dados originais para exportação (com tipos corretos)
-                    df_export = df_detalhamento.copy()
-                    if 'data_recebimento' in df_export.columns:
-                        df_export['data_recebimento'] = pd.to_datetime(df_export['data_recebimento'], errors='coerce')
+                        # Usar dados originais para exportação (com tipos corretos)
+                        df_export = df_detalhamento.copy()
+                        if 'data_recebimento' in df_export.columns:
+                            df_export['data_recebimento'] = pd.to_datetime(df_export['data_recebimento'], errors='coerce')
                     
-                    try:
-                        with pd.ExcelWriter(nome_arquivo, engine='xlsxwriter') as writer:
-                            df_export.to_excel(writer, sheet_name='Detalhamento Flutuantes', index=False)
+                        try:
+                            with pd.ExcelWriter(nome_arquivo, engine='xlsxwriter') as writer:
+                                df_export.to_excel(writer, sheet_name='Detalhamento Flutuantes', index=False)
                         
-                        # Ler arquivo para download
-                        with open(nome_arquivo, 'rb') as f:
-                            st.download_button(
-                                label="💾 Download Excel - Detalhamento",
-                                data=f.read(),
-                                file_name=nome_arquivo,
-                                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                                key="download_detalhamento"
-                            )
+                            # Ler arquivo para download
+                            with open(nome_arquivo, 'rb') as f:
+                                st.download_button(
+                                    label="💾 Download Excel - Detalhamento",
+                                    data=f.read(),
+                                    file_name=nome_arquivo,
+                                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                                    key="download_detalhamento"
+                                )
                         
-                        # Limpar arquivo temporário
-                        import os
-                        os.remove(nome_arquivo)
+                            # Limpar arquivo temporário
+                            import os
+                            os.remove(nome_arquivo)
                         
-                    except Exception as e:
-                        st.error(f"❌ Erro ao gerar arquivo Excel: {e}")
-            else:
-                st.warning("⚠️ Nenhum registro encontrado com os filtros aplicados.")
+                        except Exception as e:
+                            st.error(f"❌ Erro ao gerar arquivo Excel: {e}")
+                else:
+                    st.warning("⚠️ Nenhum registro encontrado com os filtros aplicados.")
         
         else:
             st.warning("⚠️ Nenhum dado encontrado para os filtros selecionados.")
@@ -2554,7 +2450,7 @@ elif selected == "📦 Pacotes Flutuantes":
         st.markdown("### 🏢 Análise de Flutuantes por Estação")
         
         # Carregar dados para análise por estação
-        df_estacao = carregar_pacotes_flutuantes(1000)
+        df_estacao = carregar_pacotes_flutuantes(1000, colunas=COLUNAS_CONSULTA['flutuantes_por_estacao'])
         
         if not df_estacao.empty:
             # Calcular métricas por estação
@@ -2701,40 +2597,57 @@ elif selected == "🚚 Expedição":
             help="O arquivo deve conter as colunas: AT/TO, Corridor Cage, Total Scanned Orders, Validation Start Time, Validation End Time, Validation Operator, City, Delivering Time"
         )
         
+        consolidar_em_blocos = st.checkbox(
+            "📦 Arquivo grande: apenas consolidar e armazenar (leitura em blocos)",
+            value=False,
+            help="Lê somente as colunas usadas na consolidação, bloco a bloco, e grava ondas e operadores no banco. As análises desta aba não são exibidas.",
+            key="consolidar_expedicao_em_blocos"
+        )
+        
+        # Arquivo com o mesmo conteúdo de uma importação anterior: não é processado de novo
+        reimportar_expedicao = False
         if uploaded_file is not None:
+            # Hash e consulta ao registro de importações uma vez por upload, não a cada interação
+            id_upload = getattr(uploaded_file, 'file_id', None) or (uploaded_file.name, uploaded_file.size)
+            upload_expedicao = st.session_state.get('upload_expedicao')
+            if upload_expedicao is None or upload_expedicao['id'] != id_upload:
+                hash_arquivo = hash_conteudo_arquivo(uploaded_file)
+                upload_expedicao = {'id': id_upload, 'hash': hash_arquivo, 'importacao': buscar_importacao('expedicao', hash_arquivo)}
+                st.session_state['upload_expedicao'] = upload_expedicao
+            hash_arquivo = upload_expedicao['hash']
+            importacao_anterior = upload_expedicao['importacao']
+            if importacao_anterior:
+                st.info(f"♻️ Este arquivo já foi importado: {descrever_importacao(importacao_anterior)}")
+                reimportar_expedicao = st.checkbox(
+                    "🔁 Processar e gravar novamente",
+                    value=False,
+                    help="Os dados são atualizados pelas chaves naturais (data e onda), sem duplicar linhas",
+                    key="reimportar_expedicao"
+                )
+        
+        if uploaded_file is not None and consolidar_em_blocos:
+            if st.button("💾 Consolidar e Armazenar no Banco", type="primary", key="armazenar_consolidado_blocos"):
+                resultado = importar_expedicao_consolidado(uploaded_file, reimportar=reimportar_expedicao, hash_arquivo=hash_arquivo)
+                exibir_resultado_importacao_expedicao(resultado, upload_expedicao)
+        
+        elif uploaded_file is not None:
             try:
-                # Processar CSV
-                df_expedicao = pd.read_csv(uploaded_file)
-                
-                # Verificar colunas necessárias
-                colunas_necessarias = [
-                    'AT/TO', 'Corridor Cage', 'Total Scanned Orders', 
-                    'Validation Start Time', 'Validation End Time', 
-                    'Validation Operator', 'City', 'Delivering Time'
-                ]
-                
-                colunas_faltantes = [col for col in colunas_necessarias if col not in df_expedicao.columns]
+                # Verificar colunas necessárias (apenas o cabeçalho)
+                colunas_faltantes = verificar_colunas_csv(uploaded_file, COLUNAS_CSV_EXPEDICAO)
                 if colunas_faltantes:
                     st.error(f"❌ Colunas faltantes no CSV: {', '.join(colunas_faltantes)}")
                 else:
+                    # Ler e converter o CSV (reaproveitado nas interações seguintes enquanto o arquivo não mudar)
+                    df_expedicao = ler_upload_em_cache(uploaded_file, 'expedicao', ler_csv_expedicao, hash_arquivo)
                     st.success(f"✅ CSV processado com sucesso! {len(df_expedicao)} registros encontrados.")
                     
-                    # Converter colunas de data
-                    df_expedicao['Validation Start Time'] = pd.to_datetime(df_expedicao['Validation Start Time'])
-                    df_expedicao['Validation End Time'] = pd.to_datetime(df_expedicao['Validation End Time'])
-                    df_expedicao['Delivering Time'] = pd.to_datetime(df_expedicao['Delivering Time'])
-                    
-                    # Adicionar coluna de data
-                    df_expedicao['Data'] = df_expedicao['Validation Start Time'].dt.date
-                    
-                    # Calcular tempo de conferência em minutos
-                    df_expedicao['Tempo_Conferencia_Min'] = (df_expedicao['Validation End Time'] - df_expedicao['Validation Start Time']).dt.total_seconds() / 60
-                    
-                    # Calcular tempo no piso (entre conferência e retirada)
-                    df_expedicao['Tempo_No_Piso_Min'] = (df_expedicao['Delivering Time'] - df_expedicao['Validation End Time']).dt.total_seconds() / 60
-                    
-                    # Extrair letra da onda (primeira letra do Corridor Cage)
-                    df_expedicao['Onda'] = df_expedicao['Corridor Cage'].str.extract(r'^([A-Z])')[0]
+                    # Salvar dados e agregados na sessão para uso nas outras abas
+                    # (os agregados são calculados uma vez por arquivo; as abas apenas os exibem)
+                    st.session_state['df_expedicao'] = df_expedicao
+                    if st.session_state.get('hash_analise_expedicao') != hash_arquivo:
+                        st.session_state['analise_expedicao'] = AnaliseExpedicao(df_expedicao)
+                        st.session_state['hash_analise_expedicao'] = hash_arquivo
+                    analise = st.session_state['analise_expedicao']
                     
                     # Mostrar preview dos dados
                     st.markdown("### 📋 Preview dos Dados")
@@ -2744,22 +2657,17 @@ elif selected == "🚚 Expedição":
                     col1, col2, col3, col4 = st.columns(4)
                     
                     with col1:
-                        st.metric("Total de Registros", len(df_expedicao))
+                        st.metric("Total de Registros", analise.total_registros)
                     
                     with col2:
-                        operadores_unicos = df_expedicao['Validation Operator'].nunique()
-                        st.metric("Operadores Únicos", operadores_unicos)
+                        st.metric("Operadores Únicos", analise.operadores_unicos)
                     
                     with col3:
-                        ondas_unicas = df_expedicao['Onda'].nunique()
-                        st.metric("Ondas", ondas_unicas)
+                        st.metric("Ondas", analise.ondas_unicas)
                     
                     with col4:
-                        tempo_medio_conferencia = df_expedicao['Tempo_Conferencia_Min'].mean()
-                        st.metric("Tempo Médio Conferência", formatar_tempo(tempo_medio_conferencia))
+                        st.metric("Tempo Médio Conferência", formatar_tempo(analise.tempo_medio_conferencia))
                     
-                    # Salvar dados na sessão para uso nas outras abas
-                    st.session_state['df_expedicao'] = df_expedicao
                     st.success("✅ Dados carregados e processados com sucesso!")
                     
                     # Botão para armazenar dados históricos
@@ -2768,21 +2676,10 @@ elif selected == "🚚 Expedição":
                     
                     if st.button("💾 Armazenar Dados no Banco", type="primary", key="armazenar_consolidado"):
                         try:
-                            # Processar dados para formato consolidado
-                            dados_ondas, dados_operadores = processar_csv_expedicao_consolidado(df_expedicao, uploaded_file.name)
-                            
-                            if dados_ondas and dados_operadores:
-                                # Salvar no banco
-                                success = salvar_expedicao_consolidado(dados_ondas, dados_operadores, uploaded_file.name)
-                                
-                                if success:
-                                    st.success("🎉 Dados históricos armazenados com sucesso!")
-                                    st.info("💡 Agora você pode usar a aba 'Expedição Consolidado' para análises avançadas")
-                                    st.balloons()
-                                else:
-                                    st.error("❌ Falha ao armazenar dados históricos")
-                            else:
-                                st.error("❌ Erro ao processar dados para formato consolidado")
+                            # Consolidar, gravar (upsert pelas chaves naturais) e registrar a importação
+                            resultado = importar_expedicao_consolidado(uploaded_file, df_expedicao, reimportar=reimportar_expedicao,
+                                                                       hash_arquivo=hash_arquivo)
+                            exibir_resultado_importacao_expedicao(resultado, upload_expedicao)
                                 
                         except Exception as e:
                             st.error(f"❌ Erro ao armazenar dados: {e}")
@@ -2794,56 +2691,32 @@ elif selected == "🚚 Expedição":
     with tab2:
         st.markdown("### ⏱️ Tempo de Conferência por Operador")
         
-        if 'df_expedicao' in st.session_state:
-            df_expedicao = st.session_state['df_expedicao']
+        if 'analise_expedicao' in st.session_state:
+            analise = st.session_state['analise_expedicao']
             
             # Métricas gerais de tempo de conferência
             col1, col2, col3, col4 = st.columns(4)
             
             with col1:
-                tempo_medio_geral = df_expedicao['Tempo_Conferencia_Min'].mean()
-                st.metric("Tempo Médio Geral", formatar_tempo(tempo_medio_geral))
+                st.metric("Tempo Médio Geral", formatar_tempo(analise.tempo_medio_conferencia))
             
             with col2:
-                tempo_medio_operador = df_expedicao.groupby('Validation Operator')['Tempo_Conferencia_Min'].mean().mean()
-                st.metric("Tempo Médio por Operador", formatar_tempo(tempo_medio_operador))
+                st.metric("Tempo Médio por Operador", formatar_tempo(analise.tempo_medio_por_operador))
             
             with col3:
-                operador_mais_rapido = df_expedicao.groupby('Validation Operator')['Tempo_Conferencia_Min'].mean().idxmin()
-                tempo_mais_rapido = df_expedicao.groupby('Validation Operator')['Tempo_Conferencia_Min'].mean().min()
+                operador_mais_rapido, tempo_mais_rapido = analise.operador_mais_rapido
                 st.metric("Operador Mais Rápido", f"{operador_mais_rapido}")
                 st.caption(f"Tempo: {formatar_tempo(tempo_mais_rapido)}")
             
             with col4:
-                operador_mais_lento = df_expedicao.groupby('Validation Operator')['Tempo_Conferencia_Min'].mean().idxmax()
-                tempo_mais_lento = df_expedicao.groupby('Validation Operator')['Tempo_Conferencia_Min'].mean().max()
+                operador_mais_lento, tempo_mais_lento = analise.operador_mais_lento
                 st.metric("Operador Mais Lento", f"{operador_mais_lento}")
                 st.caption(f"Tempo: {formatar_tempo(tempo_mais_lento)}")
             
             # Ranking de operadores por quantidade de rotas expedidas
             st.markdown("### 🏆 Ranking de Operadores por Produtividade (Rotas Expedidas)")
             
-            ranking_produtividade = df_expedicao.groupby('Validation Operator').agg({
-                'AT/TO': 'count',
-                'Total Scanned Orders': 'sum',
-                'Tempo_Conferencia_Min': 'mean'
-            }).reset_index()
-            
-            ranking_produtividade.columns = ['Operador', 'Total_AT_TO', 'Total_Pedidos', 'Tempo_Medio_Min']
-            ranking_produtividade = ranking_produtividade.sort_values('Total_AT_TO', ascending=False)
-            
-            # Adicionar classificação de performance baseada na quantidade de AT/TO
-            def classificar_performance_produtividade(at_to_count):
-                if at_to_count >= 10:
-                    return '🟢 Excelente'
-                elif at_to_count >= 7:
-                    return '🟡 Bom'
-                elif at_to_count >= 4:
-                    return '🟠 Atenção'
-                else:
-                    return '🔴 Crítico'
-            
-            ranking_produtividade['Performance'] = ranking_produtividade['Total_AT_TO'].apply(classificar_performance_produtividade)
+            ranking_produtividade = analise.ranking_produtividade
             
             # Exibir ranking
             for i, (_, row) in enumerate(ranking_produtividade.iterrows(), 1):
@@ -2899,22 +2772,11 @@ elif selected == "🚚 Expedição":
     with tab3:
         st.markdown("### 🌊 Controle de Ondas - Tempo de Finalização")
         
-        if 'df_expedicao' in st.session_state:
-            df_expedicao = st.session_state['df_expedicao']
-            
-            # Agrupar por onda e data
-            df_ondas = df_expedicao.groupby(['Onda', 'Data']).agg({
-                'Validation Start Time': 'min',
-                'Validation End Time': 'max',
-                'Total Scanned Orders': 'sum',
-                'AT/TO': 'count'
-            }).reset_index()
+        if 'analise_expedicao' in st.session_state:
+            analise = st.session_state['analise_expedicao']
             
-            # Calcular tempo de finalização da onda
-            df_ondas['Tempo_Finalizacao_Onda_Min'] = (df_ondas['Validation End Time'] - df_ondas['Validation Start Time']).dt.total_seconds() / 60
-            
-            # Ordenar por data e onda
-            df_ondas = df_ondas.sort_values(['Data', 'Onda'])
+            # Ondas por data, ordenadas por data e onda, com o tempo de finalização
+            df_ondas = analise.ondas
             
             # Métricas gerais das ondas
             col1, col2, col3, col4 = st.columns(4)
@@ -2984,18 +2846,8 @@ elif selected == "🚚 Expedição":
             # Análise de sequência de ondas
             st.markdown("### 🔍 Análise de Sequência de Ondas")
             
-            # Agrupar por data para ver sequência
-            df_sequencia = df_ondas.groupby('Data').agg({
-                'Onda': lambda x: sorted(x.tolist()),
-                'Tempo_Finalizacao_Onda_Min': 'sum',
-                'Total Scanned Orders': 'sum'
-            }).reset_index()
-            
-            df_sequencia['Sequencia_Ondas'] = df_sequencia['Onda'].apply(lambda x: ' → '.join(x))
-            df_sequencia['Tempo_Total_Dia'] = df_sequencia['Tempo_Finalizacao_Onda_Min'].round(1)
-            
             # Exibir sequência de ondas por dia
-            for _, row in df_sequencia.iterrows():
+            for _, row in analise.sequencia_por_dia.iterrows():
                 st.markdown(f"""
                 **📅 {row['Data']}**
                 - **Sequência:** {row['Sequencia_Ondas']}
@@ -3010,11 +2862,11 @@ elif selected == "🚚 Expedição":
     with tab4:
         st.markdown("### 📦 Rotas no Piso - Tempo de Retirada")
         
-        if 'df_expedicao' in st.session_state:
-            df_expedicao = st.session_state['df_expedicao']
+        if 'analise_expedicao' in st.session_state:
+            analise = st.session_state['analise_expedicao']
             
-            # Filtrar apenas registros com tempo no piso válido (positivo)
-            df_piso = df_expedicao[df_expedicao['Tempo_No_Piso_Min'] > 0].copy()
+            # Apenas registros com tempo no piso válido (positivo)
+            df_piso = analise.piso
             
             if not df_piso.empty:
                 # Métricas de tempo no piso
@@ -3039,21 +2891,8 @@ elif selected == "🚚 Expedição":
                 # Análise de gargalos
                 st.markdown("### 🚨 Análise de Gargalos")
                 
-                # Classificar tempo no piso
-                def classificar_tempo_piso(tempo):
-                    if tempo <= 30:
-                        return '🟢 Normal'
-                    elif tempo <= 60:
-                        return '🟡 Atenção'
-                    elif tempo <= 120:
-                        return '🟠 Crítico'
-                    else:
-                        return '🔴 Muito Crítico'
-                
-                df_piso['Classificacao_Tempo'] = df_piso['Tempo_No_Piso_Min'].apply(classificar_tempo_piso)
-                
-                # Contar por classificação
-                classificacao_counts = df_piso['Classificacao_Tempo'].value_counts()
+                # Quantidade de rotas por classificação do tempo no piso
+                classificacao_counts = analise.classificacao_piso
                 
                 col1, col2 = st.columns(2)
                 
@@ -3073,10 +2912,10 @@ elif selected == "🚚 Expedição":
                 with col2:
                     st.markdown("#### 📈 Métricas de Gargalo")
                     
-                    # Calcular percentis
-                    percentil_75 = df_piso['Tempo_No_Piso_Min'].quantile(0.75)
-                    percentil_90 = df_piso['Tempo_No_Piso_Min'].quantile(0.90)
-                    percentil_95 = df_piso['Tempo_No_Piso_Min'].quantile(0.95)
+                    # Percentis do tempo no piso
+                    percentil_75 = analise.percentis_piso[75]
+                    percentil_90 = analise.percentis_piso[90]
+                    percentil_95 = analise.percentis_piso[95]
                     
                     st.metric("75% das rotas", f"≤ {formatar_tempo(percentil_75)}")
                     st.metric("90% das rotas", f"≤ {formatar_tempo(percentil_90)}")
@@ -3085,7 +2924,7 @@ elif selected == "🚚 Expedição":
                 # Top 20 rotas com maior tempo no piso
                 st.markdown("### 🚨 Top 20 Rotas com Maior Tempo no Piso")
                 
-                df_top_piso = df_piso.nlargest(20, 'Tempo_No_Piso_Min')[['AT/TO', 'Corridor Cage', 'Validation Operator', 'City', 'Tempo_No_Piso_Min', 'Total Scanned Orders']].copy()
+                df_top_piso = analise.top_rotas_piso.copy()
                 
                 # Formatar dados
                 df_top_piso['Tempo_No_Piso_Min'] = df_top_piso['Tempo_No_Piso_Min'].apply(formatar_tempo)
@@ -3106,15 +2945,12 @@ elif selected == "🚚 Expedição":
                 st.markdown("### 📋 Todas as Rotas com 20+ Minutos no Piso")
                 st.markdown("**Lista completa de rotas que ficaram 20 minutos ou mais paradas no piso**")
                 
-                # Filtrar rotas com 20+ minutos no piso
-                df_20_mais = df_piso[df_piso['Tempo_No_Piso_Min'] >= 20].copy()
+                # Rotas com 20+ minutos no piso, do maior para o menor tempo
+                df_20_mais = analise.rotas_20_mais
                 
                 if not df_20_mais.empty:
-                    # Ordenar por tempo no piso (maior para menor)
-                    df_20_mais = df_20_mais.sort_values('Tempo_No_Piso_Min', ascending=False)
-                    
                     # Formatar dados para exibição
-                    df_display_20_mais = df_20_mais[['AT/TO', 'Corridor Cage', 'Validation Operator', 'City', 'Tempo_No_Piso_Min', 'Total Scanned Orders']].copy()
+                    df_display_20_mais = df_20_mais[COLUNAS_ROTAS_PISO].copy()
                     df_display_20_mais['Tempo_No_Piso_Min'] = df_display_20_mais['Tempo_No_Piso_Min'].apply(formatar_tempo)
                     
                     # Renomear colunas
@@ -3176,7 +3012,7 @@ elif selected == "🚚 Expedição":
                 # Gráfico de tempo no piso por operador
                 st.markdown("### 📊 Tempo no Piso por Operador")
                 
-                tempo_por_operador = df_piso.groupby('Validation Operator')['Tempo_No_Piso_Min'].mean().sort_values(ascending=False).head(15)
+                tempo_por_operador = analise.tempo_piso_por_operador
                 
                 fig_piso = px.bar(
                     x=tempo_por_operador.values,
@@ -3275,7 +3111,8 @@ elif selected == "🚚 Expedição":
                 # Carregar dados filtrados
                 dados_consolidados = carregar_expedicao_consolidado(
                     data_inicio.strftime('%Y-%m-%d'),
-                    data_fim.strftime('%Y-%m-%d')
+                    data_fim.strftime('%Y-%m-%d'),
+                    colunas=COLUNAS_CONSULTA['analise_expedicao']
                 )
                 
                 if not dados_consolidados.empty:
@@ -3551,24 +3388,24 @@ elif selected == "📋 Histórico":
     dados = load_data()
     
     if dados:
-        df_historico = pd.DataFrame(dados)
-        df_historico['data'] = pd.to_datetime(df_historico['data'])
-        df_historico = df_historico.sort_values('data', ascending=False)
+        modelo = obter_modelo(dados)
+        df_historico = modelo.dias[['data'] + CAMPOS_DADOS_OPERACAO].iloc[::-1]
+        totais = modelo.somas()
         
         # Métricas do histórico
         col1, col2, col3, col4 = st.columns(4)
         
         with col1:
-            st.metric("Total de Dias", len(df_historico))
+            st.metric("Total de Dias", totais['dias'])
         
         with col2:
-            st.metric("Período", f"{df_historico['data'].min().strftime('%d/%m/%Y')} - {df_historico['data'].max().strftime('%d/%m/%Y')}")
+            st.metric("Período", f"{modelo.primeira_data.strftime('%d/%m/%Y')} - {modelo.ultima_data.strftime('%d/%m/%Y')}")
         
         with col3:
-            st.metric("Média Diária", f"{df_historico['volume_diario'].mean():.0f}")
+            st.metric("Média Diária", f"{totais['volume_diario'] / totais['dias']:.0f}")
         
         with col4:
-            st.metric("Total Processado", f"{df_historico['volume_diario'].sum():,}")
+            st.metric("Total Processado", f"{totais['volume_diario']:,}")
         
         # Tabela completa
         st.markdown("### 📊 Dados Completos")
@@ -3595,6 +3432,7 @@ elif selected == "🗄️ Banco de Dados":
     
     # Status da conexão
     from database import db_manager
+    from replica_local import TABELAS_REPLICA
     
     col1, col2 = st.columns(2)
     
@@ -3642,6 +3480,25 @@ elif selected == "🗄️ Banco de Dados":
             else:
                 show_temp_message("📝 Nenhum dado encontrado no banco", "info")
     
+    # Réplica local das tabelas analíticas
+    if db_manager.replica is not None:
+        st.markdown("### 🗃️ Réplica Local (DuckDB)")
+        st.caption(f"Arquivo: {db_manager.replica.arquivo}")
+        
+        marcas = {tabela: db_manager.replica.marca_dagua(tabela) for tabela in TABELAS_REPLICA}
+        st.dataframe(pd.DataFrame([{
+            'Tabela': tabela,
+            'Linhas': marca['linhas'] if marca else 0,
+            'Última sincronização': marca['sincronizado_em'].strftime('%d/%m/%Y %H:%M:%S') if marca else 'Nunca'
+        } for tabela, marca in marcas.items()]), use_container_width=True, hide_index=True)
+        
+        if st.button("🔄 Sincronizar Réplica Local"):
+            recebidas = sincronizar_replica_local()
+            if recebidas:
+                show_temp_message(f"✅ Réplica sincronizada: {sum(recebidas.values())} linhas novas", "success")
+            else:
+                show_temp_message("❌ Não foi possível sincronizar a réplica (Supabase desconectado?)", "error")
+    
     # Seção de configuração
     st.markdown("### ⚙️ Configuração do Banco")
     
@@ -3683,23 +3540,23 @@ elif selected == "🗄️ Banco de Dados":
                     show_temp_message(f"✅ Backup criado: {backup_file}", "success")
                     
                     # Download do backup
-                    with open(backup_file, 'r', encoding='utf-8') as f:
+                    with open(backup_file, 'rb') as f:
                         backup_content = f.read()
                     
                     st.download_button(
                         label="📥 Download Backup",
                         data=backup_content,
-                        file_name=backup_file,
-                        mime="application/json"
+                        file_name=os.path.basename(backup_file),
+                        mime="application/gzip"
                     )
             else:
                 show_temp_message("⚠️ Nenhum dado para backup", "warning")
     
     with col2:
-        uploaded_backup = st.file_uploader("Restaurar Backup", type=['json'])
+        uploaded_backup = st.file_uploader("Restaurar Backup", type=['gz', 'json'])
         if uploaded_backup:
             try:
-                dados_restaurados = json.load(uploaded_backup)
+                dados_restaurados = ler_backup(uploaded_backup.getvalue())
                 show_temp_message(f"✅ Backup carregado com {len(dados_restaurados)} registros", "success")
                 
                 if st.button("🔄 Restaurar Dados"):
@@ -3716,19 +3573,21 @@ elif selected == "🗄️ Banco de Dados":
     
     with col1:
         if st.button("🗑️ Limpar Dados Locais", type="secondary"):
-            if os.path.exists('dados_operacao.json'):
-                os.remove('dados_operacao.json')
+            if limpar_dados_locais():
+                load_data.clear()
                 show_temp_message("✅ Dados locais removidos", "success")
                 st.rerun()
-            else:
-                show_temp_message("📝 Nenhum arquivo local para remover", "info")
     
     with col2:
         if st.button("🔄 Resetar Cache"):
             st.cache_data.clear()
+            limpar_cache_banco()
             show_temp_message("✅ Cache limpo", "success")
             st.rerun()
 
+# Mensagens de status geradas durante esta execução (carregamento de dados etc.)
+exibir_notificacoes()
+
 # Footer
 st.markdown("---")
 st.markdown(f"""
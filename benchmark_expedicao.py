@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark do processamento de expedição consolidado com CSVs sintéticos
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils import consolidar_expedicao
+
+def gerar_csv_expedicao(linhas: int, dias: int = 30, operadores: int = 60, semente: int = 42) -> pd.DataFrame:
+    """Gera um DataFrame no formato do CSV de expedição"""
+    rng = np.random.default_rng(semente)
+
+    inicio = (pd.Timestamp('2025-01-01 06:00')
+              + pd.to_timedelta(rng.integers(0, dias, linhas), unit='D')
+              + pd.to_timedelta(rng.integers(0, 16 * 60, linhas), unit='m'))
+    fim = inicio + pd.to_timedelta(rng.integers(5, 120, linhas), unit='m')
+    retirada = fim + pd.to_timedelta(rng.integers(1, 90, linhas), unit='m')
+
+    letras = rng.choice(list('ABCDEFGH'), linhas)
+    corredores = rng.integers(1, 40, linhas)
+    codigos = rng.integers(10000, 10000 + operadores, linhas)
+
+    return pd.DataFrame({
+        'Validation Start Time': inicio.strftime('%Y-%m-%d %H:%M:%S'),
+        'Validation End Time': fim.strftime('%Y-%m-%d %H:%M:%S'),
+        'Delivering Time': retirada.strftime('%Y-%m-%d %H:%M:%S'),
+        'Corridor Cage': [f'{letra}-{numero:02d}' for letra, numero in zip(letras, corredores)],
+        'Validation Operator': [f'[ops{codigo}]Operador {codigo}' for codigo in codigos],
+        'Total Scanned Orders': rng.integers(1, 80, linhas)
+    })
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de consolidar_expedicao')
+    parser.add_argument('--linhas', type=int, nargs='+', default=[12500, 25000, 50000, 100000],
+                        help='Tamanhos de CSV sintético a medir')
+    parser.add_argument('--repeticoes', type=int, default=3, help='Execuções por tamanho (usa a menor)')
+    args = parser.parse_args()
+
+    print("⏱️ Benchmark - expedição consolidado")
+    print(f"{'Linhas':>10} {'Ondas':>8} {'Operadores':>11} {'Tempo (s)':>10} {'µs/linha':>9}")
+
+    for linhas in args.linhas:
+        df = gerar_csv_expedicao(linhas)
+        tempos = []
+        for _ in range(args.repeticoes):
+            inicio = time.perf_counter()
+            dados_ondas, dados_operadores = consolidar_expedicao(df, 'benchmark.csv')
+            tempos.append(time.perf_counter() - inicio)
+
+        melhor = min(tempos)
+        print(f"{linhas:>10} {len(dados_ondas):>8} {len(dados_operadores):>11} {melhor:>10.3f} {melhor / linhas * 1e6:>9.2f}")
+
+    print("\n💡 Com escala linear o custo por linha (µs/linha) fica aproximadamente constante.")
+
+if __name__ == "__main__":
+    main()
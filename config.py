@@ -32,11 +32,22 @@ INTERFACE = {
 
 # Configurações de dados
 DADOS = {
-    'arquivo_saida': 'dados_operacao.json',
+    'arquivo_local': 'dados_locais/dados_operacao.sqlite',  # Dias de operação e estado da sincronização
+    'arquivo_saida': 'dados_operacao.json',  # Formato anterior: importado uma vez para o arquivo local
     'encoding': 'utf-8',
-    'backup_automatico': True
+    'backup_automatico': True,
+    'diretorio_backups': 'backups',
+    'backups_mantidos': 30,    # Backups mais antigos são apagados (backups repetidos não são gravados)
+    'tamanho_bloco_csv': 50000, # Linhas por bloco na importação de CSVs grandes
+    'arquivos_paralelos': 4,    # Arquivos processados ao mesmo tempo no upload múltiplo
+    'leituras_em_cache': 8,     # CSVs enviados já lidos, reaproveitados entre as interações da página (LRU)
+    'leituras_em_cache_mb': 512 # Memória máxima dessas leituras
 }
 
+# Campos numéricos de cada dia em dados_operacao (banco e arquivo local)
+CAMPOS_DADOS_OPERACAO = ['backlog', 'volume_veiculo', 'volume_diario', 'flutuantes',
+                         'flutuantes_revertidos', 'erros_sorting', 'erros_etiquetagem']
+
 # Configurações do Supabase
 SUPABASE = {
     'url': None,               # Será carregado do .env
@@ -48,7 +59,69 @@ SUPABASE = {
         'configuracoes': 'configuracoes'
     },
     'backup_local': True,      # Manter backup local mesmo com Supabase
-    'sincronizacao_automatica': True
+    'sincronizacao_automatica': True,
+    'lote_upsert': 500,        # Registros por requisição no upsert em lote de pacotes flutuantes
+    'lote_insercao': 500,      # Registros por requisição em dados_operacao e expedição consolidado
+    'lote_consulta': 100,      # Chaves por filtro in_ nas consultas de existência (o filtro vai na URL)
+    'tamanho_pagina': 1000,    # Linhas por página nas leituras (não pode exceder o max_rows do PostgREST)
+    'cache_entradas': 128,     # Leituras guardadas no cache do DatabaseManager (LRU)
+    'cache_ttl': {             # Validade (segundos) das leituras em cache, por tabela
+        'padrao': 300,
+        'dados_operacao': 600,
+        'dados_validacao': 600,
+        'flutuantes_operador': 600,
+        'pacotes_flutuantes': 300,
+        'expedicao_consolidado': 300,
+        'expedicao_operadores_historico': 300
+    }
+}
+
+# Sincronização incremental entre o Supabase e os dados locais (arquivo JSON e réplica DuckDB)
+SINCRONIZACAO = {
+    'margem_segundos': 60,     # Releitura antes da marca d'água (transações que terminaram fora de ordem)
+    'coluna_marca': {          # Coluna que avança a cada inserção/alteração da linha
+        'dados_operacao': 'updated_at',
+        'dados_validacao': 'importado_em',   # Apenas inserções
+        'pacotes_flutuantes': 'updated_at',
+        'expedicao_consolidado': 'updated_at',
+        'expedicao_operadores_historico': 'updated_at'
+    },
+    'chaves_naturais': {       # Chaves usadas na mesclagem (além do id)
+        'dados_operacao': ('data',),
+        'dados_validacao': (),
+        'pacotes_flutuantes': ('tracking_number',),
+        'expedicao_consolidado': ('data_operacao', 'letra_onda'),
+        'expedicao_operadores_historico': ('data_operacao', 'operador', 'numero_onda')
+    }
+}
+
+# Réplica local (DuckDB) das tabelas analíticas: leituras rápidas e uso offline
+ARMAZENAMENTO_LOCAL = {
+    'ativo': False,                          # Requer o pacote duckdb
+    'arquivo': 'dados_locais/replica.duckdb',
+    'intervalo_sincronizacao': 300           # Segundos entre sincronizações incrementais automáticas
+}
+
+# Colunas baixadas por cada tela (as consultas trazem só o que a tela usa)
+COLUNAS_CONSULTA = {
+    'detalhamento_flutuantes': ['data_recebimento', 'operador_real', 'tracking_number', 'destino', 'aging',
+                                'foi_encontrado', 'foi_expedido', 'estacao', 'descricao_item', 'status_spx',
+                                'importado_em'],
+    'flutuantes_por_estacao': ['estacao', 'foi_encontrado', 'aging'],
+    'analise_expedicao': ['data_operacao', 'numero_onda', 'tempo_total_minutos', 'total_pacotes']
+}
+
+# Grafias aceitas nas colunas booleanas dos CSVs de flutuantes
+# (comparadas em minúsculas e sem acentos; novas grafias podem ser incluídas aqui)
+VALORES_BOOLEANOS = {
+    'verdadeiro': ['sim', 's', 'yes', 'y', '1', 'true', 'verdadeiro'],
+    'falso': ['nao', 'n', 'no', '0', 'false', 'falso'],
+    'por_coluna': {            # Grafias válidas apenas em uma coluna específica
+        'Foi Expedido': {
+            'pacote revertido': True,
+            'pacote flutuante': False
+        }
+    }
 }
 
 # Mensagens do sistema
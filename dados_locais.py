@@ -0,0 +1,196 @@
+"""
+Armazenamento local dos dados de operação (SQLite)
+
+Substitui o dados_operacao.json: cada dia é uma linha com a data como chave
+primária, então salvar grava apenas os dias novos, alterados ou removidos, sem
+reescrever o arquivo inteiro. O mesmo arquivo guarda o estado da sincronização
+incremental com o Supabase (marca d'água e versão sincronizada de cada dia).
+
+Os backups são arquivos JSON compactados (gzip) nomeados pelo hash do conteúdo:
+um conteúdo que já tem backup não é gravado de novo e apenas os
+DADOS['backups_mantidos'] mais recentes são mantidos.
+"""
+
+import glob
+import gzip
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+from config import DADOS, CAMPOS_DADOS_OPERACAO
+
+class DadosLocais:
+    """Dias de dados_operacao e estado da sincronização num arquivo SQLite"""
+
+    def __init__(self, arquivo: str = None):
+        self.arquivo = arquivo or DADOS['arquivo_local']
+        diretorio = os.path.dirname(self.arquivo)
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+
+        # Uma gravação por vez entre as threads do app (o SQLite bloqueia o arquivo inteiro)
+        self._lock = threading.RLock()
+        self._preparar()
+
+    @contextmanager
+    def _conectar(self):
+        """Conexão curta por operação, com commit no fim (ou rollback em caso de erro)"""
+        with self._lock:
+            conexao = sqlite3.connect(self.arquivo, timeout=30)
+            try:
+                with conexao:
+                    yield conexao
+            finally:
+                conexao.close()
+
+    def _preparar(self):
+        colunas = ', '.join(f'{campo} INTEGER NOT NULL DEFAULT 0' for campo in CAMPOS_DADOS_OPERACAO)
+        with self._conectar() as conexao:
+            conexao.execute("PRAGMA journal_mode=WAL")
+            conexao.execute(f"CREATE TABLE IF NOT EXISTS dados_operacao (data TEXT PRIMARY KEY, {colunas}) WITHOUT ROWID")
+            conexao.execute("CREATE TABLE IF NOT EXISTS versoes_sincronizadas (data TEXT PRIMARY KEY, versao TEXT NOT NULL) WITHOUT ROWID")
+            conexao.execute("CREATE TABLE IF NOT EXISTS metadados (chave TEXT PRIMARY KEY, valor TEXT)")
+
+        self._importar_json_legado()
+
+    def _importar_json_legado(self):
+        """Importa uma única vez o dados_operacao.json de versões anteriores"""
+        if self._metadado('json_importado') or not os.path.exists(DADOS['arquivo_saida']):
+            return
+        try:
+            with open(DADOS['arquivo_saida'], 'r', encoding=DADOS['encoding']) as f:
+                dados = json.load(f)
+        except (OSError, ValueError):
+            dados = []
+        # Registros sem data (arquivo editado à mão) não têm chave e ficam de fora
+        self.salvar([dado for dado in dados if isinstance(dado, dict) and dado.get('data')])
+        self._salvar_metadado('json_importado', datetime.now().isoformat())
+
+    def _metadado(self, chave: str):
+        with self._conectar() as conexao:
+            linha = conexao.execute("SELECT valor FROM metadados WHERE chave = ?", [chave]).fetchone()
+        return linha[0] if linha else None
+
+    def _salvar_metadado(self, chave: str, valor):
+        with self._conectar() as conexao:
+            conexao.execute("INSERT OR REPLACE INTO metadados (chave, valor) VALUES (?, ?)", [chave, valor])
+
+    @staticmethod
+    def _registro(dado: dict) -> tuple:
+        """Linha da tabela: (data, campos...) com valores numpy convertidos para tipos nativos"""
+        valores = [dado.get(campo) if dado.get(campo) is not None else 0 for campo in CAMPOS_DADOS_OPERACAO]
+        return (str(dado['data']),) + tuple(v.item() if hasattr(v, 'item') else v for v in valores)
+
+    def carregar(self) -> list:
+        """Todos os dias, ordenados por data"""
+        with self._conectar() as conexao:
+            linhas = conexao.execute(
+                f"SELECT data, {', '.join(CAMPOS_DADOS_OPERACAO)} FROM dados_operacao ORDER BY data"
+            ).fetchall()
+        return [dict(zip(['data'] + CAMPOS_DADOS_OPERACAO, linha)) for linha in linhas]
+
+    def salvar(self, dados: list) -> dict:
+        """
+        Passa a guardar exatamente os dias informados, gravando apenas a diferença:
+        upsert dos dias novos ou alterados e remoção dos dias ausentes.
+        Retorna {'gravados': n, 'removidos': n}.
+        """
+        novos = {registro[0]: registro for registro in map(self._registro, dados)}
+        atuais = {registro[0]: registro for registro in map(self._registro, self.carregar())}
+
+        gravar = [registro for data, registro in novos.items() if atuais.get(data) != registro]
+        remover = [(data,) for data in atuais if data not in novos]
+        self._gravar(gravar, remover)
+        return {'gravados': len(gravar), 'removidos': len(remover)}
+
+    def salvar_dias(self, dados: list, remover: list = ()):
+        """Insere ou atualiza os dias informados e remove as datas em remover, sem ler os demais dias"""
+        self._gravar([self._registro(dado) for dado in dados], [(str(data),) for data in remover])
+
+    def salvar_dia(self, dado: dict):
+        """Insere ou atualiza um único dia"""
+        self.salvar_dias([dado])
+
+    def remover_dia(self, data: str):
+        self.salvar_dias([], [data])
+
+    def _gravar(self, gravar: list, remover: list):
+        if not gravar and not remover:
+            return
+        marcadores = ', '.join('?' * (len(CAMPOS_DADOS_OPERACAO) + 1))
+        atualizacao = ', '.join(f'{campo} = excluded.{campo}' for campo in CAMPOS_DADOS_OPERACAO)
+        with self._conectar() as conexao:
+            conexao.executemany(
+                f"INSERT INTO dados_operacao (data, {', '.join(CAMPOS_DADOS_OPERACAO)}) VALUES ({marcadores}) "
+                f"ON CONFLICT(data) DO UPDATE SET {atualizacao}",
+                gravar
+            )
+            conexao.executemany("DELETE FROM dados_operacao WHERE data = ?", remover)
+
+    def limpar(self):
+        """Remove todos os dias e o estado da sincronização (o próximo carregamento baixa tudo do banco)"""
+        with self._conectar() as conexao:
+            conexao.execute("DELETE FROM dados_operacao")
+            conexao.execute("DELETE FROM versoes_sincronizadas")
+            conexao.execute("DELETE FROM metadados WHERE chave = 'marca_dagua'")
+
+    # ------------------------------------------------------------------
+    # Estado da sincronização incremental com o Supabase
+    # ------------------------------------------------------------------
+
+    def estado_sincronizacao(self) -> dict:
+        """Marca d'água (maior updated_at recebido) e versoes ({data: versão do dia no banco})"""
+        with self._conectar() as conexao:
+            versoes = dict(conexao.execute("SELECT data, versao FROM versoes_sincronizadas").fetchall())
+        return {'marca': self._metadado('marca_dagua'), 'versoes': versoes}
+
+    def salvar_estado_sincronizacao(self, marca: str, versoes: dict):
+        """Grava a marca d'água e apenas as versões que mudaram desde o último estado"""
+        atuais = self.estado_sincronizacao()['versoes']
+        gravar = [(data, versao) for data, versao in versoes.items() if atuais.get(data) != versao]
+        remover = [(data,) for data in atuais if data not in versoes]
+        with self._conectar() as conexao:
+            conexao.executemany("INSERT OR REPLACE INTO versoes_sincronizadas (data, versao) VALUES (?, ?)", gravar)
+            conexao.executemany("DELETE FROM versoes_sincronizadas WHERE data = ?", remover)
+            conexao.execute("INSERT OR REPLACE INTO metadados (chave, valor) VALUES ('marca_dagua', ?)", [marca])
+
+# ----------------------------------------------------------------------
+# Backups compactados, deduplicados e rotativos
+# ----------------------------------------------------------------------
+
+def criar_backup(dados: list) -> tuple:
+    """
+    Grava um backup gzip dos dados em DADOS['diretorio_backups'].
+    Se já existir um backup com o mesmo conteúdo ele é reaproveitado. Depois da gravação
+    apenas os DADOS['backups_mantidos'] mais recentes são mantidos.
+    Retorna (caminho do backup, True se um arquivo novo foi gravado).
+    """
+    conteudo = json.dumps(dados, ensure_ascii=False, sort_keys=True, default=str).encode('utf-8')
+    assinatura = hashlib.sha256(conteudo).hexdigest()[:16]
+    diretorio = DADOS['diretorio_backups']
+    os.makedirs(diretorio, exist_ok=True)
+
+    existentes = glob.glob(os.path.join(diretorio, f'backup_dados_*_{assinatura}.json.gz'))
+    if existentes:
+        return existentes[0], False
+
+    caminho = os.path.join(diretorio, f"backup_dados_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}_{assinatura}.json.gz")
+    with gzip.open(caminho, 'wb') as f:
+        f.write(conteudo)
+
+    # Nome começa pela data/hora: a ordem alfabética é a cronológica
+    backups = sorted(glob.glob(os.path.join(diretorio, 'backup_dados_*.json.gz')))
+    for antigo in backups[:-DADOS['backups_mantidos']]:
+        os.remove(antigo)
+
+    return caminho, True
+
+def ler_backup(conteudo: bytes) -> list:
+    """Dados de um backup (JSON compactado com gzip ou JSON simples, de versões anteriores)"""
+    if conteudo[:2] == b'\x1f\x8b':
+        conteudo = gzip.decompress(conteudo)
+    return json.loads(conteudo.decode('utf-8'))
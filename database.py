@@ -5,19 +5,109 @@ from datetime import datetime
 from typing import List, Dict, Optional, Any
 from supabase import create_client, Client
 from dotenv import load_dotenv
-import streamlit as st
+import numpy as np
 import time
+import copy
+import functools
+import threading
+import types
+from collections import OrderedDict
+from config import SUPABASE, ARMAZENAMENTO_LOCAL, SINCRONIZACAO, CAMPOS_DADOS_OPERACAO
+import eventos
+from replica_local import ReplicaLocal, TABELAS_REPLICA, DUCKDB_AVAILABLE
 
 # Carregar variáveis de ambiente
 load_dotenv()
 
+@functools.lru_cache(maxsize=None)
+def obter_cliente_supabase(url: str, key: str) -> Client:
+    """Cria e testa o cliente Supabase uma única vez por processo (compartilhado entre sessões)"""
+    cliente = create_client(url, key)
+    cliente.table('configuracoes').select('*').limit(1).execute()
+    return cliente
+
+def _ttl_tabelas(tabelas) -> float:
+    """Validade (segundos) do cache de uma leitura: o menor TTL entre as tabelas consultadas"""
+    ttls = SUPABASE.get('cache_ttl', {})
+    padrao = ttls.get('padrao', 300)
+    return min((ttls.get(tabela, padrao) for tabela in tabelas), default=padrao)
+
+def _copiar_resultado(valor):
+    """Cópia do resultado em cache, para que quem chama possa alterá-lo livremente"""
+    if isinstance(valor, pd.DataFrame):
+        return valor.copy()
+    if isinstance(valor, (list, dict)):
+        return copy.deepcopy(valor)
+    return valor
+
+def leitura_em_cache(*tabelas: str):
+    """
+    Memoiza um método de leitura pelos parâmetros da consulta, enquanto o TTL das
+    tabelas lidas não expirar. Resultados vazios e geradores não são guardados.
+    O cache guarda no máximo SUPABASE['cache_entradas'] leituras (as menos usadas saem primeiro).
+    """
+    def decorador(metodo):
+        @functools.wraps(metodo)
+        def wrapper(self, *args, **kwargs):
+            if not self.is_connected():
+                return metodo(self, *args, **kwargs)
+
+            chave = (metodo.__name__, repr(args), repr(sorted(kwargs.items())))
+            agora = time.monotonic()
+            with self._cache_lock:
+                entrada = self._cache.get(chave)
+                if entrada is not None:
+                    self._cache.move_to_end(chave)
+            if entrada is not None and entrada['expira_em'] > agora:
+                return _copiar_resultado(entrada['valor'])
+
+            valor = metodo(self, *args, **kwargs)
+            if valor is None or isinstance(valor, types.GeneratorType):
+                return valor
+            if isinstance(valor, (pd.DataFrame, list, dict)) and len(valor) == 0:
+                return valor
+
+            with self._cache_lock:
+                # Entradas vencidas saem na gravação, sem esperar uma nova leitura da mesma chave
+                for vencida in [c for c, e in self._cache.items() if e['expira_em'] <= agora]:
+                    del self._cache[vencida]
+                self._cache[chave] = {
+                    'expira_em': agora + _ttl_tabelas(tabelas),
+                    'valor': valor,
+                    'tabelas': frozenset(tabelas)
+                }
+                self._cache.move_to_end(chave)
+                while len(self._cache) > SUPABASE.get('cache_entradas', 128):
+                    self._cache.popitem(last=False)
+            return _copiar_resultado(valor)
+        return wrapper
+    return decorador
+
+def escrita_invalida_cache(*tabelas: str):
+    """Após um método de escrita (com ou sem sucesso), descarta o cache apenas das tabelas afetadas"""
+    def decorador(metodo):
+        @functools.wraps(metodo)
+        def wrapper(self, *args, **kwargs):
+            try:
+                return metodo(self, *args, **kwargs)
+            finally:
+                self.invalidar_cache(*tabelas)
+        return wrapper
+    return decorador
+
 class DatabaseManager:
     """Gerenciador de banco de dados com Supabase"""
     
     def __init__(self):
         self.supabase: Optional[Client] = None
         self.connected = False
+        self.ultimo_relatorio_flutuantes: Optional[Dict[str, Any]] = None
+        self._cache: 'OrderedDict[tuple, Dict[str, Any]]' = OrderedDict()  # LRU: mais recente no fim
+        self._cache_lock = threading.Lock()
+        self.replica: Optional[ReplicaLocal] = None
+        self._replica_pendente = set()  # Tabelas gravadas desde a última sincronização da réplica
         self._connect()
+        self._abrir_replica_local()
     
     def _connect(self):
         """Conecta ao Supabase"""
@@ -26,181 +116,433 @@ class DatabaseManager:
             key = os.getenv('SUPABASE_KEY')
             
             if not url or not key:
-                st.warning("⚠️ Variáveis de ambiente do Supabase não configuradas. Usando armazenamento local.")
+                eventos.aviso("⚠️ Variáveis de ambiente do Supabase não configuradas. Usando armazenamento local.")
                 return
             
             # Validar URL
             if not url.startswith('https://'):
-                st.error(f"❌ URL do Supabase inválida: {url}")
-                st.info("A URL deve começar com 'https://'")
+                eventos.erro(f"❌ URL do Supabase inválida: {url}")
+                eventos.info("A URL deve começar com 'https://'")
                 return
             
             # Validar chave
             if not key.startswith('eyJ'):
-                st.error(f"❌ Chave do Supabase inválida: {key[:20]}...")
-                st.info("A chave deve começar com 'eyJ'")
+                eventos.erro(f"❌ Chave do Supabase inválida: {key[:20]}...")
+                eventos.info("A chave deve começar com 'eyJ'")
                 return
             
-            self.supabase = create_client(url, key)
-            
-            # Testar conexão
-            response = self.supabase.table('configuracoes').select('*').limit(1).execute()
+            # Cliente criado e testado uma vez por processo
+            self.supabase = obter_cliente_supabase(url, key)
             self.connected = True
-            st.success("✅ Conectado ao Supabase com sucesso!")
+            eventos.sucesso("✅ Conectado ao Supabase com sucesso!")
             
         except Exception as e:
-            st.error(f"❌ Erro ao conectar ao Supabase: {e}")
+            eventos.erro(f"❌ Erro ao conectar ao Supabase: {e}")
             if "Invalid URL" in str(e):
-                st.info("💡 Verifique se a URL do Supabase está correta no arquivo .env")
+                eventos.info("💡 Verifique se a URL do Supabase está correta no arquivo .env")
             elif "Invalid API key" in str(e):
-                st.info("💡 Verifique se a chave do Supabase está correta no arquivo .env")
+                eventos.info("💡 Verifique se a chave do Supabase está correta no arquivo .env")
             self.connected = False
     
     def is_connected(self) -> bool:
         """Verifica se está conectado ao Supabase"""
         return self.connected and self.supabase is not None
     
-    def save_dados_operacao(self, dados: List[Dict]) -> bool:
-        """Salva dados de operação no Supabase"""
+    def invalidar_cache(self, *tabelas: str):
+        """Descarta as leituras em cache das tabelas informadas (sem tabelas, descarta tudo)"""
+        with self._cache_lock:
+            if not tabelas:
+                self._cache.clear()
+                return
+            afetadas = set(tabelas)
+            for chave in [c for c, entrada in self._cache.items() if entrada['tabelas'] & afetadas]:
+                del self._cache[chave]
+        # A réplica local dessas tabelas é sincronizada antes da próxima leitura
+        self._replica_pendente.update(tabelas or TABELAS_REPLICA)
+    
+    # ============================================================================
+    # RÉPLICA LOCAL (DUCKDB)
+    # ============================================================================
+    
+    def _abrir_replica_local(self):
+        """Abre a réplica local quando ativada em ARMAZENAMENTO_LOCAL"""
+        if not ARMAZENAMENTO_LOCAL['ativo']:
+            return
+        if not DUCKDB_AVAILABLE:
+            eventos.aviso("⚠️ Réplica local ativada, mas o pacote duckdb não está instalado (pip install duckdb).")
+            return
+        
+        try:
+            self.replica = ReplicaLocal()
+        except Exception as e:
+            # Ex.: arquivo em uso por outro processo (o DuckDB aceita um único processo gravando)
+            eventos.aviso(f"⚠️ Réplica local indisponível ({e}). Usando apenas o Supabase.")
+    
+    def sincronizar_replica_local(self, tabelas: tuple = None) -> Dict[str, int]:
+        """Traz para a réplica local as linhas novas do Supabase. Retorna {tabela: linhas recebidas}"""
+        if self.replica is None or not self.is_connected():
+            return {}
+        
+        tabelas = tuple(tabelas or TABELAS_REPLICA)
+        recebidas = self.replica.sincronizar(self.supabase, tabelas)
+        self._replica_pendente.difference_update(tabelas)
+        return recebidas
+    
+    def _replica_para(self, *tabelas: str) -> Optional[ReplicaLocal]:
+        """
+        Réplica local pronta para servir as tabelas, ou None para consultar o Supabase.
+        Conectado, sincroniza antes as tabelas gravadas desde a última sincronização ou
+        com sincronização mais antiga que ARMAZENAMENTO_LOCAL['intervalo_sincronizacao'];
+        offline, serve o que já foi sincronizado.
+        """
+        if self.replica is None:
+            return None
+        
+        if self.is_connected():
+            vencidas = [t for t in tabelas if t in self._replica_pendente
+                        or self.replica.segundos_desde_sincronizacao(t) > ARMAZENAMENTO_LOCAL['intervalo_sincronizacao']]
+            if vencidas:
+                try:
+                    recebidas = self.sincronizar_replica_local(vencidas)
+                    if any(recebidas.values()):
+                        eventos.notificar(f"🔄 Réplica local sincronizada: {sum(recebidas.values())} linhas novas", "info")
+                except Exception as e:
+                    eventos.notificar(f"⚠️ Falha ao sincronizar a réplica local ({e}). Usando dados já sincronizados.", "warning")
+        
+        if all(self.replica.possui(tabela) for tabela in tabelas):
+            return self.replica
+        return None
+    
+    def _servir_da_replica(self, df: pd.DataFrame, em_blocos: bool = False, colunas_data: List[str] = None):
+        """Entrega o resultado da réplica no mesmo formato de carregar_paginado"""
+        for coluna in colunas_data or []:
+            if coluna in df.columns:
+                df[coluna] = pd.to_datetime(df[coluna])
+        
+        if em_blocos:
+            tamanho_pagina = SUPABASE['tamanho_pagina']
+            return (df.iloc[inicio:inicio + tamanho_pagina] for inicio in range(0, len(df), tamanho_pagina))
+        return df
+    
+    # Campos numéricos obrigatórios de cada dia em dados_operacao
+    CAMPOS_DADOS_OPERACAO = CAMPOS_DADOS_OPERACAO
+
+    @escrita_invalida_cache('dados_operacao')
+    def save_dados_operacao(self, dados: List[Dict], incremental: bool = True, tamanho_lote: int = None,
+                            versoes_sincronizadas: Dict[str, str] = None) -> bool:
+        """
+        Salva dados de operação no Supabase em lotes.
+        No modo incremental envia apenas as datas novas ou alteradas e remove as datas
+        excluídas localmente; caso contrário limpa a tabela e reinsere tudo.
+        versoes_sincronizadas ({data: impressao_dados_operacao}) é o estado da última
+        sincronização: com ele a comparação é local, sem baixar a tabela, e dias alterados
+        no banco por outra estação (e não localmente) não são sobrescritos.
+        """
         if not self.is_connected():
-            st.warning("⚠️ Supabase não conectado - salvando apenas localmente")
+            eventos.aviso("⚠️ Supabase não conectado - salvando apenas localmente")
             return False
         
         try:
-            st.info(f"🔄 Salvando {len(dados)} registros no Supabase...")
-            
-            # Limpar dados existentes
-            st.info("🗑️ Limpando dados existentes...")
-            self.supabase.table('dados_operacao').delete().neq('id', 0).execute()
+            tamanho_lote = tamanho_lote or SUPABASE['lote_insercao']
+            eventos.info(f"🔄 Salvando {len(dados)} registros no Supabase...")
             
-            # Inserir novos dados
-            st.info("📝 Inserindo novos dados...")
-            for i, dado in enumerate(dados):
-                st.info(f"  Inserindo registro {i+1}/{len(dados)}: {dado.get('data', 'N/A')}")
+            # Garantir que todos os registros tenham as mesmas colunas (exigido pelo insert em lote)
+            registros = []
+            campos_ausentes = 0
+            for dado in dados:
+                registro = {'data': dado['data']}
+                for campo in self.CAMPOS_DADOS_OPERACAO:
+                    if campo not in dado:
+                        campos_ausentes += 1
+                    registro[campo] = dado.get(campo, 0)  # Valor padrão
+                registros.append(registro)
+            
+            if campos_ausentes:
+                eventos.aviso(f"⚠️ {campos_ausentes} campos ausentes preenchidos com 0")
+            
+            if incremental:
+                if versoes_sincronizadas is None:
+                    # Sem estado de sincronização: comparar com o que já está no banco
+                    colunas = ','.join(['data'] + self.CAMPOS_DADOS_OPERACAO)
+                    versoes_sincronizadas = {
+                        r['data']: self.impressao_dados_operacao(r) for r in self._buscar_em_paginas(
+                            lambda: self.supabase.table('dados_operacao').select(colunas).order('data')
+                        )
+                    }
                 
-                # Verificar se todos os campos necessários estão presentes
-                campos_necessarios = ['data', 'backlog', 'volume_veiculo', 'volume_diario', 
-                                    'flutuantes', 'flutuantes_revertidos', 'erros_sorting', 'erros_etiquetagem']
+                alterados = [r for r in registros
+                             if versoes_sincronizadas.get(r['data']) != self.impressao_dados_operacao(r)]
+                datas_removidas = sorted(set(versoes_sincronizadas) - {r['data'] for r in registros})
                 
-                for campo in campos_necessarios:
-                    if campo not in dado:
-                        st.warning(f"⚠️ Campo '{campo}' não encontrado no registro {i+1}")
-                        dado[campo] = 0  # Valor padrão
+                eventos.info(f"📊 {len(alterados)} datas novas ou alteradas, {len(datas_removidas)} removidas, "
+                        f"{len(registros) - len(alterados)} inalteradas")
                 
-                # Inserir no Supabase
-                response = self.supabase.table('dados_operacao').insert(dado).execute()
+                # O filtro in_ vai na URL: as datas removidas são apagadas em partes
+                for parte in range(0, len(datas_removidas), SUPABASE['lote_consulta']):
+                    self.supabase.table('dados_operacao').delete().in_(
+                        'data', datas_removidas[parte:parte + SUPABASE['lote_consulta']]
+                    ).execute()
                 
-                if not response.data:
-                    st.error(f"❌ Falha ao inserir registro {i+1}")
-                    return False
+                falhas = self._gravar_em_lotes('dados_operacao', alterados, tamanho_lote, on_conflict='data')
+            else:
+                # Limpar dados existentes
+                eventos.info("🗑️ Limpando dados existentes...")
+                self.supabase.table('dados_operacao').delete().neq('id', 0).execute()
+                
+                falhas = self._gravar_em_lotes('dados_operacao', registros, tamanho_lote)
+            
+            if falhas:
+                for falha in falhas:
+                    eventos.erro(f"❌ Falha no lote {falha['lote']} ({falha['registros']} registros): {falha['erro']}")
+                return False
             
-            st.success(f"✅ {len(dados)} registros salvos com sucesso no Supabase!")
+            eventos.sucesso(f"✅ {len(dados)} registros salvos com sucesso no Supabase!")
             return True
             
         except Exception as e:
-            st.error(f"❌ **ERRO AO SALVAR NO SUPABASE:**")
-            st.error(f"**Tipo:** {type(e).__name__}")
-            st.error(f"**Mensagem:** {str(e)}")
+            eventos.erro(f"❌ **ERRO AO SALVAR NO SUPABASE:**")
+            eventos.erro(f"**Tipo:** {type(e).__name__}")
+            eventos.erro(f"**Mensagem:** {str(e)}")
             
             # Verificar se é erro de coluna inexistente
             if "column" in str(e).lower() and "does not exist" in str(e).lower():
-                st.error("🔧 **SOLUÇÃO:** Execute o script SQL para adicionar a coluna 'flutuantes_revertidos'")
-                st.info("📋 Execute o arquivo 'adicionar_coluna_flutuantes_revertidos.sql' no seu Supabase")
+                eventos.erro("🔧 **SOLUÇÃO:** Execute o script SQL para adicionar a coluna 'flutuantes_revertidos'")
+                eventos.info("📋 Execute o arquivo 'adicionar_coluna_flutuantes_revertidos.sql' no seu Supabase")
             
             # Verificar se é erro de conexão
             elif "connection" in str(e).lower() or "timeout" in str(e).lower():
-                st.error("🌐 **PROBLEMA DE CONEXÃO:** Verifique sua conexão com a internet")
+                eventos.erro("🌐 **PROBLEMA DE CONEXÃO:** Verifique sua conexão com a internet")
             
             # Verificar se é erro de permissão
             elif "permission" in str(e).lower() or "unauthorized" in str(e).lower():
-                st.error("🔐 **PROBLEMA DE PERMISSÃO:** Verifique as chaves do Supabase")
+                eventos.erro("🔐 **PROBLEMA DE PERMISSÃO:** Verifique as chaves do Supabase")
             
-            st.error("**Stack trace:**")
+            eventos.erro("**Stack trace:**")
             import traceback
-            st.code(traceback.format_exc())
+            eventos.codigo(traceback.format_exc())
             
             return False
     
+    def _gravar_em_lotes(self, tabela: str, registros: List[Dict], tamanho_lote: int, on_conflict: str = None) -> List[Dict]:
+        """
+        Grava registros com uma requisição por lote (insert ou upsert se on_conflict for informado).
+        Retorna a lista de falhas por lote; lista vazia indica sucesso.
+        """
+        falhas = []
+        if not registros:
+            return falhas
+        
+        total_lotes = (len(registros) + tamanho_lote - 1) // tamanho_lote
+        progresso = eventos.Progresso()
+        
+        for numero_lote, inicio in enumerate(range(0, len(registros), tamanho_lote), start=1):
+            lote = registros[inicio:inicio + tamanho_lote]
+            progresso.atualizar(f"📝 {tabela}: gravando lote {numero_lote}/{total_lotes} ({len(lote)} registros)...")
+            
+            try:
+                if on_conflict:
+                    response = self.supabase.table(tabela).upsert(lote, on_conflict=on_conflict).execute()
+                else:
+                    response = self.supabase.table(tabela).insert(lote).execute()
+                
+                if not response.data:
+                    falhas.append({'lote': numero_lote, 'registros': len(lote), 'erro': 'nenhum registro retornado'})
+            except Exception as e:
+                falhas.append({'lote': numero_lote, 'registros': len(lote), 'erro': str(e)})
+        
+        progresso.encerrar()
+        return falhas
+    
+    def _iterar_paginas(self, montar_consulta, limit: Optional[int] = None, tamanho_pagina: int = None):
+        """
+        Gera os resultados da consulta página a página (range) até esgotar os dados ou atingir o limit.
+        montar_consulta deve retornar uma consulta nova, com ordenação estável, a cada chamada.
+        tamanho_pagina não pode exceder o max_rows do PostgREST, senão a página curta encerra a leitura.
+        """
+        tamanho_pagina = tamanho_pagina or SUPABASE['tamanho_pagina']
+        inicio = 0
+        while limit is None or inicio < limit:
+            fim = inicio + tamanho_pagina - 1
+            if limit is not None:
+                fim = min(fim, limit - 1)
+            
+            response = montar_consulta().range(inicio, fim).execute()
+            pagina = response.data or []
+            if pagina:
+                yield pagina
+            if len(pagina) < fim - inicio + 1:
+                return
+            inicio = fim + 1
+    
+    def _buscar_em_paginas(self, montar_consulta, tamanho_pagina: int = None) -> List[Dict]:
+        """Executa a consulta seguindo todas as páginas e retorna a lista completa de registros"""
+        registros = []
+        for pagina in self._iterar_paginas(montar_consulta, tamanho_pagina=tamanho_pagina):
+            registros.extend(pagina)
+        return registros
+    
+    def carregar_paginado(self, montar_consulta, limit: Optional[int] = None, em_blocos: bool = False,
+                          colunas_data: List[str] = None, tamanho_pagina: int = None):
+        """
+        Carrega os resultados da consulta seguindo as páginas do PostgREST até o fim.
+        Retorna um DataFrame completo ou, com em_blocos=True, um gerador de DataFrames
+        (um por página) para manter a memória limitada em tabelas grandes.
+        """
+        def blocos():
+            for pagina in self._iterar_paginas(montar_consulta, limit, tamanho_pagina):
+                df = pd.DataFrame(pagina)
+                for coluna in colunas_data or []:
+                    if coluna in df.columns:
+                        df[coluna] = pd.to_datetime(df[coluna])
+                yield df
+        
+        if em_blocos:
+            return blocos()
+        
+        partes = list(blocos())
+        return pd.concat(partes, ignore_index=True) if partes else pd.DataFrame()
+    
+    @staticmethod
+    def _projecao(colunas: Optional[List[str]] = None) -> str:
+        """
+        Lista de colunas do select (no Supabase e na réplica); None seleciona todas.
+        Nomes com espaço vão entre aspas, como "Validation Start Time".
+        """
+        if not colunas:
+            return '*'
+        return ','.join(f'"{coluna}"' if ' ' in coluna else coluna for coluna in colunas)
+    
+    def _contar(self, tabela: str) -> int:
+        """Total de linhas da tabela com count exato numa requisição HEAD (nenhuma linha é baixada)"""
+        return self.supabase.table(tabela).select('id', count='exact', head=True).execute().count or 0
+    
+    @leitura_em_cache('dados_operacao')
     def load_dados_operacao(self):
         """Carrega dados de operação do Supabase"""
         try:
-            # Criar placeholder para mensagens temporárias
-            status_placeholder = st.empty()
-            status_placeholder.info("🔍 Executando consulta no Supabase...")
-            
-            # Executar consulta
             result = self.supabase.table('dados_operacao').select('*').execute()
             
             # Verificar se há dados
             if result.data:
-                status_placeholder.success(f"✅ Consulta executada com sucesso. {len(result.data)} registros encontrados")
-                # Limpar mensagem após 5 segundos
-                time.sleep(5)
-                status_placeholder.empty()
                 return result.data
             else:
-                status_placeholder.warning("⚠️ Nenhum registro encontrado no Supabase")
-                time.sleep(3)
-                status_placeholder.empty()
+                eventos.notificar("⚠️ Nenhum registro encontrado no Supabase", "warning")
                 return []
                 
         except Exception as e:
-            status_placeholder = st.empty()
-            status_placeholder.error(f"❌ Erro ao carregar dados do Supabase: {e}")
-            time.sleep(5)
-            status_placeholder.empty()
+            eventos.notificar(f"❌ Erro ao carregar dados do Supabase: {e}", "error")
+            return None
+    
+    @classmethod
+    def impressao_dados_operacao(cls, registro: Dict) -> str:
+        """Versão de um dia de dados_operacao (valores dos campos), comparável entre o arquivo local e o banco"""
+        return '|'.join(str(cls._valor_comparavel(registro.get(campo, 0))) for campo in cls.CAMPOS_DADOS_OPERACAO)
+    
+    def load_dados_operacao_alterados(self, desde: str = None) -> Optional[List[Dict]]:
+        """
+        Dias de dados_operacao inseridos ou alterados desde a marca d'água (updated_at),
+        relendo SINCRONIZACAO['margem_segundos'] antes dela; desde=None carrega a tabela toda.
+        O volume lido cresce com as alterações, não com o histórico. Retorna None em caso de erro.
+        """
+        if not self.is_connected():
+            return None
+        
+        coluna = SINCRONIZACAO['coluna_marca']['dados_operacao']
+        
+        def montar_consulta():
+            query = self.supabase.table('dados_operacao').select(','.join(['id', 'data', coluna] + self.CAMPOS_DADOS_OPERACAO))
+            if desde:
+                inicio = pd.Timestamp(desde) - pd.Timedelta(seconds=SINCRONIZACAO['margem_segundos'])
+                query = query.gte(coluna, inicio.isoformat())
+            return query.order(coluna).order('id')
+        
+        try:
+            return self._buscar_em_paginas(montar_consulta)
+        except Exception as e:
+            eventos.notificar(f"❌ Erro ao carregar alterações de dados de operação: {e}", "error")
+            return None
+    
+    def contar_registros(self, tabela: str) -> Optional[int]:
+        """Total de linhas da tabela (count exato, sem baixar linhas); None em caso de erro"""
+        try:
+            return self._contar(tabela)
+        except Exception as e:
+            eventos.notificar(f"⚠️ Erro ao contar registros de {tabela}: {e}", "warning")
             return None
     
-    def save_dados_validacao(self, df: pd.DataFrame, arquivo_origem: str = None) -> bool:
-        """Salva dados de validação no Supabase"""
+    def listar_datas_operacao(self) -> List[str]:
+        """Datas presentes em dados_operacao (apenas a coluna data)"""
+        return [r['data'] for r in self._buscar_em_paginas(
+            lambda: self.supabase.table('dados_operacao').select('data').order('data')
+        )]
+    
+    @escrita_invalida_cache('dados_validacao')
+    def save_dados_validacao(self, df: pd.DataFrame, arquivo_origem: str = None, tamanho_lote: int = None) -> bool:
+        """Salva dados de validação no Supabase em lotes"""
         if not self.is_connected():
             return False
         
         try:
-            # Converter DataFrame para lista de dicionários
-            dados = df.to_dict('records')
+            tamanho_lote = tamanho_lote or SUPABASE['lote_insercao']
+            
+            # Datas e horários como texto ISO e NaN/NaT como None (serialização JSON)
+            tabela = df.copy()
+            for coluna in tabela.select_dtypes(include=['datetime', 'datetimetz']).columns:
+                tabela[coluna] = tabela[coluna].dt.strftime('%Y-%m-%dT%H:%M:%S')
+            if 'Data' in tabela.columns:
+                tabela['Data'] = pd.to_datetime(tabela['Data']).dt.strftime('%Y-%m-%d')
+            tabela = tabela.astype(object).where(tabela.notna(), None)
             
             # Adicionar timestamp de importação
+            importado_em = datetime.now().isoformat()
+            dados = tabela.to_dict('records')
             for dado in dados:
-                dado['importado_em'] = datetime.now().isoformat()
-                if arquivo_origem:
-                    dado['arquivo_origem'] = arquivo_origem
+                dado['importado_em'] = importado_em
+                if arquivo_origem and not dado.get('Arquivo_Origem'):
+                    dado['Arquivo_Origem'] = arquivo_origem
             
-            # Inserir dados
-            self.supabase.table('dados_validacao').insert(dados).execute()
+            falhas = self._gravar_em_lotes('dados_validacao', dados, tamanho_lote)
+            if falhas:
+                for falha in falhas:
+                    eventos.erro(f"❌ Falha no lote {falha['lote']} ({falha['registros']} registros): {falha['erro']}")
+                return False
             
             return True
             
         except Exception as e:
-            st.error(f"❌ Erro ao salvar dados de validação no Supabase: {e}")
+            eventos.erro(f"❌ Erro ao salvar dados de validação no Supabase: {e}")
             return False
     
-    def load_dados_validacao(self, limit: int = 1000) -> pd.DataFrame:
-        """Carrega dados de validação do Supabase"""
+    @leitura_em_cache('dados_validacao')
+    def load_dados_validacao(self, limit: Optional[int] = None, em_blocos: bool = False, colunas: List[str] = None):
+        """
+        Carrega dados de validação do Supabase seguindo todas as páginas
+        (limit=None carrega tudo; em_blocos=True retorna um gerador de DataFrames;
+        colunas restringe os campos baixados, None traz todos)
+        """
+        colunas_data = ['Validation Start Time', 'Validation End Time', 'Data']
+        replica = self._replica_para('dados_validacao')
+        if replica is not None:
+            df = replica.selecionar('dados_validacao', self._projecao(colunas), ordem='"Validation Start Time" DESC, id DESC', limit=limit)
+            return self._servir_da_replica(df, em_blocos, colunas_data)
+        
         if not self.is_connected():
-            return pd.DataFrame()
+            return iter(()) if em_blocos else pd.DataFrame()
         
         try:
-            response = self.supabase.table('dados_validacao').select('*').order('Validation Start Time', desc=True).limit(limit).execute()
-            
-            if response.data:
-                df = pd.DataFrame(response.data)
-                # Converter colunas de data
-                if 'Validation Start Time' in df.columns:
-                    df['Validation Start Time'] = pd.to_datetime(df['Validation Start Time'])
-                if 'Validation End Time' in df.columns:
-                    df['Validation End Time'] = pd.to_datetime(df['Validation End Time'])
-                if 'Data' in df.columns:
-                    df['Data'] = pd.to_datetime(df['Data'])
-                
-                return df
-            else:
-                return pd.DataFrame()
+            return self.carregar_paginado(
+                lambda: self.supabase.table('dados_validacao').select(self._projecao(colunas))
+                    .order('Validation Start Time', desc=True).order('id', desc=True),
+                limit=limit,
+                em_blocos=em_blocos,
+                colunas_data=colunas_data
+            )
                 
         except Exception as e:
-            st.error(f"❌ Erro ao carregar dados de validação do Supabase: {e}")
+            eventos.erro(f"❌ Erro ao carregar dados de validação do Supabase: {e}")
             return pd.DataFrame()
     
+    @escrita_invalida_cache('flutuantes_operador')
     def save_flutuantes_operador(self, flutuantes_data: Dict[str, int], data_operacao: str) -> bool:
         """Salva dados de flutuantes por operador"""
         if not self.is_connected():
@@ -223,9 +565,10 @@ class DatabaseManager:
             return True
             
         except Exception as e:
-            st.error(f"❌ Erro ao salvar flutuantes no Supabase: {e}")
+            eventos.erro(f"❌ Erro ao salvar flutuantes no Supabase: {e}")
             return False
     
+    @leitura_em_cache('flutuantes_operador')
     def load_flutuantes_operador(self, data_operacao: str = None) -> Dict[str, int]:
         """Carrega dados de flutuantes por operador"""
         if not self.is_connected():
@@ -248,27 +591,32 @@ class DatabaseManager:
                 return {}
                 
         except Exception as e:
-            st.error(f"❌ Erro ao carregar flutuantes do Supabase: {e}")
+            eventos.erro(f"❌ Erro ao carregar flutuantes do Supabase: {e}")
             return {}
     
-    def sync_local_to_supabase(self, dados_locais: List[Dict]) -> bool:
-        """Sincroniza dados locais com o Supabase"""
+    @escrita_invalida_cache('dados_operacao')
+    def sync_local_to_supabase(self, dados_locais: List[Dict], versoes_sincronizadas: Dict[str, str] = None) -> bool:
+        """
+        Envia ao Supabase os dias novos, alterados ou removidos localmente
+        (em relação a versoes_sincronizadas, quando informado)
+        """
         if not self.is_connected():
             return False
         
         try:
             # Salvar dados de operação
-            success = self.save_dados_operacao(dados_locais)
+            success = self.save_dados_operacao(dados_locais, versoes_sincronizadas=versoes_sincronizadas)
             
             if success:
-                st.success("🔄 Dados locais sincronizados com o Supabase!")
+                eventos.sucesso("🔄 Dados locais sincronizados com o Supabase!")
             
             return success
             
         except Exception as e:
-            st.error(f"❌ Erro na sincronização: {e}")
+            eventos.erro(f"❌ Erro na sincronização: {e}")
             return False
     
+    @leitura_em_cache('dados_operacao', 'dados_validacao', 'flutuantes_operador')
     def get_estatisticas(self) -> Dict[str, Any]:
         """Obtém estatísticas gerais do banco"""
         if not self.is_connected():
@@ -277,35 +625,29 @@ class DatabaseManager:
         try:
             stats = {}
             
-            # Contar registros de operação
-            response = self.supabase.table('dados_operacao').select('*', count='exact').execute()
-            stats['total_dados_operacao'] = response.count if hasattr(response, 'count') else 0
-            
-            # Contar registros de validação
-            response = self.supabase.table('dados_validacao').select('*', count='exact').execute()
-            stats['total_dados_validacao'] = response.count if hasattr(response, 'count') else 0
-            
-            # Contar registros de flutuantes
-            response = self.supabase.table('flutuantes_operador').select('*', count='exact').execute()
-            stats['total_flutuantes'] = response.count if hasattr(response, 'count') else 0
+            # Contagens sem baixar as linhas (HEAD)
+            stats['total_dados_operacao'] = self._contar('dados_operacao')
+            stats['total_dados_validacao'] = self._contar('dados_validacao')
+            stats['total_flutuantes'] = self._contar('flutuantes_operador')
             
             return stats
             
         except Exception as e:
-            st.error(f"❌ Erro ao obter estatísticas: {e}")
+            eventos.erro(f"❌ Erro ao obter estatísticas: {e}")
             return {}
 
-    def save_pacotes_flutuantes(self, df: pd.DataFrame, arquivo_origem: str = None, upsert: bool = True) -> bool:
-        """Salva dados de pacotes flutuantes no Supabase com opção de upsert"""
+    @escrita_invalida_cache('pacotes_flutuantes')
+    def save_pacotes_flutuantes(self, df: pd.DataFrame, arquivo_origem: str = None, upsert: bool = True, tamanho_lote: int = None) -> bool:
+        """Salva dados de pacotes flutuantes no Supabase com opção de upsert em lote"""
         if not self.is_connected():
-            st.warning("⚠️ Supabase não conectado - salvando apenas localmente")
+            eventos.aviso("⚠️ Supabase não conectado - salvando apenas localmente")
             return False
         
         try:
             if upsert:
-                st.info(f"🔄 Processando {len(df)} pacotes flutuantes (modo upsert)...")
+                eventos.info(f"🔄 Processando {len(df)} pacotes flutuantes (modo upsert)...")
             else:
-                st.info(f"🔄 Salvando {len(df)} pacotes flutuantes no Supabase...")
+                eventos.info(f"🔄 Salvando {len(df)} pacotes flutuantes no Supabase...")
             
             # Mapear colunas do CSV para o banco
             mapeamento_colunas = {
@@ -338,7 +680,7 @@ class DatabaseManager:
                         # Se falhar, tenta formato padrão
                         df_renomeado['data_recebimento'] = pd.to_datetime(df_renomeado['data_recebimento'])
                     except:
-                        st.error("❌ Erro ao converter datas. Verifique o formato das datas no CSV.")
+                        eventos.erro("❌ Erro ao converter datas. Verifique o formato das datas no CSV.")
                         return False
                 
                 df_renomeado['data_recebimento'] = df_renomeado['data_recebimento'].dt.strftime('%Y-%m-%d')
@@ -346,164 +688,200 @@ class DatabaseManager:
             if 'aging' in df_renomeado.columns:
                 df_renomeado['aging'] = pd.to_numeric(df_renomeado['aging'], errors='coerce').fillna(0).astype(int)
             
-            # O campo foi_expedido já foi processado no utils.py, não precisa reprocessar
-            if 'foi_expedido' in df_renomeado.columns:
-                st.write(f"🔍 DEBUG: Campo foi_expedido já processado - True: {(df_renomeado['foi_expedido'] == True).sum()}, False: {(df_renomeado['foi_expedido'] == False).sum()}")
-            
-            # O campo foi_encontrado já foi processado no utils.py, não precisa reprocessar
-            if 'foi_encontrado' in df_renomeado.columns:
-                st.write(f"🔍 DEBUG: Campo foi_encontrado já processado - True: {(df_renomeado['foi_encontrado'] == True).sum()}, False: {(df_renomeado['foi_encontrado'] == False).sum()}")
-            
-            # O campo status já foi processado no utils.py, não precisa reprocessar
-            if 'status' in df_renomeado.columns:
-                st.write(f"🔍 DEBUG: Campo status já processado - True: {(df_renomeado['status'] == True).sum()}, False: {(df_renomeado['status'] == False).sum()}")
+            # foi_expedido, foi_encontrado e status já chegam normalizados como booleanos (utils.py)
             
             # Adicionar campos de controle
             df_renomeado['importado_em'] = datetime.now().isoformat()
             if arquivo_origem:
                 df_renomeado['arquivo_origem'] = arquivo_origem
             
+            # Remover NaN para que o payload seja um JSON válido
+            df_renomeado = df_renomeado.astype(object).where(pd.notna(df_renomeado), None)
+            
             # Converter para lista de dicionários
             dados = df_renomeado.to_dict('records')
             
+            tamanho_lote = tamanho_lote or SUPABASE['lote_upsert']
+            relatorio = self._upsert_pacotes_flutuantes(dados, tamanho_lote, atualizar_existentes=upsert)
+            self.ultimo_relatorio_flutuantes = relatorio
+            
+            for falha in relatorio['falhas']:
+                eventos.erro(f"❌ Erro no lote {falha['lote']}: {falha['erro']}")
+            
+            if relatorio['falhas']:
+                return False
+            
             if upsert:
-                # Modo upsert: atualizar existentes e inserir novos
-                st.info("🔍 Verificando registros existentes...")
-                
-                # Obter tracking numbers existentes
-                tracking_numbers_existentes = set()
-                try:
-                    response = self.supabase.table('pacotes_flutuantes').select('tracking_number').execute()
-                    if response.data:
-                        tracking_numbers_existentes = {item['tracking_number'] for item in response.data if item.get('tracking_number')}
-                except Exception as e:
-                    st.warning(f"⚠️ Não foi possível verificar registros existentes: {e}")
-                
-                # Separar dados em novos e existentes
-                dados_novos = []
-                dados_atualizar = []
-                
-                for item in dados:
-                    if item.get('tracking_number') in tracking_numbers_existentes:
-                        dados_atualizar.append(item)
-                    else:
-                        dados_novos.append(item)
-                
-                st.info(f"📊 Encontrados: {len(dados_atualizar)} existentes, {len(dados_novos)} novos")
-                
-                # Atualizar registros existentes
-                if dados_atualizar:
-                    st.info(f"🔄 Atualizando {len(dados_atualizar)} registros existentes...")
-                    lote_size = 50  # Lotes menores para updates
-                    
-                    for i in range(0, len(dados_atualizar), lote_size):
-                        lote = dados_atualizar[i:i + lote_size]
-                        st.info(f"  Atualizando lote {i//lote_size + 1}/{(len(dados_atualizar) + lote_size - 1)//lote_size}")
-                        
-                        for item in lote:
-                            tracking = item.get('tracking_number')
-                            if tracking:
-                                # Remover campos que não devem ser atualizados
-                                item_update = {k: v for k, v in item.items() if k not in ['id', 'importado_em']}
-                                
-                                try:
-                                    self.supabase.table('pacotes_flutuantes').update(item_update).eq('tracking_number', tracking).execute()
-                                except Exception as e:
-                                    st.warning(f"⚠️ Erro ao atualizar tracking {tracking}: {e}")
-                
-                # Inserir novos registros
-                if dados_novos:
-                    st.info(f"➕ Inserindo {len(dados_novos)} novos registros...")
-                    lote_size = 100
-                    
-                    for i in range(0, len(dados_novos), lote_size):
-                        lote = dados_novos[i:i + lote_size]
-                        st.info(f"  Inserindo lote {i//lote_size + 1}/{(len(dados_novos) + lote_size - 1)//lote_size}")
-                        
-                        try:
-                            response = self.supabase.table('pacotes_flutuantes').insert(lote).execute()
-                            if not response.data:
-                                st.error(f"❌ Falha ao inserir lote {i//lote_size + 1}")
-                                return False
-                        except Exception as e:
-                            st.error(f"❌ Erro ao inserir lote {i//lote_size + 1}: {e}")
-                            return False
-                
-                st.success(f"✅ Processamento concluído! {len(dados_atualizar)} atualizados, {len(dados_novos)} inseridos")
-                return True
-                
+                eventos.sucesso(
+                    f"✅ Processamento concluído em {relatorio['lotes']} lotes! "
+                    f"{relatorio['inseridos']} inseridos, {relatorio['atualizados']} atualizados, "
+                    f"{relatorio['inalterados']} inalterados"
+                )
             else:
-                # Modo normal: apenas inserir
-                lote_size = 100
-                for i in range(0, len(dados), lote_size):
-                    lote = dados[i:i + lote_size]
-                    st.info(f"  Inserindo lote {i//lote_size + 1}/{(len(dados) + lote_size - 1)//lote_size}")
-                    
-                    response = self.supabase.table('pacotes_flutuantes').insert(lote).execute()
-                    
-                    if not response.data:
-                        st.error(f"❌ Falha ao inserir lote {i//lote_size + 1}")
-                        return False
-                
-                st.success(f"✅ {len(dados)} pacotes flutuantes salvos com sucesso no Supabase!")
-                return True
+                eventos.sucesso(
+                    f"✅ {relatorio['inseridos']} pacotes flutuantes salvos com sucesso no Supabase! "
+                    f"({relatorio['ignorados']} já existentes ignorados)"
+                )
+            return True
             
         except Exception as e:
-            st.error(f"❌ **ERRO AO SALVAR PACOTES FLUTUANTES NO SUPABASE:**")
-            st.error(f"**Tipo:** {type(e).__name__}")
-            st.error(f"**Mensagem:** {str(e)}")
+            eventos.erro(f"❌ **ERRO AO SALVAR PACOTES FLUTUANTES NO SUPABASE:**")
+            eventos.erro(f"**Tipo:** {type(e).__name__}")
+            eventos.erro(f"**Mensagem:** {str(e)}")
             
             # Verificar se é erro de tabela inexistente
             if "relation" in str(e).lower() and "does not exist" in str(e).lower():
-                st.error("🔧 **SOLUÇÃO:** Execute o script SQL para criar a tabela 'pacotes_flutuantes'")
-                st.info("📋 Execute o arquivo 'setup_database.sql' no seu Supabase")
+                eventos.erro("🔧 **SOLUÇÃO:** Execute o script SQL para criar a tabela 'pacotes_flutuantes'")
+                eventos.info("📋 Execute o arquivo 'setup_database.sql' no seu Supabase")
             
             return False
 
-    def load_pacotes_flutuantes(self, limit: int = 1000, operador_real: str = None, data_inicio: str = None, data_fim: str = None) -> pd.DataFrame:
-        """Carrega dados de pacotes flutuantes do Supabase"""
-        if not self.is_connected():
-            return pd.DataFrame()
+    # Campos de controle que não participam da comparação de registros existentes
+    CAMPOS_CONTROLE = {'id', 'importado_em', 'arquivo_origem', 'updated_at'}
+
+    def _upsert_pacotes_flutuantes(self, dados: List[Dict], tamanho_lote: int, atualizar_existentes: bool = True) -> Dict[str, Any]:
+        """
+        Grava pacotes flutuantes em lotes usando upsert nativo (ON CONFLICT tracking_number).
+        Cada lote consulta apenas os próprios tracking numbers, então o custo cresce com o
+        número de lotes e não com o tamanho da tabela.
+        Retorna relatório com inseridos, atualizados, inalterados, ignorados e falhas por lote.
+        """
+        relatorio = {'inseridos': 0, 'atualizados': 0, 'inalterados': 0, 'ignorados': 0, 'lotes': 0, 'falhas': []}
         
-        try:
-            query = self.supabase.table('pacotes_flutuantes').select('*').order('importado_em', desc=True)
-            
-            # Aplicar filtros
-            if operador_real:
-                query = query.eq('operador_real', operador_real)
-            
-            if data_inicio:
-                query = query.gte('data_recebimento', data_inicio)
-            
-            if data_fim:
-                query = query.lte('data_recebimento', data_fim)
-            
-            response = query.limit(limit).execute()
-            
-            if response.data:
-                df = pd.DataFrame(response.data)
+        # Deduplicar pelo tracking number (a última ocorrência do arquivo prevalece)
+        por_tracking = {}
+        sem_tracking = []
+        for item in dados:
+            tracking = item.get('tracking_number')
+            if tracking is None or str(tracking).strip() == '':
+                sem_tracking.append(item)
+            else:
+                item['tracking_number'] = str(tracking).strip()
+                por_tracking[item['tracking_number']] = item
+        registros = list(por_tracking.values())
+        
+        campos_comparacao = []
+        if registros and atualizar_existentes:
+            campos_comparacao = [c for c in registros[0].keys() if c not in self.CAMPOS_CONTROLE and c != 'tracking_number']
+        colunas_consulta = ','.join(['tracking_number'] + campos_comparacao)
+        
+        total_lotes = (len(registros) + tamanho_lote - 1) // tamanho_lote + (len(sem_tracking) + tamanho_lote - 1) // tamanho_lote
+        progresso = eventos.Progresso()
+        tabela = 'pacotes_flutuantes'
+        
+        for inicio in range(0, len(registros), tamanho_lote):
+            relatorio['lotes'] += 1
+            numero_lote = relatorio['lotes']
+            lote = registros[inicio:inicio + tamanho_lote]
+            progresso.atualizar(f"🔄 Processando lote {numero_lote}/{total_lotes} ({len(lote)} registros)...")
+            
+            try:
+                # Consultar apenas os tracking numbers deste lote, em partes: o filtro in_ vai na URL
+                # do GET e centenas de chaves passam do limite de tamanho de URL dos proxies
+                trackings = [item['tracking_number'] for item in lote]
+                existentes = {}
+                for parte in range(0, len(trackings), SUPABASE['lote_consulta']):
+                    response = self.supabase.table(tabela).select(colunas_consulta).in_(
+                        'tracking_number', trackings[parte:parte + SUPABASE['lote_consulta']]
+                    ).execute()
+                    existentes.update({r['tracking_number']: r for r in (response.data or [])})
                 
-                # Converter colunas de data
-                if 'data_recebimento' in df.columns:
-                    df['data_recebimento'] = pd.to_datetime(df['data_recebimento'])
-                if 'importado_em' in df.columns:
-                    df['importado_em'] = pd.to_datetime(df['importado_em'])
+                novos = []
+                alterados = []
+                for item in lote:
+                    atual = existentes.get(item['tracking_number'])
+                    if atual is None:
+                        novos.append(item)
+                    elif not atualizar_existentes:
+                        relatorio['ignorados'] += 1
+                    elif self._registro_alterado(item, atual, campos_comparacao):
+                        # Não sobrescrever a data de importação original
+                        alterados.append({k: v for k, v in item.items() if k not in ('id', 'importado_em')})
+                    else:
+                        relatorio['inalterados'] += 1
                 
-                return df
-            else:
-                return pd.DataFrame()
+                if novos:
+                    self.supabase.table(tabela).upsert(novos, on_conflict='tracking_number', ignore_duplicates=True).execute()
+                    relatorio['inseridos'] += len(novos)
                 
-        except Exception as e:
-            st.error(f"❌ Erro ao carregar pacotes flutuantes do Supabase: {e}")
-            return pd.DataFrame()
+                if alterados:
+                    self.supabase.table(tabela).upsert(alterados, on_conflict='tracking_number').execute()
+                    relatorio['atualizados'] += len(alterados)
+                    
+            except Exception as e:
+                relatorio['falhas'].append({'lote': numero_lote, 'registros': len(lote), 'erro': str(e)})
+        
+        # Registros sem tracking number não têm chave de conflito: apenas inserir
+        for inicio in range(0, len(sem_tracking), tamanho_lote):
+            relatorio['lotes'] += 1
+            lote = sem_tracking[inicio:inicio + tamanho_lote]
+            progresso.atualizar(f"➕ Inserindo lote {relatorio['lotes']}/{total_lotes} sem tracking number...")
+            
+            try:
+                self.supabase.table(tabela).insert(lote).execute()
+                relatorio['inseridos'] += len(lote)
+            except Exception as e:
+                relatorio['falhas'].append({'lote': relatorio['lotes'], 'registros': len(lote), 'erro': str(e)})
+        
+        progresso.encerrar()
+        return relatorio
+
+    @staticmethod
+    def _valor_comparavel(valor):
+        """Normaliza um valor para comparar o CSV com o que já está gravado no banco"""
+        if valor is None or (isinstance(valor, float) and np.isnan(valor)):
+            return None
+        if isinstance(valor, (bool, np.bool_)):
+            return str(bool(valor)).lower()
+        if isinstance(valor, float) and valor.is_integer():
+            return str(int(valor))
+        if isinstance(valor, str) and len(valor) > 10 and valor[4] == '-' and valor[10] == 'T':
+            # Timestamps: o banco devolve com fuso (UTC), o CSV sem
+            try:
+                momento = pd.Timestamp(valor)
+                momento = momento.tz_localize('UTC') if momento.tzinfo is None else momento.tz_convert('UTC')
+                return momento.isoformat()
+            except ValueError:
+                pass
+        return str(valor).strip()
 
-    def load_pacotes_flutuantes_multiplos_operadores(self, limit: int = 1000, operadores_reais: list = None, data_inicio: str = None, data_fim: str = None) -> pd.DataFrame:
+    def _registro_alterado(self, novo: Dict, atual: Dict, campos: List[str]) -> bool:
+        """Verifica se algum campo do registro novo difere do registro gravado"""
+        return any(
+            self._valor_comparavel(novo.get(campo)) != self._valor_comparavel(atual.get(campo))
+            for campo in campos
+        )
+
+    def load_pacotes_flutuantes(self, limit: Optional[int] = None, operador_real: str = None, data_inicio: str = None,
+                                data_fim: str = None, em_blocos: bool = False, colunas: List[str] = None):
+        """
+        Carrega dados de pacotes flutuantes do Supabase seguindo todas as páginas
+        (limit=None carrega tudo; em_blocos=True retorna um gerador de DataFrames;
+        colunas restringe os campos baixados, None traz todos)
+        """
+        return self.load_pacotes_flutuantes_multiplos_operadores(
+            limit, [operador_real] if operador_real else None, data_inicio, data_fim, em_blocos, colunas
+        )
+
+    @leitura_em_cache('pacotes_flutuantes')
+    def load_pacotes_flutuantes_multiplos_operadores(self, limit: Optional[int] = None, operadores_reais: list = None,
+                                                     data_inicio: str = None, data_fim: str = None, em_blocos: bool = False,
+                                                     colunas: List[str] = None):
         """Carrega dados de pacotes flutuantes do Supabase com suporte a múltiplos operadores"""
+        replica = self._replica_para('pacotes_flutuantes')
+        if replica is not None:
+            df = replica.selecionar('pacotes_flutuantes', self._projecao(colunas), filtros=[
+                ('operador_real', 'in', operadores_reais or []),
+                ('data_recebimento', '>=', data_inicio),
+                ('data_recebimento', '<=', data_fim)
+            ], ordem='importado_em DESC, id DESC', limit=limit)
+            return self._servir_da_replica(df, em_blocos, ['data_recebimento', 'importado_em'])
+        
         if not self.is_connected():
-            return pd.DataFrame()
+            return iter(()) if em_blocos else pd.DataFrame()
         
-        try:
-            query = self.supabase.table('pacotes_flutuantes').select('*').order('importado_em', desc=True)
+        def montar_consulta():
+            query = self.supabase.table('pacotes_flutuantes').select(self._projecao(colunas))
             
             # Aplicar filtros
             if operadores_reais and len(operadores_reais) > 0:
@@ -515,27 +893,28 @@ class DatabaseManager:
             if data_fim:
                 query = query.lte('data_recebimento', data_fim)
             
-            response = query.limit(limit).execute()
-            
-            if response.data:
-                df = pd.DataFrame(response.data)
-                
-                # Converter colunas de data
-                if 'data_recebimento' in df.columns:
-                    df['data_recebimento'] = pd.to_datetime(df['data_recebimento'])
-                if 'importado_em' in df.columns:
-                    df['importado_em'] = pd.to_datetime(df['importado_em'])
-                
-                return df
-            else:
-                return pd.DataFrame()
+            # id desempata registros importados no mesmo lote (mesmo importado_em)
+            return query.order('importado_em', desc=True).order('id', desc=True)
+        
+        try:
+            return self.carregar_paginado(
+                montar_consulta,
+                limit=limit,
+                em_blocos=em_blocos,
+                colunas_data=['data_recebimento', 'importado_em']
+            )
                 
         except Exception as e:
-            st.error(f"❌ Erro ao carregar pacotes flutuantes do Supabase: {e}")
+            eventos.erro(f"❌ Erro ao carregar pacotes flutuantes do Supabase: {e}")
             return pd.DataFrame()
 
+    @leitura_em_cache('pacotes_flutuantes')
     def get_ranking_operadores_flutuantes(self) -> pd.DataFrame:
         """Obtém ranking de operadores com mais flutuantes"""
+        replica = self._replica_para('pacotes_flutuantes')
+        if replica is not None and 'ranking_operadores_flutuantes' in replica.views:
+            return replica.selecionar('ranking_operadores_flutuantes', ordem='total_flutuantes DESC')
+        
         if not self.is_connected():
             return pd.DataFrame()
         
@@ -587,11 +966,42 @@ class DatabaseManager:
                 return pd.DataFrame()
                     
         except Exception as e:
-            st.error(f"❌ Erro ao obter ranking de operadores: {e}")
+            eventos.erro(f"❌ Erro ao obter ranking de operadores: {e}")
+            return pd.DataFrame()
+
+    COLUNAS_OPERADORES_FLUTUANTES = ['operador_real', 'total_flutuantes', 'flutuantes_encontrados', 'primeira_data', 'ultima_data']
+
+    @leitura_em_cache('pacotes_flutuantes')
+    def listar_operadores_flutuantes(self) -> pd.DataFrame:
+        """
+        Nomes distintos de operador_real (um por linha, com total de flutuantes, encontrados e
+        primeira/última data), agrupados no banco pela view ranking_operadores_flutuantes
+        em vez de baixar todos os pacotes
+        """
+        colunas = self.COLUNAS_OPERADORES_FLUTUANTES
+        replica = self._replica_para('pacotes_flutuantes')
+        if replica is not None and 'ranking_operadores_flutuantes' in replica.views:
+            return replica.selecionar('ranking_operadores_flutuantes', self._projecao(colunas), ordem='operador_real')
+        
+        if not self.is_connected():
+            return pd.DataFrame()
+        
+        try:
+            return self.carregar_paginado(
+                lambda: self.supabase.from_('ranking_operadores_flutuantes').select(self._projecao(colunas)).order('operador_real')
+            )
+            
+        except Exception as e:
+            eventos.erro(f"❌ Erro ao listar operadores de flutuantes: {e}")
             return pd.DataFrame()
 
+    @leitura_em_cache('pacotes_flutuantes')
     def get_resumo_flutuantes_estacao(self) -> pd.DataFrame:
         """Obtém resumo de flutuantes por estação"""
+        replica = self._replica_para('pacotes_flutuantes')
+        if replica is not None and 'resumo_flutuantes_estacao' in replica.views:
+            return replica.selecionar('resumo_flutuantes_estacao', ordem='total_flutuantes DESC')
+        
         if not self.is_connected():
             return pd.DataFrame()
         
@@ -640,126 +1050,388 @@ class DatabaseManager:
                 return pd.DataFrame()
                 
         except Exception as e:
-            st.error(f"❌ Erro ao obter resumo por estação: {e}")
+            eventos.erro(f"❌ Erro ao obter resumo por estação: {e}")
             return pd.DataFrame()
 
+    @leitura_em_cache('pacotes_flutuantes')
     def get_total_flutuantes_por_data(self, data_operacao: str) -> int:
         """Obtém total de flutuantes para uma data específica"""
+        replica = self._replica_para('pacotes_flutuantes')
+        if replica is not None:
+            return int(replica.selecionar('pacotes_flutuantes', 'COUNT(*) AS total',
+                                          filtros=[('data_recebimento', '=', data_operacao)])['total'].iloc[0])
+        
         if not self.is_connected():
             return 0
         
         try:
-            response = self.supabase.table('pacotes_flutuantes').select('*', count='exact').eq('data_recebimento', data_operacao).execute()
-            return response.count if hasattr(response, 'count') else 0
+            # Resumo diário: uma linha por operador/estação do dia em vez dos pacotes
+            response = self.supabase.table('flutuantes_resumo_diario').select('total_flutuantes').eq('data_recebimento', data_operacao).execute()
+            return int(sum(linha['total_flutuantes'] for linha in response.data or []))
             
         except Exception as e:
-            st.error(f"❌ Erro ao obter total de flutuantes: {e}")
+            eventos.erro(f"❌ Erro ao obter total de flutuantes: {e}")
             return 0
 
+    # Critérios de ordenação aceitos pela RPC ranking_flutuantes_operadores: (coluna, ascendente)
+    CRITERIOS_RANKING_FLUTUANTES = {
+        'total': ('total_flutuantes', False),
+        'recentes': ('flutuantes_recentes', False),
+        'taxa': ('taxa_encontrados', False),
+        'aging': ('aging_medio', True),
+        'melhoria': ('tendencia', True),
+        'piora': ('tendencia', False)
+    }
+
+    @leitura_em_cache('pacotes_flutuantes')
+    def obter_ranking_flutuantes_periodo(self, data_inicio: str = None, data_fim: str = None, chaves_operadores: list = None,
+                                         data_recentes: str = None, anterior_inicio: str = None, anterior_fim: str = None,
+                                         criterio: str = 'total') -> pd.DataFrame:
+        """
+        Obtém o ranking de operadores por flutuantes agregado no banco (RPC ranking_flutuantes_operadores).
+        Retorna uma linha por operador (agrupado pelo código [ops]) já ordenada pelo critério.
+        Com a réplica local, agrega localmente sobre ela.
+        """
+        if self._replica_para('pacotes_flutuantes') is None:
+            if not self.is_connected():
+                return pd.DataFrame()
+            
+            try:
+                response = self.supabase.rpc('ranking_flutuantes_operadores', {
+                    'p_data_inicio': data_inicio,
+                    'p_data_fim': data_fim,
+                    'p_chaves_operadores': chaves_operadores or None,
+                    'p_data_recentes': data_recentes,
+                    'p_anterior_inicio': anterior_inicio,
+                    'p_anterior_fim': anterior_fim,
+                    'p_criterio': criterio
+                }).execute()
+                return pd.DataFrame(response.data or [])
+                
+            except Exception as e:
+                eventos.aviso(f"⚠️ Função ranking_flutuantes_operadores indisponível ({e}). Calculando localmente.")
+        
+        try:
+            # Baixar apenas as colunas necessárias (ou ler da réplica) e agregar localmente
+            colunas = 'operador_real,foi_encontrado,aging,data_recebimento'
+            df_periodo = self._carregar_colunas_flutuantes(colunas, data_inicio, data_fim)
+            df_anterior = pd.DataFrame()
+            if anterior_inicio:
+                df_anterior = self._carregar_colunas_flutuantes(colunas, anterior_inicio, anterior_fim)
+            
+            return self._calcular_ranking_flutuantes(df_periodo, df_anterior, chaves_operadores, data_recentes,
+                                                     anterior_inicio is not None, criterio)
+        except Exception as e2:
+            eventos.erro(f"❌ Erro ao obter ranking de operadores: {e2}")
+            return pd.DataFrame()
+
+    @leitura_em_cache('pacotes_flutuantes')
+    def obter_flutuantes_por_data_operador(self, data_inicio: str = None, data_fim: str = None,
+                                           chaves_operadores: list = None) -> pd.DataFrame:
+        """
+        Obtém contagem de flutuantes por data de recebimento e operador agregada no banco (RPC).
+        Com a réplica local, agrega localmente sobre ela.
+        """
+        df = None
+        if self._replica_para('pacotes_flutuantes') is None:
+            if not self.is_connected():
+                return pd.DataFrame()
+            
+            try:
+                # Uma linha por dia e operador: períodos longos passam do max_rows do PostgREST
+                parametros = {
+                    'p_data_inicio': data_inicio,
+                    'p_data_fim': data_fim,
+                    'p_chaves_operadores': chaves_operadores or None
+                }
+                df = pd.DataFrame(self._buscar_em_paginas(
+                    lambda: self.supabase.rpc('flutuantes_por_data_operador', parametros)))
+                
+            except Exception as e:
+                eventos.aviso(f"⚠️ Função flutuantes_por_data_operador indisponível ({e}). Calculando localmente.")
+        
+        if df is None:
+            try:
+                df = self._carregar_colunas_flutuantes('operador_real,foi_encontrado,data_recebimento', data_inicio, data_fim)
+                if not df.empty:
+                    df['chave_operador'] = self._chave_operador(df['operador_real'])
+                    if chaves_operadores:
+                        df = df[df['chave_operador'].isin(chaves_operadores)]
+                    df = df.groupby(['data_recebimento', 'chave_operador']).agg(
+                        operador_real=('operador_real', lambda x: x.mode().iloc[0]),
+                        total_flutuantes=('operador_real', 'size'),
+                        flutuantes_encontrados=('foi_encontrado', lambda x: (x == True).sum())
+                    ).reset_index().sort_values('data_recebimento', ascending=False)
+            except Exception as e2:
+                eventos.erro(f"❌ Erro ao obter flutuantes por data: {e2}")
+                return pd.DataFrame()
+        
+        if not df.empty:
+            df['data_recebimento'] = pd.to_datetime(df['data_recebimento'])
+        return df
+
+    def _carregar_colunas_flutuantes(self, colunas: str, data_inicio: str = None, data_fim: str = None) -> pd.DataFrame:
+        """Carrega apenas as colunas informadas de pacotes_flutuantes no intervalo de datas"""
+        replica = self._replica_para('pacotes_flutuantes')
+        if replica is not None:
+            return replica.selecionar('pacotes_flutuantes', colunas, filtros=[
+                ('data_recebimento', '>=', data_inicio),
+                ('data_recebimento', '<=', data_fim),
+                ('operador_real', '<>', '')
+            ], ordem='id')
+        
+        def montar_consulta():
+            query = self.supabase.table('pacotes_flutuantes').select(colunas)
+            if data_inicio:
+                query = query.gte('data_recebimento', data_inicio)
+            if data_fim:
+                query = query.lte('data_recebimento', data_fim)
+            return query.order('id')
+        
+        df = self.carregar_paginado(montar_consulta)
+        if not df.empty:
+            df = df[df['operador_real'].notna() & (df['operador_real'] != '')]
+        return df
+
+    @staticmethod
+    def _chave_operador(operadores: pd.Series) -> pd.Series:
+        """Código [opsXXXX] em minúsculas ou o próprio nome (mesma regra da função SQL chave_operador)"""
+        return operadores.str.strip().str.extract(r'^\[([^\]]+)\]')[0].str.lower().fillna(operadores)
+
+    def _calcular_ranking_flutuantes(self, df_periodo: pd.DataFrame, df_anterior: pd.DataFrame, chaves_operadores: list,
+                                     data_recentes: str, comparar_anterior: bool, criterio: str) -> pd.DataFrame:
+        """Equivalente local da RPC ranking_flutuantes_operadores"""
+        if df_periodo.empty:
+            return pd.DataFrame()
+        
+        df_periodo = df_periodo.assign(chave_operador=self._chave_operador(df_periodo['operador_real']))
+        if chaves_operadores:
+            df_periodo = df_periodo[df_periodo['chave_operador'].isin(chaves_operadores)]
+        
+        data_recebimento = df_periodo['data_recebimento'].astype(str)
+        ranking = df_periodo.assign(
+            encontrado=(df_periodo['foi_encontrado'] == True).astype(int),
+            recente=(data_recebimento >= data_recentes).astype(int) if data_recentes else 0
+        ).groupby('chave_operador').agg(
+            operador_real=('operador_real', lambda x: x.mode().iloc[0]),
+            total_flutuantes=('operador_real', 'size'),
+            flutuantes_encontrados=('encontrado', 'sum'),
+            aging_medio=('aging', 'mean'),
+            primeira_data=('data_recebimento', 'min'),
+            ultima_data=('data_recebimento', 'max'),
+            flutuantes_recentes=('recente', 'sum')
+        ).reset_index()
+        
+        ranking['flutuantes_nao_encontrados'] = ranking['total_flutuantes'] - ranking['flutuantes_encontrados']
+        ranking['taxa_encontrados'] = (ranking['flutuantes_encontrados'] / ranking['total_flutuantes'] * 100).round(2)
+        
+        if not df_anterior.empty:
+            anterior = df_anterior.assign(chave_operador=self._chave_operador(df_anterior['operador_real'])) \
+                .groupby('chave_operador').size().rename('flutuantes_anterior')
+            ranking = ranking.merge(anterior, on='chave_operador', how='left')
+        else:
+            ranking['flutuantes_anterior'] = 0
+        ranking['flutuantes_anterior'] = ranking['flutuantes_anterior'].fillna(0).astype(int)
+        
+        if comparar_anterior:
+            ranking['tendencia'] = ranking['total_flutuantes'] - ranking['flutuantes_anterior']
+            ranking['tendencia_percentual'] = np.where(
+                ranking['flutuantes_anterior'] > 0,
+                (ranking['tendencia'] / ranking['flutuantes_anterior'].where(ranking['flutuantes_anterior'] > 0) * 100).round(1),
+                0
+            )
+        else:
+            ranking['tendencia'] = 0
+            ranking['tendencia_percentual'] = 0
+        
+        coluna, ascendente = self.CRITERIOS_RANKING_FLUTUANTES.get(criterio, self.CRITERIOS_RANKING_FLUTUANTES['total'])
+        return ranking.sort_values([coluna, 'total_flutuantes'], ascending=[ascendente, False]).reset_index(drop=True)
+
+    # ============================================================================
+    # REGISTRO DE IMPORTAÇÕES (um por tipo de CSV e hash do conteúdo)
+    # ============================================================================
+
+    def buscar_importacao(self, tipo: str, hash_conteudo: str) -> Optional[Dict]:
+        """Importação já registrada de um arquivo com este conteúdo para o tipo, ou None"""
+        if not self.is_connected():
+            return None
+
+        try:
+            response = self.supabase.table('importacoes_arquivos').select('*') \
+                .eq('tipo', tipo).eq('hash_conteudo', hash_conteudo).limit(1).execute()
+            return response.data[0] if response.data else None
+
+        except Exception as e:
+            eventos.aviso(f"⚠️ Registro de importações indisponível ({e}). O arquivo será processado.")
+            return None
+
+    def registrar_importacao(self, registro: Dict) -> bool:
+        """Registra (ou atualiza, se o conteúdo for reimportado) a importação de um arquivo"""
+        if not self.is_connected():
+            return False
+
+        try:
+            self.supabase.table('importacoes_arquivos').upsert(
+                self._converter_tipos_python(registro), on_conflict='tipo,hash_conteudo'
+            ).execute()
+            return True
+
+        except Exception as e:
+            eventos.aviso(f"⚠️ Não foi possível registrar a importação de {registro.get('arquivo')}: {e}")
+            return False
+
     # ============================================================================
     # FUNÇÕES PARA EXPEDIÇÃO CONSOLIDADO
     # ============================================================================
 
-    def salvar_expedicao_consolidado(self, dados_ondas: List[Dict], dados_operadores: List[Dict], arquivo_origem: str) -> bool:
-        """Salva dados consolidados de expedição no banco"""
+    # Chaves naturais das tabelas de expedição (mesmas das constraints UNIQUE do schema)
+    CHAVE_EXPEDICAO_ONDAS = SINCRONIZACAO['chaves_naturais']['expedicao_consolidado']
+    CHAVE_EXPEDICAO_OPERADORES = SINCRONIZACAO['chaves_naturais']['expedicao_operadores_historico']
+
+    @escrita_invalida_cache('expedicao_consolidado', 'expedicao_operadores_historico')
+    def salvar_expedicao_consolidado(self, dados_ondas: List[Dict], dados_operadores: List[Dict], arquivo_origem: str,
+                                     incremental: bool = True, tamanho_lote: int = None) -> bool:
+        """
+        Salva dados consolidados de expedição no banco com upsert em lotes pelas chaves naturais.
+        No modo incremental envia apenas as linhas novas ou alteradas das datas do arquivo.
+        """
         if not self.is_connected():
-            st.warning("⚠️ Supabase não conectado - salvando apenas localmente")
+            eventos.aviso("⚠️ Supabase não conectado - salvando apenas localmente")
             return False
         
         try:
-            st.info(f"🔄 Salvando dados consolidados de expedição...")
-            st.info(f"  - Ondas: {len(dados_ondas)}")
-            st.info(f"  - Operadores: {len(dados_operadores)}")
-            
-            # Salvar dados das ondas
-            if dados_ondas:
-                st.info("📊 Salvando dados das ondas...")
-                for i, onda in enumerate(dados_ondas):
-                    st.info(f"  Inserindo onda {i+1}/{len(dados_ondas)}: {onda.get('data_operacao', 'N/A')} - Onda {onda.get('numero_onda', 'N/A')}")
-                    
-                    # Converter tipos antes de inserir no Supabase
-                    onda_convertida = self._converter_tipos_python(onda)
-                    
-                    # Inserir no Supabase
-                    response = self.supabase.table('expedicao_consolidado').insert(onda_convertida).execute()
-                    
-                    if not response.data:
-                        st.error(f"❌ Falha ao inserir onda {i+1}")
-                        return False
+            tamanho_lote = tamanho_lote or SUPABASE['lote_insercao']
+            eventos.info(f"🔄 Salvando dados consolidados de expedição...")
+            eventos.info(f"  - Ondas: {len(dados_ondas)}")
+            eventos.info(f"  - Operadores: {len(dados_operadores)}")
+            
+            falhas = []
+            tabelas = [
+                ('expedicao_consolidado', dados_ondas, self.CHAVE_EXPEDICAO_ONDAS),
+                ('expedicao_operadores_historico', dados_operadores, self.CHAVE_EXPEDICAO_OPERADORES)
+            ]
+            
+            for tabela, dados, chave in tabelas:
+                if not dados:
+                    continue
+                
+                # Converter tipos antes de enviar ao Supabase
+                registros = self._converter_tipos_python(dados)
+                
+                if incremental:
+                    total = len(registros)
+                    registros = self._filtrar_alterados_por_data(tabela, registros, chave)
+                    eventos.info(f"📊 {tabela}: {len(registros)} de {total} linhas novas ou alteradas")
+                
+                falhas_tabela = self._gravar_em_lotes(tabela, registros, tamanho_lote, on_conflict=','.join(chave))
+                falhas.extend({**falha, 'tabela': tabela} for falha in falhas_tabela)
             
-            # Salvar dados dos operadores
-            if dados_operadores:
-                st.info("👥 Salvando dados dos operadores...")
-                for i, operador in enumerate(dados_operadores):
-                    st.info(f"  Inserindo operador {i+1}/{len(dados_operadores)}: {operador.get('operador', 'N/A')}")
-                    
-                    # Converter tipos antes de inserir no Supabase
-                    operador_convertido = self._converter_tipos_python(operador)
-                    
-                    # Inserir no Supabase
-                    response = self.supabase.table('expedicao_operadores_historico').insert(operador_convertido).execute()
-                    
-                    if not response.data:
-                        st.error(f"❌ Falha ao inserir operador {i+1}")
-                        return False
+            if falhas:
+                for falha in falhas:
+                    eventos.erro(f"❌ {falha['tabela']}: falha no lote {falha['lote']} ({falha['registros']} registros): {falha['erro']}")
+                return False
             
-            st.success(f"✅ Dados consolidados salvos com sucesso no Supabase!")
+            eventos.sucesso(f"✅ Dados consolidados salvos com sucesso no Supabase!")
             return True
             
         except Exception as e:
-            st.error(f"❌ Erro ao salvar dados consolidados: {e}")
+            eventos.erro(f"❌ Erro ao salvar dados consolidados: {e}")
             return False
 
-    def carregar_expedicao_consolidado(self, data_inicio: str = None, data_fim: str = None, limit: int = 1000) -> pd.DataFrame:
-        """Carrega dados consolidados de expedição"""
+    def _filtrar_alterados_por_data(self, tabela: str, registros: List[Dict], chave: tuple) -> List[Dict]:
+        """Consulta apenas as datas presentes nos registros e retorna os que são novos ou diferentes do banco"""
+        campos = [c for c in registros[0].keys() if c not in self.CAMPOS_CONTROLE]
+        datas = sorted({r['data_operacao'] for r in registros})
+        
+        existentes = self._buscar_em_paginas(
+            lambda: self.supabase.table(tabela).select(','.join(campos)).in_('data_operacao', datas).order('id')
+        )
+        por_chave = {tuple(self._valor_comparavel(r.get(c)) for c in chave): r for r in existentes}
+        
+        alterados = []
+        for registro in registros:
+            atual = por_chave.get(tuple(self._valor_comparavel(registro.get(c)) for c in chave))
+            if atual is None or self._registro_alterado(registro, atual, campos):
+                alterados.append(registro)
+        return alterados
+
+    @leitura_em_cache('expedicao_consolidado', 'expedicao_operadores_historico')
+    def carregar_expedicao_consolidado(self, data_inicio: str = None, data_fim: str = None, limit: Optional[int] = None, em_blocos: bool = False,
+                                       colunas: List[str] = None):
+        """
+        Carrega dados consolidados de expedição seguindo todas as páginas
+        (limit=None carrega tudo; colunas restringe os campos baixados, None traz todos)
+        """
+        replica = self._replica_para('expedicao_consolidado')
+        if replica is not None:
+            df = replica.selecionar('expedicao_consolidado', self._projecao(colunas), filtros=[
+                ('data_operacao', '>=', data_inicio or None),
+                ('data_operacao', '<=', data_fim or None)
+            ], ordem='data_operacao DESC, id DESC', limit=limit)
+            return self._servir_da_replica(df, em_blocos)
+        
         if not self.is_connected():
-            return pd.DataFrame()
+            return iter(()) if em_blocos else pd.DataFrame()
         
-        try:
-            query = self.supabase.table('expedicao_consolidado').select('*')
+        def montar_consulta():
+            query = self.supabase.table('expedicao_consolidado').select(self._projecao(colunas))
             
             if data_inicio:
                 query = query.gte('data_operacao', data_inicio)
             if data_fim:
                 query = query.lte('data_operacao', data_fim)
             
-            response = query.order('data_operacao', desc=True).limit(limit).execute()
-            
-            if response.data:
-                return pd.DataFrame(response.data)
-            else:
-                return pd.DataFrame()
+            return query.order('data_operacao', desc=True).order('id', desc=True)
+        
+        try:
+            return self.carregar_paginado(montar_consulta, limit=limit, em_blocos=em_blocos)
                 
         except Exception as e:
-            st.error(f"❌ Erro ao carregar dados consolidados: {e}")
+            eventos.erro(f"❌ Erro ao carregar dados consolidados: {e}")
             return pd.DataFrame()
 
-    def carregar_historico_operadores_expedicao(self, data_inicio: str = None, data_fim: str = None, limit: int = 1000) -> pd.DataFrame:
-        """Carrega histórico de operadores na expedição"""
+    @leitura_em_cache('expedicao_consolidado', 'expedicao_operadores_historico')
+    def carregar_historico_operadores_expedicao(self, data_inicio: str = None, data_fim: str = None, limit: Optional[int] = None, em_blocos: bool = False,
+                                                colunas: List[str] = None):
+        """
+        Carrega histórico de operadores na expedição seguindo todas as páginas
+        (limit=None carrega tudo; colunas restringe os campos baixados, None traz todos)
+        """
+        replica = self._replica_para('expedicao_operadores_historico')
+        if replica is not None:
+            df = replica.selecionar('expedicao_operadores_historico', self._projecao(colunas), filtros=[
+                ('data_operacao', '>=', data_inicio or None),
+                ('data_operacao', '<=', data_fim or None)
+            ], ordem='data_operacao DESC, id DESC', limit=limit)
+            return self._servir_da_replica(df, em_blocos)
+        
         if not self.is_connected():
-            return pd.DataFrame()
+            return iter(()) if em_blocos else pd.DataFrame()
         
-        try:
-            query = self.supabase.table('expedicao_operadores_historico').select('*')
+        def montar_consulta():
+            query = self.supabase.table('expedicao_operadores_historico').select(self._projecao(colunas))
             
             if data_inicio:
                 query = query.gte('data_operacao', data_inicio)
             if data_fim:
                 query = query.lte('data_operacao', data_fim)
             
-            response = query.order('data_operacao', desc=True).limit(limit).execute()
-            
-            if response.data:
-                return pd.DataFrame(response.data)
-            else:
-                return pd.DataFrame()
+            return query.order('data_operacao', desc=True).order('id', desc=True)
+        
+        try:
+            return self.carregar_paginado(montar_consulta, limit=limit, em_blocos=em_blocos)
                 
         except Exception as e:
-            st.error(f"❌ Erro ao carregar histórico de operadores: {e}")
+            eventos.erro(f"❌ Erro ao carregar histórico de operadores: {e}")
             return pd.DataFrame()
 
+    @leitura_em_cache('expedicao_consolidado', 'expedicao_operadores_historico')
     def obter_resumo_expedicao_diario(self, data_inicio: str = None, data_fim: str = None) -> pd.DataFrame:
         """Obtém resumo diário de expedição usando a view"""
+        replica = self._replica_para('expedicao_consolidado', 'expedicao_operadores_historico')
+        if replica is not None and 'resumo_expedicao_diario' in replica.views:
+            return replica.selecionar('resumo_expedicao_diario', filtros=[('data_operacao', '>=', data_inicio or None), ('data_operacao', '<=', data_fim or None)], ordem='data_operacao DESC')
+        
         if not self.is_connected():
             return pd.DataFrame()
         
@@ -779,11 +1451,16 @@ class DatabaseManager:
                 return pd.DataFrame()
                 
         except Exception as e:
-            st.error(f"❌ Erro ao obter resumo diário: {e}")
+            eventos.erro(f"❌ Erro ao obter resumo diário: {e}")
             return pd.DataFrame()
 
+    @leitura_em_cache('expedicao_consolidado', 'expedicao_operadores_historico')
     def obter_ranking_expedicao_operadores(self) -> pd.DataFrame:
         """Obtém ranking de operadores na expedição usando a view"""
+        replica = self._replica_para('expedicao_consolidado', 'expedicao_operadores_historico')
+        if replica is not None and 'ranking_expedicao_operadores' in replica.views:
+            return replica.selecionar('ranking_expedicao_operadores', ordem='eficiencia_media DESC, total_at_to_carreira DESC')
+        
         if not self.is_connected():
             return pd.DataFrame()
         
@@ -796,11 +1473,16 @@ class DatabaseManager:
                 return pd.DataFrame()
                 
         except Exception as e:
-            st.error(f"❌ Erro ao obter ranking de operadores: {e}")
+            eventos.erro(f"❌ Erro ao obter ranking de operadores: {e}")
             return pd.DataFrame()
 
+    @leitura_em_cache('expedicao_consolidado', 'expedicao_operadores_historico')
     def obter_resumo_expedicao_semanal(self, ano: int = None) -> pd.DataFrame:
         """Obtém resumo semanal de expedição usando a view"""
+        replica = self._replica_para('expedicao_consolidado', 'expedicao_operadores_historico')
+        if replica is not None and 'resumo_expedicao_semanal' in replica.views:
+            return replica.selecionar('resumo_expedicao_semanal', filtros=[('ano', '=', ano or None)], ordem='ano DESC, semana_ano DESC')
+        
         if not self.is_connected():
             return pd.DataFrame()
         
@@ -818,11 +1500,16 @@ class DatabaseManager:
                 return pd.DataFrame()
                 
         except Exception as e:
-            st.error(f"❌ Erro ao obter resumo semanal: {e}")
+            eventos.erro(f"❌ Erro ao obter resumo semanal: {e}")
             return pd.DataFrame()
 
+    @leitura_em_cache('expedicao_consolidado', 'expedicao_operadores_historico')
     def obter_resumo_expedicao_mensal(self, ano: int = None) -> pd.DataFrame:
         """Obtém resumo mensal de expedição usando a view"""
+        replica = self._replica_para('expedicao_consolidado', 'expedicao_operadores_historico')
+        if replica is not None and 'resumo_expedicao_mensal' in replica.views:
+            return replica.selecionar('resumo_expedicao_mensal', filtros=[('ano', '=', ano or None)], ordem='ano DESC, mes DESC')
+        
         if not self.is_connected():
             return pd.DataFrame()
         
@@ -840,7 +1527,7 @@ class DatabaseManager:
                 return pd.DataFrame()
                 
         except Exception as e:
-            st.error(f"❌ Erro ao obter resumo mensal: {e}")
+            eventos.erro(f"❌ Erro ao obter resumo mensal: {e}")
             return pd.DataFrame()
 
     def _converter_tipos_python(self, dados):
@@ -865,23 +1552,38 @@ class DatabaseManager:
         else:
             return str(dados)
 
+    @leitura_em_cache('expedicao_consolidado', 'expedicao_operadores_historico')
     def obter_estatisticas_expedicao_consolidado(self) -> Dict:
         """Obtém estatísticas gerais da expedição consolidado"""
+        replica = self._replica_para('expedicao_consolidado', 'expedicao_operadores_historico')
+        if replica is not None:
+            contagens = replica.consultar("""
+                SELECT (SELECT COUNT(*) FROM expedicao_consolidado) AS total_ondas,
+                       (SELECT COUNT(*) FROM expedicao_operadores_historico) AS total_operadores,
+                       (SELECT COUNT(DISTINCT data_operacao) FROM expedicao_consolidado) AS datas_unicas
+            """).iloc[0]
+            return {chave: int(valor) for chave, valor in contagens.items()}
+        
         if not self.is_connected():
             return {}
         
         try:
-            # Total de registros
-            response_total = self.supabase.table('expedicao_consolidado').select('*', count='exact').execute()
-            total_ondas = response_total.count if hasattr(response_total, 'count') else 0
-            
-            # Total de operadores
-            response_operadores = self.supabase.table('expedicao_operadores_historico').select('*', count='exact').execute()
-            total_operadores = response_operadores.count if hasattr(response_operadores, 'count') else 0
+            # Contagens e datas distintas calculadas no banco: uma linha na resposta
+            response = self.supabase.rpc('estatisticas_expedicao_consolidado', {}).execute()
+            if response.data:
+                return {chave: int(valor or 0) for chave, valor in response.data[0].items()}
+        except Exception as e:
+            eventos.aviso(f"⚠️ Função estatisticas_expedicao_consolidado indisponível ({e}). Calculando localmente.")
+        
+        try:
+            total_ondas = self._contar('expedicao_consolidado')
+            total_operadores = self._contar('expedicao_operadores_historico')
             
-            # Datas disponíveis
-            response_datas = self.supabase.table('expedicao_consolidado').select('data_operacao').execute()
-            datas_unicas = len(set([r['data_operacao'] for r in response_datas.data])) if response_datas.data else 0
+            # Datas distintas: apenas a coluna data_operacao, seguindo todas as páginas
+            datas = self._buscar_em_paginas(
+                lambda: self.supabase.table('expedicao_consolidado').select('data_operacao').order('data_operacao').order('id')
+            )
+            datas_unicas = len({r['data_operacao'] for r in datas})
             
             return {
                 'total_ondas': total_ondas,
@@ -890,7 +1592,7 @@ class DatabaseManager:
             }
             
         except Exception as e:
-            st.error(f"❌ Erro ao obter estatísticas: {e}")
+            eventos.erro(f"❌ Erro ao obter estatísticas: {e}")
             return {}
 
 # Instância global do gerenciador de banco
@@ -0,0 +1,113 @@
+"""
+Eventos de progresso e status do núcleo do dashboard (database.py e utils.py)
+
+O núcleo não depende do Streamlit: cada mensagem vira um evento entregue aos
+consumidores registrados. O app registra o consumidor do Streamlit
+(notificacoes.consumidor_streamlit); jobs em lote, workers e benchmarks podem
+registrar o próprio consumidor ou ficar com o padrão, que escreve no logging.
+
+Um evento é um dicionário com:
+    tipo        'info', 'success', 'warning', 'error', 'codigo', 'tabela',
+                'progresso' ou 'progresso_fim'
+    mensagem    texto já formatado (com o emoji do tipo, como no restante do app)
+    transitorio True para status passageiro (exibido como toast no app)
+    chave       identificador da barra de status nos eventos de progresso
+    dados       DataFrame dos eventos 'tabela'
+"""
+
+import logging
+import threading
+import uuid
+
+logger = logging.getLogger('dashboard')
+
+NIVEIS_LOG = {
+    'info': logging.INFO,
+    'success': logging.INFO,
+    'warning': logging.WARNING,
+    'error': logging.ERROR,
+    'codigo': logging.DEBUG,
+    'tabela': logging.INFO,
+    'progresso': logging.INFO,
+    'progresso_fim': logging.DEBUG
+}
+
+_consumidores = []
+_lock = threading.Lock()
+
+def consumidor_logging(evento: dict):
+    """Consumidor padrão: escreve o evento no logger 'dashboard'"""
+    mensagem = evento.get('mensagem', '')
+    if evento['tipo'] == 'tabela':
+        mensagem = evento['dados'].to_string()
+    if mensagem:
+        logger.log(NIVEIS_LOG.get(evento['tipo'], logging.INFO), mensagem)
+
+def registrar_consumidor(consumidor):
+    """Passa a entregar os eventos ao consumidor (registrar de novo não duplica)"""
+    with _lock:
+        if consumidor not in _consumidores:
+            _consumidores.append(consumidor)
+
+def remover_consumidor(consumidor):
+    """Deixa de entregar os eventos ao consumidor"""
+    with _lock:
+        if consumidor in _consumidores:
+            _consumidores.remove(consumidor)
+
+def emitir(mensagem: str, tipo: str = 'info', **extras):
+    """Entrega um evento a todos os consumidores (ou ao logging, se não houver nenhum)"""
+    evento = {'tipo': tipo, 'mensagem': mensagem, 'transitorio': False}
+    evento.update(extras)
+
+    with _lock:
+        consumidores = list(_consumidores) or [consumidor_logging]
+
+    for consumidor in consumidores:
+        try:
+            consumidor(evento)
+        except Exception:
+            # Falha na exibição nunca deve interromper a importação ou a consulta
+            logger.exception("Erro no consumidor de eventos")
+
+def info(mensagem: str):
+    emitir(mensagem, 'info')
+
+def sucesso(mensagem: str):
+    emitir(mensagem, 'success')
+
+def aviso(mensagem: str):
+    emitir(mensagem, 'warning')
+
+def erro(mensagem: str):
+    emitir(mensagem, 'error')
+
+def codigo(texto: str):
+    """Bloco de texto literal, como stack traces"""
+    emitir(texto, 'codigo')
+
+def tabela(dados):
+    """Tabela (DataFrame) para o usuário conferir, como relatórios de linhas inválidas"""
+    emitir('', 'tabela', dados=dados)
+
+def notificar(mensagem: str, tipo: str = 'info'):
+    """Status passageiro, que não deve ocupar espaço na página"""
+    emitir(mensagem, tipo, transitorio=True)
+
+class Progresso:
+    """
+    Barra de status de uma operação longa, atualizada no mesmo lugar a cada etapa
+
+        progresso = eventos.Progresso()
+        progresso.atualizar("📥 Bloco 2: 100000 linhas lidas...")
+        progresso.encerrar()
+    """
+
+    def __init__(self):
+        self.chave = uuid.uuid4().hex
+
+    def atualizar(self, mensagem: str):
+        emitir(mensagem, 'progresso', chave=self.chave)
+
+    def encerrar(self):
+        emitir('', 'progresso_fim', chave=self.chave)
@@ -0,0 +1,511 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Planos de execução (EXPLAIN ANALYZE) das consultas do DatabaseManager num Postgres local
+
+Cria o setup_database.sql num schema isolado, preenche as tabelas com dados
+sintéticos e chama os métodos de leitura do DatabaseManager com um cliente que
+traduz as chamadas do supabase-py (select/eq/in_/gte/order/range/rpc...) para o
+SQL que o PostgREST executaria. Cada consulta é executada com EXPLAIN ANALYZE e
+o relatório mostra o tempo e como cada tabela foi lida. O código de saída é 1 se
+alguma consulta falhar ou varrer inteira (Seq Scan) uma tabela base grande
+(pacotes_flutuantes, dados_validacao, expedicao_*), o que indica índice faltando
+ou uma view voltando a agregar o histórico em vez dos resumos diários.
+
+Nunca acessa o Supabase: requer um Postgres local e o pacote psycopg2
+(pip install -r requirements-dev.txt).
+
+Exemplos:
+    python explicar_consultas.py --dsn postgresql://postgres@localhost:5432/postgres
+    python explicar_consultas.py --linhas 500000 --detalhado
+    python explicar_consultas.py --reusar   # mantém os dados sintéticos da execução anterior
+"""
+
+import argparse
+import decimal
+import logging
+import os
+import sys
+import tempfile
+import time
+import types
+from datetime import date, datetime, timedelta
+
+try:
+    import psycopg2
+    import psycopg2.extras
+    PSYCOPG2_AVAILABLE = True
+except ImportError:
+    PSYCOPG2_AVAILABLE = False
+
+# Nunca conectar ao Supabase do .env: o DatabaseManager usa o cliente local abaixo
+os.environ['SUPABASE_URL'] = ''
+os.environ['SUPABASE_KEY'] = ''
+# Sem o aviso de Supabase não configurado da instância global criada ao importar o database
+logging.getLogger('dashboard').setLevel(logging.ERROR)
+
+import eventos
+from config import SUPABASE, COLUNAS_CONSULTA
+from database import DatabaseManager
+from replica_local import ReplicaLocal, DUCKDB_AVAILABLE, ler_schema_sql
+
+SCHEMA_TESTE = 'analise_consultas'
+
+# Tabelas base que não podem ser varridas inteiras pelas consultas do dashboard
+TABELAS_BASE = ('pacotes_flutuantes', 'dados_validacao', 'expedicao_consolidado', 'expedicao_operadores_historico')
+
+OPERADORES_POSTGREST = {'eq': '=', 'neq': '<>', 'gt': '>', 'gte': '>=', 'lt': '<', 'lte': '<='}
+
+SQL_DADOS_SINTETICOS = """
+INSERT INTO pacotes_flutuantes (estacao, semana, data_recebimento, destino, aging, tracking_number, foi_expedido,
+                                operador, status_spx, status, foi_encontrado, descricao_item, operador_real,
+                                importado_em, arquivo_origem)
+SELECT
+    'Estação ' || (i %% 6),
+    'Semana ' || ((i / 5000) %% 52),
+    CURRENT_DATE - (i %% %(dias)s),
+    'Destino ' || (i %% 40),
+    i %% 30,
+    'BR' || LPAD(i::TEXT, 12, '0'),
+    i %% 3 = 0,
+    'Operador ' || (i %% 35),
+    'Status ' || (i %% 4),
+    'Status ' || (i %% 4),
+    i %% 4 <> 0,
+    'Item ' || (i %% 1000),
+    CASE WHEN i %% 50 = 0 THEN '' ELSE '[ops' || (i %% 30) || '] Operador ' || (i %% 30) END,
+    NOW() - (i %% %(dias)s) * INTERVAL '1 day' - (i %% 997) * INTERVAL '1 second',
+    'sintetico_' || (i / 10000) || '.csv'
+FROM generate_series(1, %(linhas)s) AS i;
+
+INSERT INTO dados_validacao ("AT/TO", "Corridor/Cage", "Total Initial Orders Inside AT/TO", "Total Final Orders Inside AT/TO",
+                             "Total Scanned Orders", "Missorted Orders", "Missing Orders", "Validation Start Time",
+                             "Validation End Time", "Validation Operator", "AT/TO Validation Status", "Data",
+                             "Tempo_Validacao_Min", "Erros_Sorting", "Taxa_Erro_Sorting", "Arquivo_Origem", importado_em)
+SELECT
+    'AT' || i,
+    'C' || (i %% 20),
+    20 + i %% 30,
+    20 + i %% 30,
+    20 + i %% 30,
+    i %% 3,
+    i %% 2,
+    NOW() - (i %% %(dias)s) * INTERVAL '1 day' - (i %% 997) * INTERVAL '1 second',
+    NOW() - (i %% %(dias)s) * INTERVAL '1 day',
+    'Operador ' || (i %% 25),
+    'Validated',
+    CURRENT_DATE - (i %% %(dias)s),
+    i %% 15,
+    i %% 3,
+    (i %% 3) * 2.5,
+    'sintetico_' || (i / 10000) || '.csv',
+    NOW() - (i %% %(dias)s) * INTERVAL '1 day'
+FROM generate_series(1, %(linhas)s / 4) AS i;
+
+INSERT INTO expedicao_consolidado (data_operacao, numero_onda, letra_onda, tempo_total_minutos, total_at_to, total_pacotes,
+                                   operadores_ativos, tempo_medio_por_at_to, tempo_medio_por_pacote, status_onda, arquivo_origem)
+SELECT
+    CURRENT_DATE - d,
+    onda,
+    CHR(64 + onda),
+    20 + (d * 7 + onda * 13) %% 60,
+    5 + onda %% 20,
+    100 + (d + onda) %% 400,
+    6,
+    2.5,
+    0.15,
+    CASE WHEN onda %% 25 = 0 THEN 'Cancelada' ELSE 'Finalizada' END,
+    'sintetico.csv'
+FROM generate_series(0, %(dias)s - 1) AS d, generate_series(1, 26) AS onda;
+
+INSERT INTO expedicao_operadores_historico (data_operacao, operador, numero_onda, total_at_to_expedidos,
+                                            total_pacotes_processados, tempo_total_trabalho_minutos, tempo_medio_por_at_to,
+                                            tempo_medio_por_pacote, eficiencia_operador, posicao_ranking, arquivo_origem)
+SELECT
+    CURRENT_DATE - d,
+    'Operador ' || ((onda + op) %% 25),
+    onda,
+    1 + (d + op) %% 8,
+    20 + (d * op + onda) %% 80,
+    30,
+    2.5,
+    0.15,
+    50 + (d + onda + op) %% 50,
+    op,
+    'sintetico.csv'
+FROM generate_series(0, %(dias)s - 1) AS d, generate_series(1, 26) AS onda, generate_series(1, 6) AS op;
+
+INSERT INTO dados_operacao (data, backlog, volume_veiculo, volume_diario, flutuantes, flutuantes_revertidos,
+                            erros_sorting, erros_etiquetagem)
+SELECT CURRENT_DATE - d, 1000 + d, 5000 + d, 20000 + d, 50 + d %% 20, d %% 10, d %% 7, d %% 5
+FROM generate_series(0, %(dias)s - 1) AS d;
+
+INSERT INTO flutuantes_operador (operador, flutuantes, data_operacao)
+SELECT 'Operador ' || op, (d + op) %% 15, CURRENT_DATE - d
+FROM generate_series(0, %(dias)s - 1) AS d, generate_series(1, 30) AS op;
+"""
+
+def _identificador(nome: str) -> str:
+    return '"' + nome.strip().strip('"').replace('"', '""') + '"'
+
+def _dividir_no_nivel_superior(texto: str) -> list:
+    """Divide 'a,and(b,c),d' pelas vírgulas fora de parênteses e aspas"""
+    partes, atual, nivel, aspas = [], '', 0, False
+    for caractere in texto:
+        if caractere == '"':
+            aspas = not aspas
+        elif not aspas and caractere == '(':
+            nivel += 1
+        elif not aspas and caractere == ')':
+            nivel -= 1
+        elif not aspas and nivel == 0 and caractere == ',':
+            partes.append(atual)
+            atual = ''
+            continue
+        atual += caractere
+    return partes + [atual] if atual else partes
+
+def _filtro_logico(expressao: str, parametros: list, juncao: str = 'OR') -> str:
+    """Traduz um filtro lógico do PostgREST (or_('a.gt.1,and(a.eq.1,id.gt.2)')) para SQL"""
+    condicoes = []
+    for parte in _dividir_no_nivel_superior(expressao):
+        for operador_logico in ('and', 'or'):
+            if parte.startswith(f'{operador_logico}('):
+                condicoes.append(_filtro_logico(parte[len(operador_logico) + 1:-1], parametros, operador_logico.upper()))
+                break
+        else:
+            coluna, operador, valor = parte.split('.', 2)
+            parametros.append(valor[1:-1] if valor.startswith('"') else valor)
+            condicoes.append(f'{_identificador(coluna)} {OPERADORES_POSTGREST[operador]} %s')
+    return '(' + f' {juncao} '.join(condicoes) + ')'
+
+class ConsultaSQL:
+    """Consulta montada com a mesma interface encadeada do supabase-py"""
+
+    def __init__(self, cliente, tabela: str):
+        self.cliente = cliente
+        self.tabela = tabela
+        self.colunas = '*'
+        self.contagem = False
+        self.cabecalho = False
+        self.filtros = []
+        self.parametros = []
+        self.ordem = []
+        self.limite = None
+        self.deslocamento = None
+
+    def select(self, *colunas, count: str = None, head: bool = False):
+        nomes = [nome for texto in colunas for nome in texto.split(',') if nome.strip()]
+        self.colunas = ', '.join('*' if nome.strip() == '*' else _identificador(nome) for nome in nomes) or '*'
+        self.contagem = count is not None
+        self.cabecalho = head
+        return self
+
+    def _comparar(self, coluna: str, operador: str, valor):
+        self.filtros.append(f'{_identificador(coluna)} {OPERADORES_POSTGREST[operador]} %s')
+        self.parametros.append(valor)
+        return self
+
+    def eq(self, coluna, valor):
+        return self._comparar(coluna, 'eq', valor)
+
+    def neq(self, coluna, valor):
+        return self._comparar(coluna, 'neq', valor)
+
+    def gt(self, coluna, valor):
+        return self._comparar(coluna, 'gt', valor)
+
+    def gte(self, coluna, valor):
+        return self._comparar(coluna, 'gte', valor)
+
+    def lt(self, coluna, valor):
+        return self._comparar(coluna, 'lt', valor)
+
+    def lte(self, coluna, valor):
+        return self._comparar(coluna, 'lte', valor)
+
+    def in_(self, coluna, valores):
+        self.filtros.append(f'{_identificador(coluna)} = ANY(%s)')
+        self.parametros.append(list(valores))
+        return self
+
+    def or_(self, expressao: str):
+        self.filtros.append(_filtro_logico(expressao, self.parametros))
+        return self
+
+    def order(self, coluna: str, desc: bool = False):
+        self.ordem.append(f"{_identificador(coluna)}{' DESC' if desc else ''}")
+        return self
+
+    def limit(self, quantidade: int):
+        self.limite = quantidade
+        return self
+
+    def range(self, inicio: int, fim: int):
+        self.deslocamento, self.limite = inicio, fim - inicio + 1
+        return self
+
+    def _onde(self) -> str:
+        return f" WHERE {' AND '.join(self.filtros)}" if self.filtros else ''
+
+    def execute(self):
+        sql = f"SELECT {self.colunas} FROM {_identificador(self.tabela)}{self._onde()}"
+        if self.ordem:
+            sql += f" ORDER BY {', '.join(self.ordem)}"
+        # Páginas da mesma consulta têm o mesmo plano: só a primeira é explicada
+        forma = sql
+        if self.limite is not None:
+            sql += f" LIMIT {int(self.limite)}"
+        if self.deslocamento:
+            sql += f" OFFSET {int(self.deslocamento)}"
+
+        contagem = None
+        if self.contagem:
+            # count='exact': o PostgREST conta as linhas filtradas numa consulta à parte
+            sql_contagem = f"SELECT COUNT(*) AS total FROM {_identificador(self.tabela)}{self._onde()}"
+            contagem = self.cliente.executar(sql_contagem, self.parametros, sql_contagem)[0]['total']
+        if self.cabecalho:
+            # head=True: requisição HEAD, apenas a contagem volta
+            return types.SimpleNamespace(data=[], count=contagem)
+        return types.SimpleNamespace(data=self.cliente.executar(sql, self.parametros, forma), count=contagem)
+
+    def insert(self, *args, **kwargs):
+        raise NotImplementedError("explicar_consultas analisa apenas as leituras")
+
+    upsert = update = delete = insert
+
+class ChamadaRPC:
+    def __init__(self, cliente, funcao: str, parametros: dict):
+        self.cliente = cliente
+        self.funcao = funcao
+        self.parametros = parametros or {}
+        self.limite = None
+        self.deslocamento = None
+
+    def range(self, inicio: int, fim: int):
+        self.deslocamento, self.limite = inicio, fim - inicio + 1
+        return self
+
+    def execute(self):
+        argumentos = ', '.join(f'{nome} => %s' for nome in self.parametros)
+        sql = forma = f"SELECT * FROM {_identificador(self.funcao)}({argumentos})"
+        if self.limite is not None:
+            sql += f" LIMIT {int(self.limite)}"
+        if self.deslocamento:
+            sql += f" OFFSET {int(self.deslocamento)}"
+        return types.SimpleNamespace(data=self.cliente.executar(sql, list(self.parametros.values()), forma), count=None)
+
+class ClienteSQL:
+    """
+    Substitui o cliente do Supabase: executa no Postgres local o SQL equivalente a cada
+    consulta e guarda o plano (EXPLAIN ANALYZE) de cada forma de consulta por rótulo
+    """
+
+    def __init__(self, conexao):
+        self.conexao = conexao
+        self.rotulo = None
+        self.planos = {}  # {rótulo: {forma da consulta: (sql, plano)}}
+
+    def table(self, tabela: str) -> ConsultaSQL:
+        return ConsultaSQL(self, tabela)
+
+    from_ = table
+
+    def rpc(self, funcao: str, parametros: dict = None) -> ChamadaRPC:
+        return ChamadaRPC(self, funcao, parametros)
+
+    @staticmethod
+    def _valor_json(valor):
+        """Valores como o PostgREST entrega no JSON (datas em texto ISO, numéricos em float)"""
+        if isinstance(valor, (datetime, date)):
+            return valor.isoformat()
+        if isinstance(valor, decimal.Decimal):
+            return float(valor)
+        return valor
+
+    def executar(self, sql: str, parametros: list, forma: str) -> list:
+        with self.conexao.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cursor:
+            planos = self.planos.setdefault(self.rotulo, {})
+            if forma not in planos:
+                cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}", parametros)
+                planos[forma] = (cursor.mogrify(sql, parametros).decode(), cursor.fetchone()['QUERY PLAN'][0])
+            cursor.execute(sql, parametros)
+            linhas = cursor.fetchall()
+        return [{coluna: self._valor_json(valor) for coluna, valor in linha.items()} for linha in linhas]
+
+def _leituras(no: dict) -> list:
+    """Nós do plano que leem tabelas: [(tipo do nó, tabela, índice)]"""
+    leituras = []
+    if 'Relation Name' in no:
+        indice = no.get('Index Name')
+        if no['Node Type'] == 'Bitmap Heap Scan':
+            # O índice usado fica nos nós Bitmap Index Scan abaixo
+            indice = ', '.join(filho['Index Name'] for filho in no.get('Plans', []) if 'Index Name' in filho) or None
+        leituras.append((no['Node Type'], no['Relation Name'], indice))
+    for filho in no.get('Plans', []):
+        leituras.extend(_leituras(filho))
+    return leituras
+
+def _chama_funcao(no: dict) -> bool:
+    """Indica se o plano chama uma função (RPC), cujas leituras internas o EXPLAIN não mostra"""
+    return no['Node Type'] == 'Function Scan' or any(_chama_funcao(filho) for filho in no.get('Plans', []))
+
+def preparar_banco(conexao, linhas: int, dias: int, reusar: bool):
+    """Cria o schema isolado com o setup_database.sql e os dados sintéticos"""
+    with conexao.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_namespace WHERE nspname = %s", [SCHEMA_TESTE])
+        if reusar and cursor.fetchone():
+            cursor.execute(f"SET search_path TO {SCHEMA_TESTE}, public")
+            return False
+
+        cursor.execute(f"DROP SCHEMA IF EXISTS {SCHEMA_TESTE} CASCADE")
+        cursor.execute(f"CREATE SCHEMA {SCHEMA_TESTE}")
+        cursor.execute(f"SET search_path TO {SCHEMA_TESTE}, public")
+        cursor.execute(ler_schema_sql())
+        cursor.execute(SQL_DADOS_SINTETICOS, {'linhas': linhas, 'dias': dias})
+        cursor.execute("ANALYZE")
+    return True
+
+def consultas_dashboard(db: DatabaseManager, replica: ReplicaLocal = None) -> list:
+    """
+    Leituras do DatabaseManager analisadas: (rótulo, chamada, varredura permitida).
+    Varredura permitida = a consulta lê a tabela inteira por natureza (contagens totais).
+    """
+    hoje = date.today()
+    inicio_mes = (hoje - timedelta(days=30)).isoformat()
+    inicio_semana = (hoje - timedelta(days=7)).isoformat()
+    anterior_inicio = (hoje - timedelta(days=61)).isoformat()
+    anterior_fim = (hoje - timedelta(days=31)).isoformat()
+    fim = hoje.isoformat()
+    operadores = ['[ops1] Operador 1', '[ops2] Operador 2', '[ops3] Operador 3']
+    limite = SUPABASE['tamanho_pagina']
+
+    lista = [
+        ('load_dados_operacao_alterados', lambda: db.load_dados_operacao_alterados(inicio_semana), False),
+        ('listar_datas_operacao', lambda: db.listar_datas_operacao(), False),
+        ('contar_registros(pacotes_flutuantes)', lambda: db.contar_registros('pacotes_flutuantes'), True),
+        ('get_estatisticas', lambda: db.get_estatisticas(), True),
+        ('load_dados_validacao(limit)', lambda: db.load_dados_validacao(limit=limite), False),
+        ('load_flutuantes_operador', lambda: db.load_flutuantes_operador(inicio_semana), False),
+        ('load_pacotes_flutuantes(limit)', lambda: db.load_pacotes_flutuantes(limit=limite), False),
+        ('load_pacotes_flutuantes_multiplos_operadores', lambda: db.load_pacotes_flutuantes_multiplos_operadores(
+            limite, operadores, inicio_mes, fim, colunas=COLUNAS_CONSULTA['detalhamento_flutuantes']), False),
+        ('listar_operadores_flutuantes', lambda: db.listar_operadores_flutuantes(), False),
+        ('get_total_flutuantes_por_data', lambda: db.get_total_flutuantes_por_data(inicio_semana), False),
+        ('get_ranking_operadores_flutuantes', lambda: db.get_ranking_operadores_flutuantes(), False),
+        ('get_resumo_flutuantes_estacao', lambda: db.get_resumo_flutuantes_estacao(), False),
+        ('obter_ranking_flutuantes_periodo', lambda: db.obter_ranking_flutuantes_periodo(
+            inicio_mes, fim, None, inicio_semana, anterior_inicio, anterior_fim), False),
+        ('obter_flutuantes_por_data_operador', lambda: db.obter_flutuantes_por_data_operador(inicio_mes, fim), False),
+        ('obter_flutuantes_por_data_operador(dia)', lambda: db.obter_flutuantes_por_data_operador(
+            inicio_semana, inicio_semana), False),
+        ('_carregar_colunas_flutuantes', lambda: db._carregar_colunas_flutuantes(
+            'operador_real,foi_encontrado,data_recebimento', inicio_semana, fim), False),
+        ('carregar_expedicao_consolidado', lambda: db.carregar_expedicao_consolidado(
+            inicio_mes, fim, colunas=COLUNAS_CONSULTA['analise_expedicao']), False),
+        ('carregar_historico_operadores_expedicao', lambda: db.carregar_historico_operadores_expedicao(inicio_mes, fim), False),
+        ('obter_resumo_expedicao_diario', lambda: db.obter_resumo_expedicao_diario(inicio_mes, fim), False),
+        ('obter_ranking_expedicao_operadores', lambda: db.obter_ranking_expedicao_operadores(), False),
+        ('obter_resumo_expedicao_semanal', lambda: db.obter_resumo_expedicao_semanal(hoje.year), False),
+        ('obter_resumo_expedicao_mensal', lambda: db.obter_resumo_expedicao_mensal(hoje.year), False),
+        ('obter_estatisticas_expedicao_consolidado', lambda: db.obter_estatisticas_expedicao_consolidado(), True),
+    ]
+
+    if replica is not None:
+        # Primeira sincronização (sem marca d'água, páginas por keyset) e a seguinte (releitura da margem)
+        lista.append(('ReplicaLocal.sincronizar (inicial)', lambda: replica.sincronizar(db.supabase), True))
+        lista.append(('ReplicaLocal.sincronizar (incremental)', lambda: replica.sincronizar(db.supabase), False))
+    return lista
+
+def main():
+    parser = argparse.ArgumentParser(description='EXPLAIN ANALYZE das consultas do DatabaseManager num Postgres local')
+    parser.add_argument('--dsn', default=os.getenv('POSTGRES_DSN', 'postgresql://postgres@localhost:5432/postgres'),
+                        help='Conexão do Postgres local (padrão: variável POSTGRES_DSN)')
+    parser.add_argument('--linhas', type=int, default=200000, help='Pacotes flutuantes sintéticos (validação: 1/4)')
+    parser.add_argument('--dias', type=int, default=365, help='Dias de histórico sintético')
+    parser.add_argument('--limite-varredura', type=int, default=10000,
+                        help='Linhas a partir das quais um Seq Scan numa tabela base é apontado')
+    parser.add_argument('--reusar', action='store_true', help=f'Reaproveita o schema {SCHEMA_TESTE} já preenchido')
+    parser.add_argument('--detalhado', action='store_true', help='Mostra o SQL de cada consulta')
+    args = parser.parse_args()
+
+    if not PSYCOPG2_AVAILABLE:
+        print("❌ Pacote psycopg2 não instalado (pip install psycopg2-binary)")
+        sys.exit(1)
+
+    # Mensagens do DatabaseManager: erros aparecem no relatório, o restante é silenciado
+    logging.basicConfig(level=logging.CRITICAL)
+    erros = []
+    eventos.registrar_consumidor(lambda evento: evento['tipo'] in ('error', 'warning') and erros.append(evento['mensagem']))
+
+    try:
+        conexao = psycopg2.connect(args.dsn)
+    except psycopg2.Error as e:
+        print(f"❌ Não foi possível conectar ao Postgres local: {e}")
+        sys.exit(1)
+    conexao.autocommit = True
+
+    inicio = time.perf_counter()
+    if preparar_banco(conexao, args.linhas, args.dias, args.reusar):
+        print(f"🧪 Schema {SCHEMA_TESTE} criado com {args.linhas} flutuantes sintéticos "
+              f"({time.perf_counter() - inicio:.1f}s)")
+
+    with conexao.cursor() as cursor:
+        cursor.execute("SELECT relname, reltuples FROM pg_class WHERE relname = ANY(%s) AND relnamespace = %s::regnamespace",
+                       [list(TABELAS_BASE), SCHEMA_TESTE])
+        tamanhos = dict(cursor.fetchall())
+
+    cliente = ClienteSQL(conexao)
+    db = DatabaseManager()
+    db.supabase, db.connected, db.replica = cliente, True, None
+
+    diretorio_replica = tempfile.TemporaryDirectory()
+    replica = None
+    if DUCKDB_AVAILABLE:
+        replica = ReplicaLocal(os.path.join(diretorio_replica.name, 'replica.duckdb'))
+
+    relatorio = []
+    for rotulo, chamada, varredura_permitida in consultas_dashboard(db, replica):
+        cliente.rotulo = rotulo
+        erros.clear()
+        try:
+            chamada()
+        except Exception as e:
+            erros.append(str(e))
+
+        planos = cliente.planos.get(rotulo, {})
+        problemas = list(erros) if erros or planos else ['nenhuma consulta executada']
+        leituras = []
+        tempo = 0.0
+        for sql, plano in planos.values():
+            tempo += plano['Execution Time']
+            nos = _leituras(plano['Plan'])
+            leituras.extend(nos)
+            if _chama_funcao(plano['Plan']):
+                leituras.append(('Function Scan', 'rpc', None))
+            for tipo, tabela, _ in nos:
+                if (tipo == 'Seq Scan' and tabela in TABELAS_BASE and not varredura_permitida
+                        and tamanhos.get(tabela, 0) >= args.limite_varredura):
+                    problemas.append(f'Seq Scan em {tabela} ({int(tamanhos[tabela])} linhas)')
+            if args.detalhado:
+                print(f"\n-- {rotulo} ({plano['Execution Time']:.1f} ms)\n{sql}")
+        relatorio.append((rotulo, tempo, leituras, problemas))
+
+    diretorio_replica.cleanup()
+
+    print(f"\n{'Consulta':<46} {'Tempo (ms)':>11}  Leituras")
+    for rotulo, tempo, leituras, problemas in relatorio:
+        descricao = ', '.join(sorted({f"{tipo} {tabela}" + (f" ({indice})" if indice else '')
+                                      for tipo, tabela, indice in leituras}))
+        print(f"{'❌' if problemas else '✅'} {rotulo[:44]:<44} {tempo:>11.1f}  {descricao}")
+        for problema in problemas:
+            print(f"     - {problema}")
+
+    falhas = [item for item in relatorio if item[3]]
+    if falhas:
+        print(f"\n❌ {len(falhas)} consulta(s) com problema")
+        sys.exit(1)
+    print(f"\n✅ {len(relatorio)} consultas sem varredura completa de tabelas base")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Importação de CSVs no Supabase pela linha de comando, sem sessão do navegador
+
+Lê os arquivos em paralelo com as mesmas funções das abas de upload do app e
+grava no banco em lotes (SUPABASE['lote_upsert'] / SUPABASE['lote_insercao']).
+No fim mostra a vazão (linhas/s) e as falhas de cada arquivo; o código de saída
+é 1 se algum arquivo falhar.
+
+Cada arquivo gravado fica no registro de importações (importacoes_arquivos) pelo
+hash do conteúdo: um arquivo idêntico a outro já importado é pulado sem ser lido
+(--reimportar força a leitura e a gravação).
+
+Exemplos:
+    python importar_csv.py flutuantes exports/flutuantes/
+    python importar_csv.py expedicao "exports/expedicao_*.csv" --arquivos-paralelos 8
+    python importar_csv.py dados_diarios dados.csv --simular
+"""
+
+import argparse
+import glob
+import logging
+import os
+import sys
+import time
+from contextlib import ExitStack
+
+import pandas as pd
+
+from config import DADOS
+import utils
+
+# Leitura de cada tipo (roda nas threads de trabalho): retorna (dados, linhas lidas)
+
+def ler_flutuantes(arquivo):
+    df = utils.ler_csv_flutuantes(arquivo)
+    if df.empty:
+        raise ValueError("nenhum dado válido encontrado após limpeza")
+    return df, len(df)
+
+def ler_validacao(arquivo):
+    df = utils.ler_csv_validacao(arquivo)
+    return df, len(df)
+
+def ler_dados_diarios(arquivo):
+    dados, erros, _ = utils.ler_csv_dados_diarios(arquivo)
+    if not dados:
+        raise ValueError("nenhum dado válido encontrado após processamento")
+    return dados, len(dados) + len({erro['linha'] for erro in erros})
+
+def ler_expedicao(arquivo):
+    colunas_faltantes = utils.verificar_colunas_csv(arquivo, utils.COLUNAS_CONSOLIDACAO_EXPEDICAO)
+    if colunas_faltantes:
+        raise ValueError(f"Colunas faltantes no CSV: {', '.join(colunas_faltantes)}")
+
+    df = pd.read_csv(arquivo, usecols=utils.COLUNAS_CONSOLIDACAO_EXPEDICAO)
+    dados_ondas, dados_operadores = utils.processar_csv_expedicao_consolidado(df, os.path.basename(arquivo.name))
+    if not dados_ondas:
+        raise ValueError("nenhuma onda consolidada (detalhes no log)")
+    return (dados_ondas, dados_operadores), len(df)
+
+# Datas cobertas por cada tipo, para o registro de importações
+
+def datas_flutuantes(df):
+    return pd.to_datetime(df['Data de Recebimento'], dayfirst=True, errors='coerce') if 'Data de Recebimento' in df.columns else []
+
+def datas_validacao(df):
+    return df['Data']
+
+def datas_expedicao(dados):
+    return [onda['data_operacao'] for onda in dados[0]]
+
+def registros_expedicao(dados):
+    return len(dados[0]) + len(dados[1])
+
+# Gravação de cada tipo (roda na thread principal, um arquivo por vez): retorna True se gravou
+
+def gravar_flutuantes(df, arquivo_origem, args):
+    return utils.salvar_pacotes_flutuantes(df, arquivo_origem, upsert=not args.apenas_inserir, tamanho_lote=args.lote)
+
+def gravar_validacao(df, arquivo_origem, args):
+    return utils.salvar_dados_validacao(df, arquivo_origem, tamanho_lote=args.lote)
+
+def gravar_expedicao(dados, arquivo_origem, args):
+    dados_ondas, dados_operadores = dados
+    return utils.salvar_expedicao_consolidado(dados_ondas, dados_operadores, arquivo_origem)
+
+def gravar_dados_diarios(lotes_dados: list) -> bool:
+    """
+    Junta os dias lidos aos já existentes (o CSV substitui o dia, como o upsert da aba
+    Relatório CSV) e salva a série completa uma única vez
+    """
+    por_data = {dado['data']: dado for dado in utils.carregar_dados_operacao()}
+    for dados in lotes_dados:
+        for dado in dados:
+            por_data[dado['data']] = dado
+    return utils.salvar_dados_operacao(sorted(por_data.values(), key=lambda dado: dado['data']))
+
+TIPOS = {
+    'flutuantes': {'ler': ler_flutuantes, 'gravar': gravar_flutuantes, 'datas': datas_flutuantes, 'registros': len},
+    'validacao': {'ler': ler_validacao, 'gravar': gravar_validacao, 'datas': datas_validacao, 'registros': len},
+    'dados_diarios': {'ler': ler_dados_diarios, 'gravar': None},
+    'expedicao': {'ler': ler_expedicao, 'gravar': gravar_expedicao, 'datas': datas_expedicao, 'registros': registros_expedicao}
+}
+
+def listar_arquivos(entradas: list) -> list:
+    """Expande diretórios (*.csv) e padrões glob, sem repetir arquivos"""
+    arquivos = []
+    for entrada in entradas:
+        if os.path.isdir(entrada):
+            arquivos.extend(sorted(glob.glob(os.path.join(entrada, '*.csv'))))
+        else:
+            arquivos.extend(sorted(glob.glob(entrada)))
+    return list(dict.fromkeys(arquivos))
+
+def main():
+    parser = argparse.ArgumentParser(description='Importa CSVs exportados no Supabase sem o navegador')
+    parser.add_argument('tipo', choices=sorted(TIPOS), help='Tipo de CSV')
+    parser.add_argument('entradas', nargs='+', help='Arquivos, diretórios ou padrões glob ("exports/*.csv")')
+    parser.add_argument('--arquivos-paralelos', type=int, default=DADOS['arquivos_paralelos'],
+                        help='Arquivos lidos ao mesmo tempo')
+    parser.add_argument('--lote', type=int, default=None, help='Registros por requisição ao banco')
+    parser.add_argument('--apenas-inserir', action='store_true',
+                        help='Flutuantes: não atualiza tracking numbers já existentes')
+    parser.add_argument('--simular', action='store_true', help='Apenas lê e valida os arquivos, sem gravar')
+    parser.add_argument('--reimportar', action='store_true',
+                        help='Lê e grava também arquivos com conteúdo já importado')
+    parser.add_argument('--detalhado', action='store_true', help='Mostra todas as mensagens de processamento')
+    args = parser.parse_args()
+
+    # Sem o app, os eventos de database/utils vão para o logging
+    logging.basicConfig(level=logging.INFO if args.detalhado else logging.WARNING, format='%(message)s')
+
+    caminhos = listar_arquivos(args.entradas)
+    if not caminhos:
+        print("❌ Nenhum arquivo CSV encontrado")
+        sys.exit(1)
+
+    conectado = utils.DB_AVAILABLE and utils.db_manager.is_connected()
+    if not args.simular and args.tipo != 'dados_diarios' and not conectado:
+        print("❌ Supabase não conectado. Verifique SUPABASE_URL e SUPABASE_KEY no .env")
+        sys.exit(1)
+
+    tipo = TIPOS[args.tipo]
+    print(f"📥 Importando {len(caminhos)} arquivo(s) de {args.tipo} ({args.arquivos_paralelos} em paralelo)")
+
+    inicio = time.perf_counter()
+    with ExitStack() as pilha:
+        arquivos = [pilha.enter_context(open(caminho, 'rb')) for caminho in caminhos]
+
+        # Arquivos com conteúdo já registrado (ou repetido nesta execução) não são lidos nem gravados de novo
+        hashes, pulados = {}, []
+        if not args.simular and tipo['gravar']:
+            a_ler = []
+            for arquivo in arquivos:
+                hash_arquivo = utils.hash_conteudo_arquivo(arquivo)
+                repetido = hash_arquivo in hashes.values() or (
+                    not args.reimportar and utils.buscar_importacao(args.tipo, hash_arquivo) is not None
+                )
+                if repetido:
+                    pulados.append({
+                        'arquivo': os.path.basename(arquivo.name), 'linhas': 0, 'leitura_s': 0.0,
+                        'gravacao_s': 0.0, 'status': 'já importado', 'erro': ''
+                    })
+                else:
+                    hashes[arquivo.name] = hash_arquivo
+                    a_ler.append(arquivo)
+            arquivos = a_ler
+
+        resultados = utils.processar_arquivos_em_paralelo(arquivos, tipo['ler'], args.arquivos_paralelos)
+    tempo_leitura = time.perf_counter() - inicio
+
+    relatorio = []
+    for resultado in resultados:
+        linhas = resultado['resultado'][1] if resultado['resultado'] else 0
+        relatorio.append({
+            'arquivo': os.path.basename(resultado['arquivo']),
+            'linhas': linhas,
+            'leitura_s': resultado['tempo'],
+            'gravacao_s': 0.0,
+            'status': 'falha' if resultado['erro'] else ('lido' if args.simular else 'gravado'),
+            'erro': resultado['erro'] or ''
+        })
+
+    # Gravação sequencial: cada arquivo já é enviado em lotes
+    inicio_gravacao = time.perf_counter()
+    if not args.simular:
+        lidos = [(resultado, item) for resultado, item in zip(resultados, relatorio) if not resultado['erro']]
+        if args.tipo == 'dados_diarios':
+            if lidos and not gravar_dados_diarios([resultado['resultado'][0] for resultado, _ in lidos]):
+                for _, item in lidos:
+                    item['status'], item['erro'] = 'falha', 'falha ao salvar dados de operação'
+        else:
+            for resultado, item in lidos:
+                inicio_arquivo = time.perf_counter()
+                dados = resultado['resultado'][0]
+                if not tipo['gravar'](dados, item['arquivo'], args):
+                    item['status'], item['erro'] = 'falha', 'falha na gravação (detalhes no log)'
+                item['gravacao_s'] = time.perf_counter() - inicio_arquivo
+                if item['status'] == 'gravado':
+                    utils.registrar_importacao(
+                        args.tipo, hashes[resultado['arquivo']], item['arquivo'], item['linhas'],
+                        tipo['registros'](dados), tipo['datas'](dados), item['leitura_s'] + item['gravacao_s']
+                    )
+
+    relatorio.extend(pulados)
+    tempo_gravacao = time.perf_counter() - inicio_gravacao
+    tempo_total = time.perf_counter() - inicio
+
+    print(f"\n{'Arquivo':<40} {'Linhas':>10} {'Leitura (s)':>12} {'Gravação (s)':>13} {'Linhas/s':>10}  Status")
+    for item in relatorio:
+        tempo_arquivo = item['leitura_s'] + item['gravacao_s']
+        vazao = item['linhas'] / tempo_arquivo if tempo_arquivo > 0 else 0
+        print(f"{item['arquivo'][:40]:<40} {item['linhas']:>10} {item['leitura_s']:>12.2f} "
+              f"{item['gravacao_s']:>13.2f} {vazao:>10.0f}  {item['status']}")
+
+    total_linhas = sum(item['linhas'] for item in relatorio)
+    falhas = [item for item in relatorio if item['status'] == 'falha']
+    print(f"\n📊 {total_linhas} linhas em {tempo_total:.2f}s "
+          f"(leitura {tempo_leitura:.2f}s, gravação {tempo_gravacao:.2f}s) - "
+          f"{total_linhas / tempo_total if tempo_total > 0 else 0:.0f} linhas/s")
+
+    if falhas:
+        print(f"❌ {len(falhas)} arquivo(s) com falha:")
+        for item in falhas:
+            print(f"   - {item['arquivo']}: {item['erro']}")
+        sys.exit(1)
+    print("✅ Importação concluída sem falhas")
+
+if __name__ == "__main__":
+    main()
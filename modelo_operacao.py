@@ -0,0 +1,147 @@
+"""
+Modelo colunar dos dados de operação (dados_operacao)
+
+Os dias ficam num DataFrame ordenado por data, com as chaves de semana ISO e de
+mês já calculadas, e as somas acumuladas de cada campo num calendário contínuo
+do primeiro ao último dia. Assim o total de qualquer intervalo de datas é a
+diferença de duas linhas das somas acumuladas (tempo constante), sem percorrer
+os registros nem converter datas a cada filtro.
+
+O modelo é compartilhado pelo Dashboard Manual, pelo Histórico e por
+gerar_relatorio_resumo: obter_modelo(dados) reaproveita o último modelo montado
+enquanto os dados não mudarem.
+"""
+
+import threading
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from config import CAMPOS_DADOS_OPERACAO
+
+def calcular_metricas_de_somas(somas: dict) -> dict:
+    """Totais e taxas (% do volume diário) do painel a partir das somas de um período"""
+    total_pacotes = somas.get('volume_diario', 0)
+
+    def taxa(valor):
+        return (valor / total_pacotes * 100) if total_pacotes > 0 else 0
+
+    return {
+        'total_pacotes': total_pacotes,
+        'flutuantes': somas.get('flutuantes', 0),
+        'flutuantes_revertidos': somas.get('flutuantes_revertidos', 0),
+        'erros_sorting': somas.get('erros_sorting', 0),
+        'erros_etiquetagem': somas.get('erros_etiquetagem', 0),
+        'taxa_flutuantes': taxa(somas.get('flutuantes', 0)),
+        'taxa_erros_sorting': taxa(somas.get('erros_sorting', 0)),
+        'taxa_erros_etiquetagem': taxa(somas.get('erros_etiquetagem', 0)),
+        'dias': somas.get('dias', 0)
+    }
+
+class ModeloOperacao:
+    """Dias de dados_operacao em colunas, com somas acumuladas por campo"""
+
+    def __init__(self, dados: list):
+        campos = CAMPOS_DADOS_OPERACAO
+        df = pd.DataFrame(dados or [], columns=['data'] + campos)
+        df['data'] = pd.to_datetime(df['data']).dt.normalize()
+        df[campos] = df[campos].apply(pd.to_numeric, errors='coerce').fillna(0).astype('int64')
+        df = df.drop_duplicates('data', keep='last').sort_values('data').reset_index(drop=True)
+
+        iso = df['data'].dt.isocalendar()
+        df['ano_iso'] = iso['year'].astype('int64')
+        df['semana_iso'] = iso['week'].astype('int64')
+        df['mes'] = df['data'].dt.strftime('%Y-%m')
+        self.dias = df
+
+        # Calendário contínuo: a linha de uma data é o número de dias desde o primeiro dia.
+        # A última coluna conta os dias com dados, então também dá a posição em self.dias.
+        self.inicio = df['data'].iloc[0] if not df.empty else None
+        total_dias = (df['data'].iloc[-1] - self.inicio).days + 1 if not df.empty else 0
+        valores = np.zeros((total_dias, len(campos) + 1), dtype='int64')
+        if not df.empty:
+            posicoes = (df['data'] - self.inicio).dt.days.to_numpy()
+            valores[posicoes, :-1] = df[campos].to_numpy()
+            valores[posicoes, -1] = 1
+        self._acumulado = np.vstack([np.zeros((1, len(campos) + 1), dtype='int64'), np.cumsum(valores, axis=0)])
+
+    def __len__(self) -> int:
+        return len(self.dias)
+
+    @property
+    def primeira_data(self):
+        return self.dias['data'].iloc[0].date() if len(self.dias) else None
+
+    @property
+    def ultima_data(self):
+        return self.dias['data'].iloc[-1].date() if len(self.dias) else None
+
+    def _linhas(self, inicio=None, fim=None) -> tuple:
+        """Linhas (a, b) das somas acumuladas que delimitam [inicio, fim]; None não limita"""
+        total = len(self._acumulado) - 1
+        if self.inicio is None:
+            return 0, 0
+        a = 0 if inicio is None else min(max((pd.Timestamp(inicio) - self.inicio).days, 0), total)
+        b = total if fim is None else min(max((pd.Timestamp(fim) - self.inicio).days + 1, 0), total)
+        return a, max(a, b)
+
+    def somas(self, inicio=None, fim=None) -> dict:
+        """Soma de cada campo e número de dias com dados no intervalo (datas inclusivas)"""
+        a, b = self._linhas(inicio, fim)
+        diferenca = self._acumulado[b] - self._acumulado[a]
+        somas = {campo: int(valor) for campo, valor in zip(CAMPOS_DADOS_OPERACAO, diferenca[:-1])}
+        somas['dias'] = int(diferenca[-1])
+        return somas
+
+    def metricas(self, inicio=None, fim=None) -> dict:
+        """Totais e taxas do intervalo, no formato dos cartões do Dashboard Manual"""
+        return calcular_metricas_de_somas(self.somas(inicio, fim))
+
+    def periodo(self, inicio=None, fim=None) -> pd.DataFrame:
+        """Dias com dados no intervalo, em ordem de data (cópia: o modelo é compartilhado)"""
+        a, b = self._linhas(inicio, fim)
+        return self.dias.iloc[self._acumulado[a, -1]:self._acumulado[b, -1]].copy()
+
+    def registros(self, inicio=None, fim=None) -> list:
+        """Dias do intervalo como lista de dicionários (data em texto), como em carregar_dados_operacao"""
+        df = self.periodo(inicio, fim)[['data'] + CAMPOS_DADOS_OPERACAO]
+        df['data'] = df['data'].dt.strftime('%Y-%m-%d')
+        return df.to_dict('records')
+
+    @staticmethod
+    def semana_iso(data) -> tuple:
+        """(segunda-feira, domingo) da semana ISO que contém a data"""
+        dia = pd.Timestamp(data).date()
+        segunda = dia - timedelta(days=dia.weekday())
+        return segunda, segunda + timedelta(days=6)
+
+    def periodo_anterior(self, inicio: date, fim: date) -> tuple:
+        """
+        Período de comparação: a semana ISO anterior quando [inicio, fim] está dentro de uma
+        semana, senão o mesmo número de dias imediatamente antes de inicio
+        """
+        inicio, fim = pd.Timestamp(inicio).date(), pd.Timestamp(fim).date()
+        segunda, domingo = self.semana_iso(inicio)
+        if fim <= domingo:
+            return segunda - timedelta(days=7), segunda - timedelta(days=1)
+        return inicio - timedelta(days=(fim - inicio).days + 1), inicio - timedelta(days=1)
+
+# Último modelo montado e a assinatura dos dados que o geraram
+_ultimo_modelo = (None, None)
+_lock_modelo = threading.Lock()
+
+def obter_modelo(dados: list) -> ModeloOperacao:
+    """Modelo dos dados informados, reaproveitando o último enquanto os dados forem os mesmos"""
+    global _ultimo_modelo
+    assinatura = tuple(
+        (str(dado.get('data')),) + tuple(dado.get(campo) for campo in CAMPOS_DADOS_OPERACAO)
+        for dado in dados or []
+    )
+    with _lock_modelo:
+        if _ultimo_modelo[0] == assinatura:
+            return _ultimo_modelo[1]
+    modelo = ModeloOperacao(dados)
+    with _lock_modelo:
+        _ultimo_modelo = (assinatura, modelo)
+    return modelo
@@ -0,0 +1,76 @@
+"""
+Exibição no Streamlit dos eventos do núcleo (eventos.py)
+
+O app registra consumidor_streamlit, que mostra cada evento no ponto da página
+em que ele ocorre (st.info, st.error, st.dataframe...). Status passageiros
+(eventos.notificar) não esperam com time.sleep até que sumam: ficam numa fila
+da sessão, que exibir_notificacoes() drena como toasts.
+"""
+
+import streamlit as st
+
+from eventos import consumidor_logging
+
+try:
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+except ImportError:  # Streamlit sem o runtime (execução fora do app)
+    def get_script_run_ctx():
+        return None
+
+# Chave da fila de mensagens no session_state (uma fila por sessão do navegador)
+CHAVE_FILA = '_fila_notificacoes'
+
+# Placeholders das barras de status abertas na sessão, por chave do evento de progresso
+CHAVE_BARRAS = '_barras_status'
+
+EXIBIDORES = {
+    'info': lambda alvo, mensagem: alvo.info(mensagem),
+    'success': lambda alvo, mensagem: alvo.success(mensagem),
+    'warning': lambda alvo, mensagem: alvo.warning(mensagem),
+    'error': lambda alvo, mensagem: alvo.error(mensagem),
+    'codigo': lambda alvo, mensagem: alvo.code(mensagem)
+}
+
+def consumidor_streamlit(evento: dict):
+    """Exibe um evento do núcleo na página da sessão atual"""
+    # Threads de trabalho e scripts não têm página: o evento vai para o log
+    if get_script_run_ctx() is None:
+        consumidor_logging(evento)
+        return
+
+    tipo = evento['tipo']
+    mensagem = evento.get('mensagem', '')
+
+    if evento.get('transitorio'):
+        st.session_state.setdefault(CHAVE_FILA, []).append((mensagem, tipo))
+    elif tipo == 'progresso':
+        barras = st.session_state.setdefault(CHAVE_BARRAS, {})
+        if evento['chave'] not in barras:
+            barras[evento['chave']] = st.empty()
+        barras[evento['chave']].info(mensagem)
+    elif tipo == 'progresso_fim':
+        placeholder = st.session_state.get(CHAVE_BARRAS, {}).pop(evento['chave'], None)
+        if placeholder is not None:
+            placeholder.empty()
+    elif tipo == 'tabela':
+        st.dataframe(evento['dados'], use_container_width=True, hide_index=True)
+    else:
+        EXIBIDORES.get(tipo, EXIBIDORES['info'])(st, mensagem)
+
+def exibir_notificacoes():
+    """Exibe como toast e descarta as mensagens pendentes da sessão atual"""
+    if get_script_run_ctx() is None:
+        return
+
+    # Barras que não chegaram ao progresso_fim (execução interrompida por um rerun ou erro)
+    # pertencem a uma execução já encerrada da página e não serão mais atualizadas
+    st.session_state.pop(CHAVE_BARRAS, None)
+
+    pendentes = st.session_state.get(CHAVE_FILA)
+    if not pendentes:
+        return
+
+    st.session_state[CHAVE_FILA] = []
+    # As mensagens já trazem o emoji do tipo (✅, ⚠️, ❌...), como no restante do app
+    for mensagem, _tipo in pendentes:
+        st.toast(mensagem)
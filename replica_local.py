@@ -0,0 +1,305 @@
+"""
+Réplica local (DuckDB) das tabelas analíticas do Supabase
+
+Espelha pacotes_flutuantes, dados_validacao, expedicao_consolidado e
+expedicao_operadores_historico num arquivo DuckDB colunar, sincronizado de forma
+incremental pela marca d'água de cada tabela (SINCRONIZACAO['coluna_marca']) e
+mesclado pelo id e pela chave natural. Tabelas e views locais são criadas a partir do
+próprio setup_database.sql, então o DatabaseManager consulta a réplica com o
+mesmo SQL das views do Supabase, sem rede e sem montar DataFrames a partir de
+JSON. Com a réplica sincronizada o dashboard também funciona offline.
+
+Opcional: requer o pacote duckdb e ARMAZENAMENTO_LOCAL['ativo'] = True.
+"""
+
+import os
+import re
+import threading
+from datetime import datetime
+
+import pandas as pd
+
+try:
+    import duckdb
+    DUCKDB_AVAILABLE = True
+except ImportError:
+    DUCKDB_AVAILABLE = False
+
+from config import ARMAZENAMENTO_LOCAL, SUPABASE, SINCRONIZACAO
+
+ARQUIVO_SCHEMA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'setup_database.sql')
+
+# Tabelas espelhadas (todas têm id serial e a coluna de marca d'água)
+TABELAS_REPLICA = ('pacotes_flutuantes', 'dados_validacao', 'expedicao_consolidado', 'expedicao_operadores_historico')
+
+# View do schema que calcula um resumo diário a partir da tabela base (calculo_<resumo>)
+PREFIXO_CALCULO_RESUMO = 'calculo_'
+
+# Tipos do Postgres -> DuckDB (demais tipos são iguais nos dois bancos)
+TIPOS_DUCKDB = [
+    (r'SERIAL\b', 'INTEGER'),
+    (r'TEXT\[\]', 'VARCHAR[]'),
+    (r'TEXT\b', 'VARCHAR'),
+    (r'NUMERIC(\s*\(\s*\d+\s*,\s*\d+\s*\))?', 'DOUBLE'),
+    (r'TIMESTAMP WITH TIME ZONE', 'TIMESTAMP'),
+]
+
+def ler_schema_sql(caminho: str = ARQUIVO_SCHEMA) -> str:
+    """Lê o setup_database.sql (salvo em UTF-16 com BOM) como texto com quebras de linha \\n"""
+    with open(caminho, 'rb') as f:
+        bruto = f.read()
+    codificacao = 'utf-16' if bruto[:2] in (b'\xff\xfe', b'\xfe\xff') else 'utf-8-sig'
+    return bruto.decode(codificacao).replace('\r\n', '\n')
+
+def extrair_colunas_tabela(schema: str, tabela: str) -> list:
+    """Colunas (nome, tipo DuckDB) do CREATE TABLE da tabela no schema do Supabase"""
+    encontrado = re.search(rf'CREATE TABLE IF NOT EXISTS {tabela}\s*\((.*?)\n\);', schema, re.S)
+    if not encontrado:
+        raise ValueError(f"Tabela {tabela} não encontrada em setup_database.sql")
+
+    colunas = []
+    for linha in encontrado.group(1).split('\n'):
+        linha = linha.split('--')[0].strip().rstrip(',')
+        if not linha or re.match(r'(UNIQUE|PRIMARY|CONSTRAINT|FOREIGN|CHECK)\b', linha, re.I):
+            continue
+        nome, definicao = re.match(r'("[^"]+"|\S+)\s+(.+)', linha).groups()
+        tipo = next((duckdb_tipo for padrao, duckdb_tipo in TIPOS_DUCKDB if re.match(padrao, definicao, re.I)), None)
+        colunas.append((nome, tipo or re.match(r'[A-Z]+(\s*\(\d+\))?', definicao, re.I).group(0)))
+    return colunas
+
+def extrair_views(schema: str) -> list:
+    """Views do schema, na ordem do arquivo: [(nome, SELECT, tabelas e views referenciadas)]"""
+    views = []
+    for nome, corpo in re.findall(r'CREATE OR REPLACE VIEW (\w+) AS\s*(.*?);', schema, re.S):
+        # FROM/JOIN no início da linha (ignora EXTRACT(... FROM coluna))
+        referencias = set(re.findall(r'^\s*(?:FROM|(?:\w+\s+)?JOIN)\s+(\w+)', corpo, re.I | re.M))
+        if referencias:
+            views.append((nome, corpo, referencias))
+    return views
+
+class ReplicaLocal:
+    """Arquivo DuckDB com as tabelas espelhadas, a marca d'água de cada uma e as views do schema"""
+
+    def __init__(self, arquivo: str = None):
+        self.arquivo = arquivo or ARMAZENAMENTO_LOCAL['arquivo']
+        diretorio = os.path.dirname(self.arquivo)
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+
+        self.conexao = duckdb.connect(self.arquivo)
+        # A conexão DuckDB não pode ser usada por duas threads ao mesmo tempo
+        self._lock = threading.RLock()
+        self.colunas = {}
+        self.views = set()
+        self._preparar()
+
+    def _preparar(self):
+        """Cria (se preciso) as tabelas, a tabela de controle e as views locais"""
+        schema = ler_schema_sql()
+        with self._lock:
+            self.conexao.execute("""
+                CREATE TABLE IF NOT EXISTS _sincronizacao (
+                    tabela VARCHAR PRIMARY KEY,
+                    coluna_marca VARCHAR,
+                    ultima_marca VARCHAR,
+                    ultimo_id BIGINT,
+                    sincronizado_em TIMESTAMP,
+                    linhas BIGINT
+                )
+            """)
+            for tabela in TABELAS_REPLICA:
+                colunas = extrair_colunas_tabela(schema, tabela)
+                self.colunas[tabela] = [nome.strip('"') for nome, _ in colunas]
+                definicao = ', '.join(f'{nome} {tipo}' for nome, tipo in colunas)
+                self.conexao.execute(f"CREATE TABLE IF NOT EXISTS {tabela} ({definicao})")
+                # Réplicas criadas antes de colunas novas do schema (ex.: updated_at)
+                for nome, tipo in colunas:
+                    self.conexao.execute(f"ALTER TABLE {tabela} ADD COLUMN IF NOT EXISTS {nome} {tipo}")
+
+            # Views que dependem só das tabelas espelhadas (ou de views já criadas). Os resumos
+            # diários, que no Supabase são tabelas mantidas por triggers, viram aqui views
+            # sobre calculo_<resumo>, que agrega as tabelas espelhadas
+            disponiveis = set(TABELAS_REPLICA)
+            for nome, corpo, referencias in extrair_views(schema):
+                if not referencias <= disponiveis:
+                    continue
+                try:
+                    self.conexao.execute(f"CREATE OR REPLACE VIEW {nome} AS {corpo}")
+                except Exception:
+                    # View com SQL específico do Postgres: o leitor continua usando o Supabase
+                    continue
+                self.views.add(nome)
+                disponiveis.add(nome)
+                if nome.startswith(PREFIXO_CALCULO_RESUMO):
+                    resumo = nome[len(PREFIXO_CALCULO_RESUMO):]
+                    self.conexao.execute(f"CREATE OR REPLACE VIEW {resumo} AS SELECT * FROM {nome}")
+                    disponiveis.add(resumo)
+
+    def marca_dagua(self, tabela: str) -> dict:
+        """
+        Última (marca, id) recebida, coluna da marca e data da última sincronização;
+        None se nunca sincronizou
+        """
+        with self._lock:
+            linha = self.conexao.execute(
+                "SELECT coluna_marca, ultima_marca, ultimo_id, sincronizado_em, linhas FROM _sincronizacao WHERE tabela = ?",
+                [tabela]
+            ).fetchone()
+        if linha is None:
+            return None
+        return {'coluna': linha[0], 'marca': linha[1], 'id': linha[2], 'sincronizado_em': linha[3], 'linhas': linha[4]}
+
+    def possui(self, tabela: str) -> bool:
+        """Indica se a tabela já foi sincronizada ao menos uma vez"""
+        return self.marca_dagua(tabela) is not None
+
+    def segundos_desde_sincronizacao(self, tabela: str) -> float:
+        marca = self.marca_dagua(tabela)
+        if marca is None:
+            return float('inf')
+        return (datetime.now() - marca['sincronizado_em']).total_seconds()
+
+    def sincronizar(self, cliente, tabelas: tuple = None, tamanho_pagina: int = None) -> dict:
+        """
+        Baixa do Supabase apenas as linhas inseridas ou alteradas desde a marca d'água de cada
+        tabela, em páginas ordenadas por (marca, id), e as mescla na réplica.
+        A primeira página relê SINCRONIZACAO['margem_segundos'] antes da marca (linhas gravadas
+        por transações que terminaram depois de outras mais novas); a mesclagem pelo id e pela
+        chave natural torna a releitura inofensiva. A marca avança a cada página, então uma
+        sincronização interrompida continua de onde parou.
+        Retorna {tabela: linhas recebidas}.
+        """
+        tamanho_pagina = tamanho_pagina or SUPABASE['tamanho_pagina']
+        recebidas = {}
+
+        for tabela in tabelas or TABELAS_REPLICA:
+            coluna = SINCRONIZACAO['coluna_marca'][tabela]
+            marca = self.marca_dagua(tabela)
+            if marca is not None and marca['coluna'] != coluna:
+                # Coluna da marca mudou na configuração: recomeça do zero (a mesclagem evita duplicatas)
+                marca = None
+            ultima_marca = marca['marca'] if marca else None
+            ultimo_id = marca['id'] if marca else None
+            total = 0
+            primeira_pagina = True
+
+            while True:
+                query = cliente.table(tabela).select('*')
+                if ultima_marca is not None and primeira_pagina:
+                    inicio = pd.Timestamp(ultima_marca) - pd.Timedelta(seconds=SINCRONIZACAO['margem_segundos'])
+                    query = query.gte(coluna, inicio.isoformat())
+                elif ultima_marca is not None:
+                    # Linhas gravadas no mesmo instante compartilham a marca: o id desempata.
+                    # O gte redundante limita a leitura do índice (marca, id) no Postgres, que
+                    # não usa o índice para o OR sozinho
+                    query = query.gte(coluna, ultima_marca).or_(f'{coluna}.gt."{ultima_marca}",'
+                                      f'and({coluna}.eq."{ultima_marca}",id.gt.{ultimo_id})')
+                pagina = query.order(coluna).order('id').limit(tamanho_pagina).execute().data or []
+                primeira_pagina = False
+
+                if pagina:
+                    self._gravar(tabela, pagina)
+                    ultimo = pagina[-1]
+                    # Na releitura a marca pode recuar até a margem: as páginas seguintes continuam dali
+                    if ultimo.get(coluna) is not None:
+                        ultima_marca, ultimo_id = ultimo[coluna], ultimo['id']
+                    total += len(pagina)
+                self._salvar_marca(tabela, coluna, ultima_marca, ultimo_id)
+
+                if len(pagina) < tamanho_pagina:
+                    break
+
+            recebidas[tabela] = total
+
+        return recebidas
+
+    def _gravar(self, tabela: str, registros: list):
+        """
+        Grava uma página de registros do Supabase, substituindo as linhas com o mesmo id ou a
+        mesma chave natural (linha apagada e reimportada no Supabase recebe outro id)
+        """
+        novos = pd.DataFrame(registros)
+        novos = novos[[coluna for coluna in novos.columns if coluna in self.colunas[tabela]]]
+
+        # Um DELETE por chave: com OR entre as chaves o join deixa de ser por hash e
+        # cada página passaria a varrer a tabela local inteira
+        condicoes = ['atual.id = _novos.id']
+        chave = SINCRONIZACAO['chaves_naturais'].get(tabela, ())
+        if chave and all(coluna in novos.columns for coluna in chave):
+            condicoes.append(' AND '.join(f'atual.{c} = _novos.{c}' for c in chave))
+
+        with self._lock:
+            self.conexao.register('_novos', novos)
+            try:
+                self.conexao.execute("BEGIN TRANSACTION")
+                for condicao in condicoes:
+                    self.conexao.execute(f"DELETE FROM {tabela} AS atual USING _novos WHERE {condicao}")
+                self.conexao.execute(f"INSERT INTO {tabela} BY NAME SELECT * FROM _novos")
+                self.conexao.execute("COMMIT")
+            except Exception:
+                self.conexao.execute("ROLLBACK")
+                raise
+            finally:
+                self.conexao.unregister('_novos')
+
+    def _salvar_marca(self, tabela: str, coluna: str, ultima_marca: str, ultimo_id: int):
+        with self._lock:
+            linhas = self.conexao.execute(f"SELECT COUNT(*) FROM {tabela}").fetchone()[0]
+            self.conexao.execute("""
+                INSERT OR REPLACE INTO _sincronizacao (tabela, coluna_marca, ultima_marca, ultimo_id, sincronizado_em, linhas)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, [tabela, coluna, ultima_marca, ultimo_id, datetime.now(), linhas])
+
+    def consultar(self, sql: str, parametros: list = None) -> pd.DataFrame:
+        """
+        Executa uma consulta na réplica e devolve o DataFrame no mesmo formato das respostas
+        do Supabase: datas e horários como texto ISO e valores ausentes como None/NaN
+        """
+        with self._lock:
+            cursor = self.conexao.execute(sql, parametros or [])
+            tipos = {descricao[0]: str(descricao[1]) for descricao in cursor.description}
+            df = cursor.df()
+
+        for coluna, tipo in tipos.items():
+            serie = df[coluna]
+            if tipo == 'DATE':
+                serie = serie.dt.strftime('%Y-%m-%d')
+            elif tipo.startswith('TIMESTAMP'):
+                # Horários são gravados em UTC, como o PostgREST devolve
+                serie = serie.dt.strftime('%Y-%m-%dT%H:%M:%S.%f+00:00')
+            elif pd.api.types.is_integer_dtype(serie.dtype):
+                # Inteiros com nulos viram float com NaN, como no DataFrame montado a partir do JSON
+                df[coluna] = serie.astype('float64') if serie.hasnans else serie.astype('int64')
+                continue
+            elif serie.dtype != object and not pd.api.types.is_extension_array_dtype(serie.dtype):
+                continue
+            df[coluna] = serie.astype(object).where(serie.notna(), None)
+        
+        return df
+
+    def selecionar(self, tabela: str, colunas: str = '*', filtros: list = None, ordem: str = None,
+                   limit: int = None) -> pd.DataFrame:
+        """
+        SELECT simples na réplica. filtros é uma lista de (coluna, operador, valor) como
+        ('data_operacao', '>=', '2025-01-01') ou ('operador_real', 'in', [...]);
+        filtros com valor None (ou lista vazia) são ignorados, como nos leitores do Supabase
+        """
+        condicoes, parametros = [], []
+        for coluna, operador, valor in filtros or []:
+            if valor is None or (operador == 'in' and len(valor) == 0):
+                continue
+            if operador == 'in':
+                condicoes.append(f'"{coluna}" IN ({", ".join("?" * len(valor))})')
+                parametros.extend(valor)
+            else:
+                condicoes.append(f'"{coluna}" {operador} ?')
+                parametros.append(valor)
+
+        sql = f"SELECT {colunas} FROM {tabela}"
+        if condicoes:
+            sql += " WHERE " + " AND ".join(condicoes)
+        if ordem:
+            sql += f" ORDER BY {ordem}"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        return self.consultar(sql, parametros)
@@ -0,0 +1,49 @@
+"""
+Testes do explicar_consultas.py
+
+As funções de tradução e de leitura dos planos rodam sem banco. A execução completa
+(schema, dados sintéticos e EXPLAIN ANALYZE de cada leitura do DatabaseManager pelo
+ClienteSQL) precisa do psycopg2 e de um Postgres local em POSTGRES_DSN e é pulada sem eles:
+
+    pip install -r requirements-dev.txt
+    POSTGRES_DSN=postgresql://postgres@localhost:5432/postgres python -m pytest tests
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import explicar_consultas  # noqa: E402
+
+def test_filtro_logico_traduz_or_e_and_aninhados():
+    parametros = []
+    sql = explicar_consultas._filtro_logico('updated_at.gt."2026-01-01",and(updated_at.eq."2026-01-01",id.gt.10)',
+                                            parametros)
+    assert sql == '("updated_at" > %s OR ("updated_at" = %s AND "id" > %s))'
+    assert parametros == ['2026-01-01', '2026-01-01', '10']
+
+def test_leituras_do_plano_incluem_indices_do_bitmap():
+    plano = {
+        'Node Type': 'Bitmap Heap Scan', 'Relation Name': 'pacotes_flutuantes',
+        'Plans': [{'Node Type': 'Bitmap Index Scan', 'Index Name': 'idx_pacotes_flutuantes_data'}]
+    }
+    assert explicar_consultas._leituras(plano) == [
+        ('Bitmap Heap Scan', 'pacotes_flutuantes', 'idx_pacotes_flutuantes_data')
+    ]
+    assert not explicar_consultas._chama_funcao(plano)
+    assert explicar_consultas._chama_funcao({'Node Type': 'Function Scan'})
+
+@pytest.mark.skipif(not explicar_consultas.PSYCOPG2_AVAILABLE, reason='psycopg2 não instalado')
+@pytest.mark.skipif(not os.getenv('POSTGRES_DSN'), reason='POSTGRES_DSN não configurado')
+def test_consultas_do_dashboard_sem_varredura_completa():
+    resultado = subprocess.run(
+        [sys.executable, 'explicar_consultas.py', '--dsn', os.environ['POSTGRES_DSN'], '--linhas', '50000', '--dias', '120'],
+        cwd=RAIZ, capture_output=True, text=True, timeout=600
+    )
+    assert resultado.returncode == 0, resultado.stdout + resultado.stderr
+    assert 'consultas sem varredura completa' in resultado.stdout
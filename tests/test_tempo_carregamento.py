@@ -0,0 +1,58 @@
+"""
+Orçamento de tempo do carregamento de dados do dashboard
+
+Executa o caminho de load_data() (utils.carregar_dados_operacao) sem o Supabase, sobre
+um armazenamento local temporário, com time.sleep proibido: qualquer espera no caminho
+de carregamento falha o teste, assim como uma carga acima do orçamento.
+"""
+
+import os
+import sys
+import time
+import traceback
+from datetime import date, timedelta
+
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import utils  # noqa: E402
+from dados_locais import DadosLocais  # noqa: E402
+
+ORCAMENTO_SEGUNDOS = 1.0
+DIAS_HISTORICO = 730
+
+@pytest.fixture
+def armazenamento_temporario(tmp_path, monkeypatch):
+    """Armazenamento local num diretório temporário, com dois anos de dias de operação"""
+    monkeypatch.chdir(tmp_path)
+    armazenamento = DadosLocais(str(tmp_path / 'dados_operacao.sqlite'))
+    inicio = date.today() - timedelta(days=DIAS_HISTORICO)
+    armazenamento.salvar([
+        {'data': (inicio + timedelta(days=d)).isoformat(), 'backlog': d, 'volume_veiculo': 5000 + d,
+         'volume_diario': 5000 + 2 * d, 'flutuantes': d % 40, 'flutuantes_revertidos': d % 10}
+        for d in range(DIAS_HISTORICO)
+    ])
+    monkeypatch.setattr(utils, '_armazenamento_local', armazenamento)
+    monkeypatch.setattr(utils, 'DB_AVAILABLE', False)
+    return armazenamento
+
+def test_carregamento_sem_esperas_e_dentro_do_orcamento(armazenamento_temporario, monkeypatch):
+    chamadas_sleep = []
+
+    def sleep_proibido(segundos):
+        origem = traceback.extract_stack(limit=2)[0]
+        chamadas_sleep.append(f"{origem.filename}:{origem.lineno} ({segundos}s)")
+
+    monkeypatch.setattr(time, 'sleep', sleep_proibido)
+
+    tempos = []
+    for _ in range(3):
+        inicio = time.perf_counter()
+        dados = utils.carregar_dados_operacao()
+        tempos.append(time.perf_counter() - inicio)
+
+    assert len(dados) == DIAS_HISTORICO
+    assert chamadas_sleep == []
+    assert max(tempos) <= ORCAMENTO_SEGUNDOS, f"pior carga: {max(tempos):.3f}s"
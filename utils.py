@@ -1,12 +1,20 @@
 import pandas as pd
-import streamlit as st
 from datetime import datetime
-import json
 import os
+import hashlib
 import re
+import time
 import unicodedata
-from config import DADOS, MENSAGENS
+import copy
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from config import DADOS, MENSAGENS, VALORES_BOOLEANOS, SINCRONIZACAO
+import eventos
 import numpy as np
+from dados_locais import DadosLocais, criar_backup, ler_backup
+from modelo_operacao import obter_modelo, calcular_metricas_de_somas
 
 # Importação condicional do database para evitar erros
 try:
@@ -14,7 +22,141 @@ try:
     DB_AVAILABLE = True
 except ImportError:
     DB_AVAILABLE = False
-    st.warning("⚠️ Módulo database não disponível. Usando apenas armazenamento local.")
+    eventos.aviso("⚠️ Módulo database não disponível. Usando apenas armazenamento local.")
+
+# Dias de operação guardados localmente (SQLite), com ou sem o Supabase. Criado no primeiro
+# uso: importar utils (importar_csv, explicar_consultas) não cria o diretório nem o arquivo
+_armazenamento_local = None
+_lock_armazenamento_local = threading.Lock()
+
+def armazenamento_local() -> DadosLocais:
+    global _armazenamento_local
+    with _lock_armazenamento_local:
+        if _armazenamento_local is None:
+            _armazenamento_local = DadosLocais()
+        return _armazenamento_local
+
+# Tipos explícitos para leitura de CSVs em blocos: colunas repetitivas como categorias,
+# horários já convertidos e identificadores sempre como texto
+ESQUEMAS_CSV = {
+    'flutuantes': {
+        'categorias': ['Estacao', 'Operador', 'Operador Real', 'Status SPX', 'Foi Expedido', 'Status', 'Foi encontrado'],
+        'textos': ['Tracking Number'],
+        'datas': []
+    },
+    'expedicao': {
+        'categorias': ['Corridor Cage', 'Validation Operator', 'City'],
+        'textos': ['AT/TO'],
+        'datas': ['Validation Start Time', 'Validation End Time', 'Delivering Time']
+    }
+}
+
+def verificar_colunas_csv(uploaded_file, colunas_obrigatorias: list) -> list:
+    """
+    Lê apenas o cabeçalho do CSV e retorna as colunas obrigatórias ausentes
+    """
+    colunas = pd.read_csv(uploaded_file, nrows=0).columns
+    uploaded_file.seek(0)
+    return [col for col in colunas_obrigatorias if col not in colunas]
+
+def hash_conteudo_arquivo(uploaded_file) -> str:
+    """
+    SHA-256 do conteúdo de um arquivo enviado (UploadedFile/BytesIO) ou aberto em modo binário.
+    O arquivo volta ao início para ser lido em seguida.
+    """
+    if hasattr(uploaded_file, 'getvalue'):
+        return hashlib.sha256(uploaded_file.getvalue()).hexdigest()
+
+    resumo = hashlib.sha256()
+    uploaded_file.seek(0)
+    for bloco in iter(lambda: uploaded_file.read(1024 * 1024), b''):
+        resumo.update(bloco)
+    uploaded_file.seek(0)
+    return resumo.hexdigest()
+
+# Versão da leitura de cada tipo de CSV: incremente ao mudar a leitura ou a transformação
+# de um tipo para que os resultados já em cache (ver ler_upload_em_cache) sejam descartados
+VERSOES_LEITURA_CSV = {
+    'flutuantes': 1,
+    'validacao': 1,
+    'dados_diarios': 1,
+    'expedicao': 1
+}
+
+# Leituras de CSVs enviados, da menos para a mais recentemente usada: {chave: (valor, bytes)}
+_leituras_em_cache = OrderedDict()
+_lock_leituras = threading.Lock()
+
+def _copiar_leitura(valor):
+    """Cópia de uma leitura em cache, para que quem chama possa alterá-la livremente"""
+    if isinstance(valor, pd.DataFrame):
+        return valor.copy()
+    if isinstance(valor, tuple):
+        return tuple(_copiar_leitura(item) for item in valor)
+    return copy.deepcopy(valor)
+
+def _tamanho_leitura(valor, uploaded_file) -> int:
+    """Memória aproximada de uma leitura: a do DataFrame, ou o tamanho do arquivo para os demais resultados"""
+    if isinstance(valor, pd.DataFrame):
+        return int(valor.memory_usage(deep=True).sum())
+    if hasattr(uploaded_file, 'getvalue'):
+        return len(uploaded_file.getvalue())
+    return os.fstat(uploaded_file.fileno()).st_size
+
+def ler_upload_em_cache(uploaded_file, tipo: str, funcao_leitura, hash_arquivo: str = None):
+    """
+    Resultado de funcao_leitura(uploaded_file), reaproveitado enquanto o mesmo conteúdo for enviado.
+    A cada interação o Streamlit executa a página de novo com o arquivo ainda no uploader;
+    a leitura é refeita apenas se o conteúdo (hash) ou a versão da leitura do tipo mudarem.
+    Mantém até DADOS['leituras_em_cache'] leituras e DADOS['leituras_em_cache_mb'] MB (LRU).
+    Erros da leitura não são guardados. Retorna uma cópia.
+    hash_arquivo: hash do conteúdo, se quem chama já o calculou
+    """
+    chave = (tipo, VERSOES_LEITURA_CSV[tipo], hash_arquivo or hash_conteudo_arquivo(uploaded_file))
+    
+    with _lock_leituras:
+        if chave in _leituras_em_cache:
+            _leituras_em_cache.move_to_end(chave)
+            return _copiar_leitura(_leituras_em_cache[chave][0])
+    
+    uploaded_file.seek(0)
+    valor = funcao_leitura(uploaded_file)
+    tamanho = _tamanho_leitura(valor, uploaded_file)
+    
+    with _lock_leituras:
+        _leituras_em_cache[chave] = (valor, tamanho)
+        _leituras_em_cache.move_to_end(chave)
+        limite_bytes = DADOS['leituras_em_cache_mb'] * 1024 * 1024
+        while len(_leituras_em_cache) > 1 and (
+            len(_leituras_em_cache) > DADOS['leituras_em_cache']
+            or sum(item[1] for item in _leituras_em_cache.values()) > limite_bytes
+        ):
+            _leituras_em_cache.popitem(last=False)
+    return _copiar_leitura(valor)
+
+def ler_csv_em_blocos(uploaded_file, tipo: str, tamanho_bloco: int = None, colunas: list = None):
+    """
+    Lê um CSV em blocos com tipos explícitos (ver ESQUEMAS_CSV).
+    Gera DataFrames de até tamanho_bloco linhas; a memória usada não depende do tamanho do arquivo.
+    """
+    esquema = ESQUEMAS_CSV[tipo]
+    tipos = {coluna: 'category' for coluna in esquema['categorias']}
+    tipos.update({coluna: str for coluna in esquema['textos']})
+    if colunas:
+        tipos = {coluna: tipo_coluna for coluna, tipo_coluna in tipos.items() if coluna in colunas}
+    
+    leitor = pd.read_csv(
+        uploaded_file,
+        dtype=tipos,
+        usecols=colunas,
+        chunksize=tamanho_bloco or DADOS['tamanho_bloco_csv']
+    )
+    
+    for bloco in leitor:
+        for coluna in esquema['datas']:
+            if coluna in bloco.columns:
+                bloco[coluna] = pd.to_datetime(bloco[coluna])
+        yield bloco
 
 def processar_upload_planilha(uploaded_file):
     """
@@ -26,7 +168,7 @@ def processar_upload_planilha(uploaded_file):
         elif uploaded_file.name.endswith('.csv'):
             df = pd.read_csv(uploaded_file)
         else:
-            st.error("Formato de arquivo não suportado. Use .xlsx ou .csv")
+            eventos.erro("Formato de arquivo não suportado. Use .xlsx ou .csv")
             return None
         
         # Mapeamento esperado das colunas
@@ -48,37 +190,31 @@ def processar_upload_planilha(uploaded_file):
                     break
         
         if len(colunas_mapeadas) < 6:
-            st.error("Planilha deve conter as colunas: Data, Backlog, Volume Veículo, Flutuantes, Erros Sorting, Erros Etiquetagem")
+            eventos.erro("Planilha deve conter as colunas: Data, Backlog, Volume Veículo, Flutuantes, Erros Sorting, Erros Etiquetagem")
             return None
         
-        # Processar dados
-        dados_processados = []
-        for _, row in df.iterrows():
-            try:
-                data = pd.to_datetime(row[colunas_mapeadas['data']]).strftime('%Y-%m-%d')
-                backlog = int(row[colunas_mapeadas['backlog']])
-                volume_veiculo = int(row[colunas_mapeadas['volume_veiculo']])
-                flutuantes = int(row[colunas_mapeadas['flutuantes']])
-                erros_sorting = int(row[colunas_mapeadas['erros_sorting']])
-                erros_etiquetagem = int(row[colunas_mapeadas['erros_etiquetagem']])
-                
-                dados_processados.append({
-                    'data': data,
-                    'backlog': backlog,
-                    'volume_veiculo': volume_veiculo,
-                    'volume_diario': backlog + volume_veiculo,
-                    'flutuantes': flutuantes,
-                    'erros_sorting': erros_sorting,
-                    'erros_etiquetagem': erros_etiquetagem
-                })
-            except Exception as e:
-                st.warning(f"Erro ao processar linha: {e}")
-                continue
+        # Processar dados (conversão por coluna)
+        colunas = {campo: colunas_mapeadas[campo] for campo in colunas_esperadas}
+        registros, erros = converter_tabela_dados_diarios(df, colunas, formatos_data=())
+        exibir_relatorio_erros_linhas(erros)
+        
+        dados_processados = [
+            {
+                'data': registro['data'],
+                'backlog': registro['backlog'],
+                'volume_veiculo': registro['volume_veiculo'],
+                'volume_diario': registro['backlog'] + registro['volume_veiculo'],
+                'flutuantes': registro['flutuantes'],
+                'erros_sorting': registro['erros_sorting'],
+                'erros_etiquetagem': registro['erros_etiquetagem']
+            }
+            for registro in registros
+        ]
         
         return dados_processados
         
     except Exception as e:
-        st.error(f"Erro ao processar arquivo: {e}")
+        eventos.erro(f"Erro ao processar arquivo: {e}")
         return None
 
 def exportar_dados_excel(dados, nome_arquivo="relatorio_operacao.xlsx"):
@@ -160,7 +296,7 @@ def exportar_dados_excel(dados, nome_arquivo="relatorio_operacao.xlsx"):
         return nome_arquivo
         
     except Exception as e:
-        st.error(f"Erro ao exportar dados: {e}")
+        eventos.erro(f"Erro ao exportar dados: {e}")
         return None
 
 def gerar_relatorio_resumo(dados):
@@ -170,25 +306,27 @@ def gerar_relatorio_resumo(dados):
     if not dados:
         return None
     
-    df = pd.DataFrame(dados)
-    df['data'] = pd.to_datetime(df['data'])
+    modelo = obter_modelo(dados)
+    df = modelo.dias
+    totais = modelo.somas()
     
     # Métricas gerais
-    total_dias = len(df)
-    total_pacotes = df['volume_diario'].sum()
-    media_diaria = df['volume_diario'].mean()
+    total_dias = totais['dias']
+    total_pacotes = totais['volume_diario']
+    media_diaria = total_pacotes / total_dias
     
-    # Taxas médias
-    taxa_media_flutuantes = (df['flutuantes'].sum() / total_pacotes * 100)
-    taxa_media_sorting = (df['erros_sorting'].sum() / total_pacotes * 100)
-    taxa_media_etiquetagem = (df['erros_etiquetagem'].sum() / total_pacotes * 100)
+    # Taxas médias (mesma conta dos cartões do Dashboard Manual)
+    metricas = calcular_metricas_de_somas(totais)
+    taxa_media_flutuantes = metricas['taxa_flutuantes']
+    taxa_media_sorting = metricas['taxa_erros_sorting']
+    taxa_media_etiquetagem = metricas['taxa_erros_etiquetagem']
     
     # Melhor e pior dia
     melhor_dia = df.loc[df['flutuantes'].idxmin()]
     pior_dia = df.loc[df['flutuantes'].idxmax()]
     
     relatorio = {
-        'periodo_analise': f"{df['data'].min().strftime('%d/%m/%Y')} a {df['data'].max().strftime('%d/%m/%Y')}",
+        'periodo_analise': f"{modelo.primeira_data.strftime('%d/%m/%Y')} a {modelo.ultima_data.strftime('%d/%m/%Y')}",
         'total_dias': total_dias,
         'total_pacotes': total_pacotes,
         'media_diaria': media_diaria,
@@ -211,203 +349,221 @@ def gerar_relatorio_resumo(dados):
 
 def backup_dados(dados):
     """
-    Cria backup dos dados
+    Cria backup compactado dos dados (reaproveita um backup idêntico já existente)
     """
     try:
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        nome_backup = f"backup_dados_{timestamp}.json"
-        
-        with open(nome_backup, 'w', encoding='utf-8') as f:
-            json.dump(dados, f, ensure_ascii=False, indent=2)
+        nome_backup, novo = criar_backup(dados)
         
-        st.success(f"✅ Backup criado: {nome_backup}")
+        if novo:
+            eventos.sucesso(f"✅ Backup criado: {nome_backup}")
+        else:
+            eventos.info(f"♻️ Dados iguais ao backup {nome_backup}; nenhum arquivo novo criado")
         return nome_backup
     except Exception as e:
-        st.error(f"❌ **ERRO AO CRIAR BACKUP:**")
-        st.error(f"**Tipo:** {type(e).__name__}")
-        st.error(f"**Mensagem:** {str(e)}")
+        eventos.erro(f"❌ **ERRO AO CRIAR BACKUP:**")
+        eventos.erro(f"**Tipo:** {type(e).__name__}")
+        eventos.erro(f"**Mensagem:** {str(e)}")
         return None
 
 # ============================================================================
 # FUNÇÕES DE INTEGRAÇÃO COM BANCO DE DADOS
 # ============================================================================
 
-def salvar_dados_operacao(dados: list) -> bool:
+def salvar_dados_operacao(dados: list, incremental: bool = True, alterados: list = None,
+                          removidos: list = None) -> bool:
     """
     Salva dados de operação no banco de dados e localmente
+    (modo incremental envia ao banco apenas as datas novas, alteradas ou removidas).
+    Com alterados/removidos (datas editadas na tela), o armazenamento local grava só esses
+    dias em vez de comparar a série inteira.
     """
     try:
-        st.info(f"🔄 Salvando {len(dados)} registros...")
+        eventos.info(f"🔄 Salvando {len(dados)} registros...")
         
         # Salvar localmente (backup)
         if DADOS['backup_automatico']:
-            st.info("📦 Criando backup...")
+            eventos.info("📦 Criando backup...")
             backup_dados(dados)
         
         # Salvar no Supabase se conectado
         if DB_AVAILABLE and db_manager.is_connected():
-            st.info("🌐 Tentando salvar no Supabase...")
-            success = db_manager.save_dados_operacao(dados)
+            eventos.info("🌐 Tentando salvar no Supabase...")
+            estado = armazenamento_local().estado_sincronizacao()
+            # Com estado de sincronização a diferença é calculada localmente (sem baixar a tabela)
+            versoes = estado['versoes'] if incremental and estado['marca'] else None
+            success = db_manager.save_dados_operacao(dados, incremental, versoes_sincronizadas=versoes)
             if success:
-                st.success(MENSAGENS['dados_sincronizados'])
+                armazenamento_local().salvar_estado_sincronizacao(estado['marca'], {
+                    dado['data']: db_manager.impressao_dados_operacao(dado) for dado in dados
+                })
+                eventos.sucesso(MENSAGENS['dados_sincronizados'])
             else:
-                st.warning("⚠️ Falha ao salvar no Supabase, salvando apenas localmente")
+                eventos.aviso("⚠️ Falha ao salvar no Supabase, salvando apenas localmente")
         
-        # Sempre salvar localmente como fallback
-        st.info("💾 Salvando no arquivo local...")
-        with open(DADOS['arquivo_saida'], 'w', encoding='utf-8') as f:
-            json.dump(dados, f, ensure_ascii=False, indent=2)
-        st.success(MENSAGENS['sucesso_salvar'])
+        # Sempre salvar localmente como fallback (apenas os dias novos, alterados ou removidos)
+        eventos.info("💾 Salvando no armazenamento local...")
+        if alterados is None and removidos is None:
+            gravacao = armazenamento_local().salvar(dados)
+        else:
+            datas = set(alterados or [])
+            armazenamento_local().salvar_dias([dado for dado in dados if dado['data'] in datas], removidos or [])
+            gravacao = {'gravados': len(datas), 'removidos': len(removidos or [])}
+        eventos.sucesso(f"{MENSAGENS['sucesso_salvar']} ({gravacao['gravados']} dia(s) gravado(s), "
+                        f"{gravacao['removidos']} removido(s))")
         return True
             
     except Exception as e:
-        st.error(f"❌ **ERRO AO SALVAR DADOS OPERAÇÃO:**")
-        st.error(f"**Tipo:** {type(e).__name__}")
-        st.error(f"**Mensagem:** {str(e)}")
-        st.error("**Stack trace:**")
+        eventos.erro(f"❌ **ERRO AO SALVAR DADOS OPERAÇÃO:**")
+        eventos.erro(f"**Tipo:** {type(e).__name__}")
+        eventos.erro(f"**Mensagem:** {str(e)}")
+        eventos.erro("**Stack trace:**")
         import traceback
-        st.code(traceback.format_exc())
+        eventos.codigo(traceback.format_exc())
         return False
 
+def sincronizar_dados_operacao(dados_locais: list):
+    """
+    Sincronização incremental de dados_operacao entre o arquivo local e o Supabase.
+    Recebe apenas os dias alterados no banco desde a marca d'água (updated_at), envia apenas
+    os dias alterados localmente desde a última sincronização e mescla pela data, então o
+    tempo cresce com as alterações e não com o histórico. Um dia alterado dos dois lados
+    fica com a versão local, que é enviada ao banco.
+    Retorna a série mesclada ordenada por data, ou None se o banco não pôde ser lido.
+    """
+    estado = armazenamento_local().estado_sincronizacao()
+    marca, versoes = estado['marca'], dict(estado['versoes'])
+    por_data = {dado['data']: dado for dado in dados_locais if 'data' in dado}
+    
+    if marca and not set(versoes) <= set(por_data):
+        # O arquivo local perdeu dias já sincronizados (apagado ou editado à mão): recomeçar do zero
+        marca, versoes = None, {}
+    
+    versao = db_manager.impressao_dados_operacao
+    pendentes = {data for data, dado in por_data.items() if marca and versoes.get(data) != versao(dado)}
+    
+    alterados = db_manager.load_dados_operacao_alterados(marca)
+    if alterados is None:
+        return None
+    
+    coluna = SINCRONIZACAO['coluna_marca']['dados_operacao']
+    recebidos = 0
+    for registro in alterados:
+        data = registro['data']
+        if registro.get(coluna) and (marca is None or pd.Timestamp(registro[coluna]) > pd.Timestamp(marca)):
+            marca = registro[coluna]
+        versoes[data] = versao(registro)
+        # A versão local pendente prevalece; releituras da margem e o eco dos envios não mudam nada
+        if data in pendentes or (data in por_data and versao(por_data[data]) == versoes[data]):
+            continue
+        por_data[data] = {'data': data, **{campo: registro[campo] for campo in db_manager.CAMPOS_DADOS_OPERACAO}}
+        recebidos += 1
+    
+    # Dias apagados no banco: a contagem só diverge quando há remoções, e só então as datas são listadas
+    total_banco = db_manager.contar_registros('dados_operacao')
+    if total_banco is not None and total_banco != len(versoes):
+        datas_banco = set(db_manager.listar_datas_operacao())
+        for data in set(versoes) - datas_banco:
+            del versoes[data]
+            if data not in pendentes:
+                por_data.pop(data, None)
+                recebidos += 1
+    
+    dados = sorted(por_data.values(), key=lambda dado: dado['data'])
+    enviados = [dado for dado in dados if versoes.get(dado['data']) != versao(dado)]
+    if enviados:
+        if db_manager.sync_local_to_supabase(dados, versoes_sincronizadas=versoes):
+            versoes = {dado['data']: versao(dado) for dado in dados}
+        else:
+            eventos.notificar("⚠️ Alterações locais não enviadas ao Supabase; nova tentativa na próxima sincronização", "warning")
+    
+    if recebidos:
+        armazenamento_local().salvar(dados)
+    armazenamento_local().salvar_estado_sincronizacao(marca, versoes)
+    
+    eventos.notificar(f"🔄 Sincronizado com o Supabase: {recebidos} dia(s) recebido(s), {len(enviados)} enviado(s)", "info")
+    return dados
+
 def carregar_dados_operacao() -> list:
     """
-    Carrega dados de operação do banco de dados ou arquivo local
-    Prioriza dados locais quando são mais recentes que os do banco
+    Carrega dados de operação do armazenamento local, sincronizado de forma incremental com o
+    banco de dados quando conectado (sincronizar_dados_operacao)
     """
-    import time  # Importar time no início da função
-    
     try:
-        # Carregar dados locais primeiro para verificar se existem
-        dados_locais = []
-        if os.path.exists(DADOS['arquivo_saida']):
-            try:
-                with open(DADOS['arquivo_saida'], 'r', encoding='utf-8') as f:
-                    dados_locais = json.load(f)
-            except:
-                dados_locais = []
+        dados_locais = armazenamento_local().carregar()
         
-        # Tentar carregar do Supabase
-        dados_supabase = []
         if DB_AVAILABLE and db_manager.is_connected():
-            status_placeholder = st.empty()
-            status_placeholder.info("🔄 Tentando carregar dados do Supabase...")
+            # Barra de status apenas enquanto a sincronização roda; o resultado vai para as notificações
+            progresso = eventos.Progresso()
+            progresso.atualizar("🔄 Sincronizando dados com o Supabase...")
             
             try:
-                dados_supabase = db_manager.load_dados_operacao()
-                if dados_supabase:
-                    status_placeholder.success(f"✅ Carregados {len(dados_supabase)} registros do Supabase")
-                else:
-                    status_placeholder.warning("⚠️ Nenhum dado encontrado no Supabase")
+                dados = sincronizar_dados_operacao(dados_locais)
             except Exception as e:
-                status_placeholder.warning(f"⚠️ Erro ao carregar do Supabase: {e}")
-                dados_supabase = []
+                eventos.notificar(f"⚠️ Erro ao sincronizar com o Supabase: {e}", "warning")
+                dados = None
+            finally:
+                progresso.encerrar()
             
-            time.sleep(3)
-            status_placeholder.empty()
-        
-        # Decidir qual fonte de dados usar
-        if dados_locais and dados_supabase:
-            # Comparar datas para decidir qual é mais recente
-            try:
-                # Encontrar data mais recente dos dados locais
-                datas_locais = [datetime.strptime(d['data'], '%Y-%m-%d') for d in dados_locais if 'data' in d]
-                data_max_local = max(datas_locais) if datas_locais else None
-                
-                # Encontrar data mais recente dos dados do banco
-                datas_banco = [datetime.strptime(d['data'], '%Y-%m-%d') for d in dados_supabase if 'data' in d]
-                data_max_banco = max(datas_banco) if datas_banco else None
-                
-                if data_max_local and data_max_banco:
-                    if data_max_local > data_max_banco:
-                        st.info(f"📅 Dados locais são mais recentes ({data_max_local.strftime('%d/%m/%Y')} vs {data_max_banco.strftime('%d/%m/%Y')})")
-                        st.info("💾 Usando dados locais")
-                        return dados_locais
-                    else:
-                        st.info(f"📅 Dados do banco são mais recentes ({data_max_banco.strftime('%d/%m/%Y')} vs {data_max_local.strftime('%d/%m/%Y')})")
-                        st.info("🌐 Usando dados do banco")
-                        return dados_supabase
-                else:
-                    # Se não conseguiu comparar datas, usar dados locais por segurança
-                    st.info("📅 Não foi possível comparar datas. Usando dados locais por segurança.")
-                    return dados_locais
-                    
-            except Exception as e:
-                st.warning(f"⚠️ Erro ao comparar datas: {e}. Usando dados locais.")
+            if dados is not None:
+                return dados
+            if dados_locais:
+                eventos.notificar(f"💾 Usando {len(dados_locais)} registros do armazenamento local", "info")
                 return dados_locais
         
-        elif dados_locais:
-            # Só dados locais disponíveis
-            st.info(f"💾 Carregados {len(dados_locais)} registros do arquivo local")
+        if dados_locais:
+            eventos.notificar(f"💾 Carregados {len(dados_locais)} registros do armazenamento local", "info")
             return dados_locais
         
-        elif dados_supabase:
-            # Só dados do banco disponíveis
-            st.info(f"🌐 Carregados {len(dados_supabase)} registros do Supabase")
-            return dados_supabase
-        
-        else:
-            # Nenhum dado disponível
-            st.info("📝 Nenhum dado encontrado. Criando arquivo vazio...")
-            # Criar arquivo vazio se não existir
-            if not os.path.exists(DADOS['arquivo_saida']):
-                with open(DADOS['arquivo_saida'], 'w', encoding='utf-8') as f:
-                    json.dump([], f, ensure_ascii=False, indent=2)
-                st.success("✅ Arquivo local criado com sucesso")
-            return []
+        eventos.notificar("📝 Nenhum dado encontrado.", "info")
+        return []
         
     except Exception as e:
-        # Em caso de erro, tentar carregar dados locais
-        st.error(f"❌ Erro ao carregar dados: {e}")
-        try:
-            if os.path.exists(DADOS['arquivo_saida']):
-                with open(DADOS['arquivo_saida'], 'r', encoding='utf-8') as f:
-                    dados = json.load(f)
-                st.info(f"✅ Carregados {len(dados)} registros do arquivo local após erro")
-                return dados
-        except:
-            pass
-        
-        # Criar arquivo vazio como último recurso
-        try:
-            with open(DADOS['arquivo_saida'], 'w', encoding='utf-8') as f:
-                json.dump([], f, ensure_ascii=False, indent=2)
-            st.info("✅ Arquivo local criado após erro")
-            return []
-        except Exception as e2:
-            st.error(f"❌ Erro ao criar arquivo local: {e2}")
-            return []
+        eventos.erro(f"❌ Erro ao carregar dados: {e}")
+        return []
+
+def limpar_dados_locais() -> bool:
+    """
+    Apaga os dias guardados localmente e o estado da sincronização
+    (com o Supabase conectado, o próximo carregamento baixa tudo novamente)
+    """
+    try:
+        armazenamento_local().limpar()
+        return True
+    except Exception as e:
+        eventos.erro(f"❌ Erro ao limpar dados locais: {e}")
+        return False
 
-def salvar_dados_validacao(df: pd.DataFrame, arquivo_origem: str = None) -> bool:
+def salvar_dados_validacao(df: pd.DataFrame, arquivo_origem: str = None, tamanho_lote: int = None) -> bool:
     """
-    Salva dados de validação no banco de dados
+    Salva dados de validação no banco de dados em lotes
     """
     try:
         if DB_AVAILABLE and db_manager.is_connected():
-            success = db_manager.save_dados_validacao(df, arquivo_origem)
+            success = db_manager.save_dados_validacao(df, arquivo_origem, tamanho_lote)
             if success:
-                st.success("✅ Dados de validação salvos no banco!")
+                eventos.sucesso("✅ Dados de validação salvos no banco!")
             return success
         else:
-            st.warning("⚠️ Supabase não conectado. Dados não salvos no banco.")
+            eventos.aviso("⚠️ Supabase não conectado. Dados não salvos no banco.")
             return False
             
     except Exception as e:
-        st.error(f"❌ Erro ao salvar dados de validação: {e}")
+        eventos.erro(f"❌ Erro ao salvar dados de validação: {e}")
         return False
 
-def carregar_dados_validacao(limit: int = 1000) -> pd.DataFrame:
+def carregar_dados_validacao(limit: int = None, colunas: list = None) -> pd.DataFrame:
     """
-    Carrega dados de validação do banco de dados
+    Carrega dados de validação do banco de dados (colunas=None traz todos os campos)
     """
     try:
         if DB_AVAILABLE and db_manager.is_connected():
-            return db_manager.load_dados_validacao(limit)
+            return db_manager.load_dados_validacao(limit, colunas=colunas)
         else:
-            st.warning("⚠️ Supabase não conectado. Carregando dados locais.")
+            eventos.aviso("⚠️ Supabase não conectado. Carregando dados locais.")
             return pd.DataFrame()
             
     except Exception as e:
-        st.error(f"❌ Erro ao carregar dados de validação: {e}")
+        eventos.erro(f"❌ Erro ao carregar dados de validação: {e}")
         return pd.DataFrame()
 
 def salvar_flutuantes_operador(flutuantes_data: dict, data_operacao: str) -> bool:
@@ -418,14 +574,14 @@ def salvar_flutuantes_operador(flutuantes_data: dict, data_operacao: str) -> boo
         if DB_AVAILABLE and db_manager.is_connected():
             success = db_manager.save_flutuantes_operador(flutuantes_data, data_operacao)
             if success:
-                st.success("✅ Flutuantes por operador salvos no banco!")
+                eventos.sucesso("✅ Flutuantes por operador salvos no banco!")
             return success
         else:
-            st.warning("⚠️ Supabase não conectado. Dados não salvos no banco.")
+            eventos.aviso("⚠️ Supabase não conectado. Dados não salvos no banco.")
             return False
             
     except Exception as e:
-        st.error(f"❌ Erro ao salvar flutuantes por operador: {e}")
+        eventos.erro(f"❌ Erro ao salvar flutuantes por operador: {e}")
         return False
 
 def carregar_flutuantes_operador(data_operacao: str = None) -> dict:
@@ -436,11 +592,11 @@ def carregar_flutuantes_operador(data_operacao: str = None) -> dict:
         if DB_AVAILABLE and db_manager.is_connected():
             return db_manager.load_flutuantes_operador(data_operacao)
         else:
-            st.warning("⚠️ Supabase não conectado.")
+            eventos.aviso("⚠️ Supabase não conectado.")
             return {}
             
     except Exception as e:
-        st.error(f"❌ Erro ao carregar flutuantes por operador: {e}")
+        eventos.erro(f"❌ Erro ao carregar flutuantes por operador: {e}")
         return {}
 
 def sincronizar_dados_locais(dados_locais: list) -> bool:
@@ -449,13 +605,13 @@ def sincronizar_dados_locais(dados_locais: list) -> bool:
     """
     try:
         if DB_AVAILABLE and db_manager.is_connected():
-            return db_manager.sync_local_to_supabase(dados_locais)
+            return sincronizar_dados_operacao(dados_locais) is not None
         else:
-            st.warning("⚠️ Supabase não conectado. Sincronização não possível.")
+            eventos.aviso("⚠️ Supabase não conectado. Sincronização não possível.")
             return False
             
     except Exception as e:
-        st.error(f"❌ Erro na sincronização: {e}")
+        eventos.erro(f"❌ Erro na sincronização: {e}")
         return False
 
 def obter_estatisticas_banco() -> dict:
@@ -469,229 +625,335 @@ def obter_estatisticas_banco() -> dict:
             return {}
             
     except Exception as e:
-        st.error(f"❌ Erro ao obter estatísticas: {e}")
+        eventos.erro(f"❌ Erro ao obter estatísticas: {e}")
         return {}
 
+def limpar_cache_banco(*tabelas: str):
+    """
+    Descarta as leituras do banco em cache (todas, ou apenas as das tabelas informadas)
+    """
+    if DB_AVAILABLE:
+        db_manager.invalidar_cache(*tabelas)
+
+def sincronizar_replica_local() -> dict:
+    """
+    Baixa para a réplica local (DuckDB) as linhas novas das tabelas analíticas.
+    Retorna {tabela: linhas recebidas}; vazio se a réplica estiver desativada ou offline.
+    """
+    try:
+        if DB_AVAILABLE and db_manager.replica is not None and db_manager.is_connected():
+            return db_manager.sincronizar_replica_local()
+        return {}
+        
+    except Exception as e:
+        eventos.erro(f"❌ Erro ao sincronizar a réplica local: {e}")
+        return {}
+
+def buscar_importacao(tipo: str, hash_conteudo: str):
+    """
+    Importação já registrada de um arquivo com o mesmo conteúdo para o tipo de CSV.
+    Retorna o registro (arquivo, linhas, registros, datas, importado_em) ou None.
+    """
+    if not DB_AVAILABLE:
+        return None
+    return db_manager.buscar_importacao(tipo, hash_conteudo)
+
+def registrar_importacao(tipo: str, hash_conteudo: str, arquivo: str, linhas: int, registros: int,
+                         datas=None, duracao_segundos: float = None) -> bool:
+    """
+    Registra um arquivo importado com sucesso: linhas lidas, registros gravados, período
+    coberto (menor e maior das datas informadas) e duração da importação
+    """
+    if not DB_AVAILABLE:
+        return False
+
+    datas = pd.to_datetime(pd.Series(list(datas if datas is not None else []), dtype=object), errors='coerce').dropna()
+    return db_manager.registrar_importacao({
+        'tipo': tipo,
+        'hash_conteudo': hash_conteudo,
+        'arquivo': arquivo,
+        'linhas': int(linhas),
+        'registros': int(registros),
+        'data_inicio': datas.min().strftime('%Y-%m-%d') if not datas.empty else None,
+        'data_fim': datas.max().strftime('%Y-%m-%d') if not datas.empty else None,
+        'duracao_segundos': round(duracao_segundos, 2) if duracao_segundos is not None else None,
+        'importado_em': datetime.now().isoformat()
+    })
+
+def descrever_importacao(importacao: dict) -> str:
+    """Texto curto de uma importação registrada, para avisos de arquivo repetido"""
+    periodo = ''
+    if importacao.get('data_inicio'):
+        periodo = f", de {importacao['data_inicio']} a {importacao.get('data_fim') or importacao['data_inicio']}"
+    return (f"{importacao.get('arquivo')} em {str(importacao.get('importado_em', ''))[:16].replace('T', ' ')} "
+            f"({importacao.get('linhas', 0)} linhas, {importacao.get('registros', 0)} registros{periodo})")
+
 # ============================================================================
 # FUNÇÕES PARA PACOTES FLUTUANTES
 # ============================================================================
 
+# Colunas obrigatórias do CSV de pacotes flutuantes
+COLUNAS_CSV_FLUTUANTES = [
+    'Estacao', 'Semana', 'Data de Recebimento', 'Destino', 'Aging',
+    'Tracking Number', 'Foi Expedido', 'Operador', 'Status SPX',
+    'Status', 'Foi encontrado', 'Descricao do item', 'Operador Real'
+]
+
+# Colunas booleanas do CSV de flutuantes -> coluna normalizada
+COLUNAS_BOOLEANAS_FLUTUANTES = {
+    'Foi Expedido': 'foi_expedido',
+    'Foi encontrado': 'foi_encontrado',
+    'Status': 'status'
+}
+
+def remover_acentos(texto: str) -> str:
+    """
+    Remove acentos de um texto
+    """
+    texto_normalizado = unicodedata.normalize('NFKD', texto)
+    return ''.join([c for c in texto_normalizado if not unicodedata.combining(c)])
+
+def normalizar_coluna_booleana(serie: pd.Series, valores_extras: dict = None) -> tuple:
+    """
+    Converte uma coluna de Sim/Não, True/False, 1/0 etc. para booleano.
+    A normalização (minúsculas, sem acentos) é feita uma vez por valor distinto e
+    o resultado é expandido para as linhas pelos códigos de categoria.
+    Retorna: (coluna booleana, {valor não mapeado: quantidade})
+    """
+    # Grafias do config e extras passam pela mesma normalização dos valores da coluna
+    grafias = {valor: True for valor in VALORES_BOOLEANOS['verdadeiro']}
+    grafias.update({valor: False for valor in VALORES_BOOLEANOS['falso']})
+    grafias.update(valores_extras or {})
+    mapa = {remover_acentos(str(valor).strip().lower()): booleano for valor, booleano in grafias.items()}
+    
+    codigos, categorias = pd.factorize(serie)
+    
+    resultado_categorias = []
+    nao_mapeados = {}
+    contagens = np.bincount(codigos[codigos >= 0], minlength=len(categorias))
+    for posicao, valor in enumerate(categorias):
+        if isinstance(valor, float) and valor.is_integer():
+            valor = int(valor)
+        chave = remover_acentos(str(valor).strip().lower())
+        booleano = mapa.get(chave)
+        if booleano is None:
+            if chave:
+                nao_mapeados[str(valor)] = int(contagens[posicao])
+            booleano = False
+        resultado_categorias.append(booleano)
+    
+    # Código -1 (valor vazio) vira False
+    valores = np.append(np.array(resultado_categorias, dtype=bool), False)
+    return pd.Series(valores[codigos], index=serie.index), nao_mapeados
+
+def transformar_bloco_flutuantes(df: pd.DataFrame) -> tuple:
+    """
+    Limpa e normaliza um DataFrame (ou bloco) do CSV de pacotes flutuantes
+    Retorna: (DataFrame normalizado, {coluna: {valor não mapeado: quantidade}})
+    """
+    # Limpar e processar dados
+    df = df.dropna(subset=['Operador Real'])  # Remover linhas sem operador real
+    df = df[df['Operador Real'].str.strip() != '']  # Remover operadores vazios
+    
+    # Processar campos booleanos ("Foi encontrado" é o campo principal para determinar se foi encontrado;
+    # "Status" é mantido como backup mas não é usado para cálculo)
+    valores_nao_mapeados = {}
+    for coluna, coluna_destino in COLUNAS_BOOLEANAS_FLUTUANTES.items():
+        if coluna in df.columns:
+            df[coluna_destino], nao_mapeados = normalizar_coluna_booleana(
+                df[coluna], VALORES_BOOLEANOS['por_coluna'].get(coluna)
+            )
+            if nao_mapeados:
+                valores_nao_mapeados[coluna] = nao_mapeados
+            # Remover coluna original
+            df = df.drop(coluna, axis=1)
+    
+    # Processar campo "Destino" - preencher vazios
+    if 'Destino' in df.columns:
+        df['Destino'] = df['Destino'].fillna('Não informado')
+    
+    # Processar campo "Aging" - garantir que seja numérico
+    if 'Aging' in df.columns:
+        df['Aging'] = pd.to_numeric(df['Aging'], errors='coerce').fillna(0).astype(int)
+    
+    return df, valores_nao_mapeados
+
+def exibir_valores_nao_mapeados(valores_nao_mapeados: dict):
+    """
+    Exibe um aviso por coluna com os valores booleanos não reconhecidos
+    """
+    for coluna, nao_mapeados in valores_nao_mapeados.items():
+        exemplos = ', '.join(f"'{valor}' ({quantidade})" for valor, quantidade in list(nao_mapeados.items())[:5])
+        eventos.aviso(f"⚠️ Valores não reconhecidos em '{coluna}' considerados como Não: {exemplos}")
+
+def ler_csv_flutuantes(uploaded_file) -> pd.DataFrame:
+    """
+    Lê e normaliza o CSV de pacotes flutuantes sem exibir mensagens.
+    Os valores booleanos não reconhecidos ficam em df.attrs['valores_nao_mapeados'].
+    Lança ValueError se o formato ou as colunas do arquivo forem inválidos
+    """
+    if not uploaded_file.name.endswith('.csv'):
+        raise ValueError("Formato de arquivo não suportado. Use .csv")
+    
+    df = pd.read_csv(uploaded_file)
+    
+    # Verificar colunas obrigatórias
+    colunas_faltantes = [col for col in COLUNAS_CSV_FLUTUANTES if col not in df.columns]
+    if colunas_faltantes:
+        raise ValueError(
+            f"Colunas obrigatórias não encontradas: {', '.join(colunas_faltantes)}. "
+            f"Colunas esperadas: {', '.join(COLUNAS_CSV_FLUTUANTES)}"
+        )
+    
+    df, valores_nao_mapeados = transformar_bloco_flutuantes(df)
+    
+    # Valores não reconhecidos são tratados como False e ficam disponíveis para conferência
+    df.attrs['valores_nao_mapeados'] = valores_nao_mapeados
+    return df
+
 def processar_csv_flutuantes(uploaded_file):
     """
     Processa upload de CSV de pacotes flutuantes e retorna dados formatados
+    (a leitura de um conteúdo já enviado é reaproveitada, ver ler_upload_em_cache)
     """
     try:
-        if uploaded_file.name.endswith('.csv'):
-            df = pd.read_csv(uploaded_file)
-        else:
-            st.error("Formato de arquivo não suportado. Use .csv")
-            return None
-        
-        # Verificar colunas obrigatórias
-        colunas_obrigatorias = [
-            'Estacao', 'Semana', 'Data de Recebimento', 'Destino', 'Aging',
-            'Tracking Number', 'Foi Expedido', 'Operador', 'Status SPX',
-            'Status', 'Foi encontrado', 'Descricao do item', 'Operador Real'
-        ]
-        
-        colunas_faltantes = [col for col in colunas_obrigatorias if col not in df.columns]
-        if colunas_faltantes:
-            st.error(f"Colunas obrigatórias não encontradas: {', '.join(colunas_faltantes)}")
-            st.info("Colunas esperadas: " + ", ".join(colunas_obrigatorias))
-            return None
-        
-        # Limpar e processar dados
-        df = df.dropna(subset=['Operador Real'])  # Remover linhas sem operador real
-        df = df[df['Operador Real'].str.strip() != '']  # Remover operadores vazios
-        
-        # Processar campo "Foi Expedido"
-        if 'Foi Expedido' in df.columns:
-            df['foi_expedido'] = df['Foi Expedido'].astype(str).str.strip()
-            # Mapear valores específicos do CSV
-            mapeamento_expedido = {
-                'Pacote Flutuante': False,
-                'Pacote Revertido': True,
-                'Sim': True,
-                'sim': True,
-                'S': True,
-                's': True,
-                'Yes': True,
-                'yes': True,
-                'Y': True,
-                'y': True,
-                '1': True,
-                'TRUE': True,
-                'True': True,
-                'true': True,
-                'Não': False,
-                'Nao': False,
-                'nao': False,
-                'não': False,
-                'N': False,
-                'n': False,
-                'No': False,
-                'no': False,
-                '0': False,
-                'FALSE': False,
-                'False': False,
-                'false': False
-            }
-            df['foi_expedido'] = df['foi_expedido'].map(mapeamento_expedido).fillna(False)
-            # Remover coluna original
-            df = df.drop('Foi Expedido', axis=1)
-        
-        # Processar campo "Foi encontrado" - este é o campo principal para determinar se foi encontrado
-        if 'Foi encontrado' in df.columns:
-            st.write("🔍 DEBUG: Processando campo 'Foi encontrado'")
-            st.write(f"Valores únicos originais: {df['Foi encontrado'].unique()}")
-            
-            df['foi_encontrado'] = df['Foi encontrado'].astype(str).str.strip()
-            st.write(f"Valores únicos após conversão: {df['foi_encontrado'].unique()}")
-            
-            # Mapear valores específicos do CSV
-            mapeamento_encontrado = {
-                'Sim': True,
-                'sim': True,
-                'S': True,
-                's': True,
-                'Yes': True,
-                'yes': True,
-                'Y': True,
-                'y': True,
-                '1': True,
-                'TRUE': True,
-                'True': True,
-                'true': True,
-                'Não': False,
-                'Nao': False,
-                'nao': False,
-                'não': False,
-                'N': False,
-                'n': False,
-                'No': False,
-                'no': False,
-                '0': False,
-                'FALSE': False,
-                'False': False,
-                'false': False
-            }
-            
-            # Mostrar mapeamento aplicado
-            for valor in df['foi_encontrado'].unique():
-                if valor in mapeamento_encontrado:
-                    st.write(f"Mapeamento: '{valor}' -> {mapeamento_encontrado[valor]}")
-                else:
-                    st.write(f"⚠️ Valor não mapeado: '{valor}'")
-            
-            df['foi_encontrado'] = df['foi_encontrado'].map(mapeamento_encontrado).fillna(False)
-            
-            st.write(f"Resultado final - True: {(df['foi_encontrado'] == True).sum()}, False: {(df['foi_encontrado'] == False).sum()}")
-            
-            # Remover coluna original
-            df = df.drop('Foi encontrado', axis=1)
-        
-        # Processar campo "Status" - manter como backup mas não usar para cálculo
-        if 'Status' in df.columns:
-            df['status'] = df['Status'].astype(str).str.strip()
-            # Mapear valores específicos do CSV
-            mapeamento_status = {
-                'TRUE': True,
-                'True': True,
-                'true': True,
-                'Sim': True,
-                'sim': True,
-                'S': True,
-                's': True,
-                'Yes': True,
-                'yes': True,
-                'Y': True,
-                'y': True,
-                '1': True,
-                'FALSE': False,
-                'False': False,
-                'false': False,
-                'Não': False,
-                'Nao': False,
-                'nao': False,
-                'não': False,
-                'N': False,
-                'n': False,
-                'No': False,
-                'no': False,
-                '0': False
-            }
-            df['status'] = df['status'].map(mapeamento_status).fillna(False)
-            # Remover coluna original
-            df = df.drop('Status', axis=1)
-        
-        # Processar campo "Destino" - preencher vazios
-        if 'Destino' in df.columns:
-            df['Destino'] = df['Destino'].fillna('Não informado')
-        
-        # Processar campo "Aging" - garantir que seja numérico
-        if 'Aging' in df.columns:
-            df['Aging'] = pd.to_numeric(df['Aging'], errors='coerce').fillna(0).astype(int)
+        df = ler_upload_em_cache(uploaded_file, 'flutuantes', ler_csv_flutuantes)
+        exibir_valores_nao_mapeados(df.attrs.get('valores_nao_mapeados', {}))
         
         if df.empty:
-            st.error("Nenhum dado válido encontrado após limpeza")
+            eventos.erro("Nenhum dado válido encontrado após limpeza")
             return None
         
-        st.success(f"✅ CSV processado com sucesso! {len(df)} registros válidos encontrados")
+        eventos.sucesso(f"✅ CSV processado com sucesso! {len(df)} registros válidos encontrados")
         return df
         
+    except ValueError as e:
+        eventos.erro(str(e))
+        return None
     except Exception as e:
-        st.error(f"Erro ao processar arquivo CSV: {e}")
+        eventos.erro(f"Erro ao processar arquivo CSV: {e}")
         return None
 
-def salvar_pacotes_flutuantes(df: pd.DataFrame, arquivo_origem: str = None, upsert: bool = True) -> bool:
+def salvar_pacotes_flutuantes(df: pd.DataFrame, arquivo_origem: str = None, upsert: bool = True, tamanho_lote: int = None) -> bool:
     """
-    Salva dados de pacotes flutuantes no banco de dados com opção de upsert
+    Salva dados de pacotes flutuantes no banco de dados com opção de upsert em lote
     """
     try:
         if DB_AVAILABLE and db_manager.is_connected():
-            success = db_manager.save_pacotes_flutuantes(df, arquivo_origem, upsert)
+            success = db_manager.save_pacotes_flutuantes(df, arquivo_origem, upsert, tamanho_lote)
             if success:
                 if upsert:
-                    st.success("✅ Pacotes flutuantes processados no banco (modo upsert)!")
+                    eventos.sucesso("✅ Pacotes flutuantes processados no banco (modo upsert)!")
                 else:
-                    st.success("✅ Pacotes flutuantes salvos no banco!")
+                    eventos.sucesso("✅ Pacotes flutuantes salvos no banco!")
             return success
         else:
-            st.warning("⚠️ Supabase não conectado. Dados não salvos no banco.")
+            eventos.aviso("⚠️ Supabase não conectado. Dados não salvos no banco.")
             return False
             
     except Exception as e:
-        st.error(f"❌ Erro ao salvar pacotes flutuantes: {e}")
+        eventos.erro(f"❌ Erro ao salvar pacotes flutuantes: {e}")
         return False
 
-def carregar_pacotes_flutuantes(limit: int = 1000, operador_real: str = None, data_inicio: str = None, data_fim: str = None) -> pd.DataFrame:
+def importar_csv_flutuantes_em_blocos(uploaded_file, arquivo_origem: str = None, upsert: bool = True, tamanho_bloco: int = None) -> dict:
     """
-    Carrega dados de pacotes flutuantes do banco de dados
+    Importa um CSV grande de pacotes flutuantes bloco a bloco: cada bloco é lido com tipos
+    explícitos, normalizado e gravado no banco antes do próximo ser lido.
+    Retorna resumo com linhas lidas, registros gravados, blocos e contagens do upsert.
+    """
+    resumo = {'linhas_lidas': 0, 'registros_validos': 0, 'blocos': 0, 'inseridos': 0, 'atualizados': 0,
+              'inalterados': 0, 'ignorados': 0, 'falhas': [], 'valores_nao_mapeados': {}}
+    
+    try:
+        if not DB_AVAILABLE or not db_manager.is_connected():
+            eventos.aviso("⚠️ Supabase não conectado. Dados não salvos no banco.")
+            return resumo
+        
+        colunas_faltantes = verificar_colunas_csv(uploaded_file, COLUNAS_CSV_FLUTUANTES)
+        if colunas_faltantes:
+            eventos.erro(f"Colunas obrigatórias não encontradas: {', '.join(colunas_faltantes)}")
+            eventos.info("Colunas esperadas: " + ", ".join(COLUNAS_CSV_FLUTUANTES))
+            return resumo
+        
+        progresso = eventos.Progresso()
+        
+        for bloco in ler_csv_em_blocos(uploaded_file, 'flutuantes', tamanho_bloco):
+            resumo['blocos'] += 1
+            resumo['linhas_lidas'] += len(bloco)
+            progresso.atualizar(f"📥 Bloco {resumo['blocos']}: {resumo['linhas_lidas']} linhas lidas...")
+            
+            bloco, nao_mapeados = transformar_bloco_flutuantes(bloco)
+            for coluna, valores in nao_mapeados.items():
+                acumulado = resumo['valores_nao_mapeados'].setdefault(coluna, {})
+                for valor, quantidade in valores.items():
+                    acumulado[valor] = acumulado.get(valor, 0) + quantidade
+            
+            if bloco.empty:
+                continue
+            
+            resumo['registros_validos'] += len(bloco)
+            if not db_manager.save_pacotes_flutuantes(bloco, arquivo_origem, upsert):
+                resumo['falhas'].append({'bloco': resumo['blocos'], 'registros': len(bloco)})
+                continue
+            
+            relatorio = db_manager.ultimo_relatorio_flutuantes or {}
+            for chave in ['inseridos', 'atualizados', 'inalterados', 'ignorados']:
+                resumo[chave] += relatorio.get(chave, 0)
+        
+        progresso.encerrar()
+        exibir_valores_nao_mapeados(resumo['valores_nao_mapeados'])
+        return resumo
+        
+    except Exception as e:
+        eventos.erro(f"❌ Erro ao importar CSV de flutuantes em blocos: {e}")
+        resumo['falhas'].append({'bloco': resumo['blocos'], 'erro': str(e)})
+        return resumo
+
+def carregar_pacotes_flutuantes(limit: int = None, operador_real: str = None, data_inicio: str = None, data_fim: str = None,
+                                colunas: list = None) -> pd.DataFrame:
+    """
+    Carrega dados de pacotes flutuantes do banco de dados (colunas=None traz todos os campos)
     """
     try:
         if DB_AVAILABLE and db_manager.is_connected():
-            return db_manager.load_pacotes_flutuantes(limit, operador_real, data_inicio, data_fim)
+            return db_manager.load_pacotes_flutuantes(limit, operador_real, data_inicio, data_fim, colunas=colunas)
         else:
-            st.warning("⚠️ Supabase não conectado.")
+            eventos.aviso("⚠️ Supabase não conectado.")
             return pd.DataFrame()
             
     except Exception as e:
-        st.error(f"❌ Erro ao carregar pacotes flutuantes: {e}")
+        eventos.erro(f"❌ Erro ao carregar pacotes flutuantes: {e}")
         return pd.DataFrame()
 
-def carregar_pacotes_flutuantes_multiplos_operadores(limit: int = 1000, operadores_reais: list = None, data_inicio: str = None, data_fim: str = None) -> pd.DataFrame:
+def carregar_pacotes_flutuantes_multiplos_operadores(limit: int = None, operadores_reais: list = None, data_inicio: str = None, data_fim: str = None,
+                                                     colunas: list = None) -> pd.DataFrame:
     """
     Carrega dados de pacotes flutuantes do banco de dados com suporte a múltiplos operadores
     """
     try:
         if DB_AVAILABLE and db_manager.is_connected():
-            return db_manager.load_pacotes_flutuantes_multiplos_operadores(limit, operadores_reais, data_inicio, data_fim)
+            return db_manager.load_pacotes_flutuantes_multiplos_operadores(limit, operadores_reais, data_inicio, data_fim, colunas=colunas)
+        else:
+            eventos.aviso("⚠️ Supabase não conectado.")
+            return pd.DataFrame()
+            
+    except Exception as e:
+        eventos.erro(f"❌ Erro ao carregar pacotes flutuantes: {e}")
+        return pd.DataFrame()
+
+def listar_operadores_flutuantes() -> pd.DataFrame:
+    """
+    Nomes distintos de operador_real dos flutuantes (agrupados no banco, sem baixar os pacotes)
+    """
+    try:
+        if DB_AVAILABLE and db_manager.is_connected():
+            return db_manager.listar_operadores_flutuantes()
         else:
-            st.warning("⚠️ Supabase não conectado.")
+            eventos.aviso("⚠️ Supabase não conectado.")
             return pd.DataFrame()
             
     except Exception as e:
-        st.error(f"❌ Erro ao carregar pacotes flutuantes: {e}")
+        eventos.erro(f"❌ Erro ao listar operadores de flutuantes: {e}")
         return pd.DataFrame()
 
 def obter_ranking_operadores_flutuantes() -> pd.DataFrame:
@@ -702,11 +964,11 @@ def obter_ranking_operadores_flutuantes() -> pd.DataFrame:
         if DB_AVAILABLE and db_manager.is_connected():
             return db_manager.get_ranking_operadores_flutuantes()
         else:
-            st.warning("⚠️ Supabase não conectado.")
+            eventos.aviso("⚠️ Supabase não conectado.")
             return pd.DataFrame()
             
     except Exception as e:
-        st.error(f"❌ Erro ao obter ranking de operadores: {e}")
+        eventos.erro(f"❌ Erro ao obter ranking de operadores: {e}")
         return pd.DataFrame()
 
 def obter_resumo_flutuantes_estacao() -> pd.DataFrame:
@@ -717,11 +979,11 @@ def obter_resumo_flutuantes_estacao() -> pd.DataFrame:
         if DB_AVAILABLE and db_manager.is_connected():
             return db_manager.get_resumo_flutuantes_estacao()
         else:
-            st.warning("⚠️ Supabase não conectado.")
+            eventos.aviso("⚠️ Supabase não conectado.")
             return pd.DataFrame()
             
     except Exception as e:
-        st.error(f"❌ Erro ao obter resumo por estação: {e}")
+        eventos.erro(f"❌ Erro ao obter resumo por estação: {e}")
         return pd.DataFrame()
 
 def obter_total_flutuantes_por_data(data_operacao: str) -> int:
@@ -735,7 +997,7 @@ def obter_total_flutuantes_por_data(data_operacao: str) -> int:
             return 0
             
     except Exception as e:
-        st.error(f"❌ Erro ao obter total de flutuantes: {e}")
+        eventos.erro(f"❌ Erro ao obter total de flutuantes: {e}")
         return 0
 
 def exportar_flutuantes_excel(df: pd.DataFrame, nome_arquivo: str = "relatorio_flutuantes.xlsx"):
@@ -823,16 +1085,116 @@ def exportar_flutuantes_excel(df: pd.DataFrame, nome_arquivo: str = "relatorio_f
         return nome_arquivo
         
     except Exception as e:
-        st.error(f"Erro ao exportar dados: {e}")
+        eventos.erro(f"Erro ao exportar dados: {e}")
         return None 
 
 # ============================================================================
 # FUNÇÕES PARA DADOS DIÁRIOS VIA CSV
 # ============================================================================
 
-def processar_csv_dados_diarios(uploaded_file):
+# Formatos de data aceitos nos CSVs de dados diários, em ordem de prioridade
+FORMATOS_DATA_DADOS_DIARIOS = ('%d/%m/%Y', '%d/%m/%y', '%Y-%m-%d')
+
+def converter_coluna_data(serie: pd.Series, formatos: tuple = FORMATOS_DATA_DADOS_DIARIOS) -> pd.Series:
     """
-    Processa upload de CSV de dados diários de operação e retorna dados formatados
+    Converte uma coluna inteira de datas.
+    Cada formato é aplicado uma vez sobre as linhas ainda não convertidas (normalmente a primeira
+    tentativa resolve a coluna toda); o que sobrar é interpretado pelo pandas valor a valor.
+    Valores inválidos ficam como NaT.
+    """
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return serie
+    
+    texto = serie.where(serie.isna(), serie.astype(str).str.strip())
+    convertida = pd.Series(pd.NaT, index=serie.index, dtype='datetime64[ns]')
+    pendentes = texto.notna()
+    
+    for formato in formatos:
+        if not pendentes.any():
+            break
+        convertida[pendentes] = pd.to_datetime(texto[pendentes], format=formato, errors='coerce')
+        pendentes = convertida.isna() & texto.notna()
+    
+    if pendentes.any():
+        convertida[pendentes] = pd.to_datetime(texto[pendentes], format='mixed', errors='coerce')
+    
+    return convertida
+
+def converter_coluna_inteira(serie: pd.Series) -> pd.Series:
+    """
+    Converte uma coluna para números inteiros (truncando como int()).
+    Valores não numéricos ficam como NaN.
+    """
+    if serie.dtype == object:
+        serie = serie.where(serie.isna(), serie.astype(str).str.strip())
+    numeros = pd.to_numeric(serie, errors='coerce').astype(float)
+    return np.trunc(numeros.where(np.isfinite(numeros)))
+
+def converter_tabela_dados_diarios(df: pd.DataFrame, colunas: dict, formatos_data: tuple = FORMATOS_DATA_DADOS_DIARIOS) -> tuple:
+    """
+    Converte um DataFrame de dados diários coluna a coluna
+    colunas: campo de destino -> coluna do arquivo ('data' é a data, os demais são inteiros)
+    Retorna: (registros válidos, relatório de erros com linha, coluna, valor e erro)
+    """
+    validas = pd.Series(True, index=df.index)
+    convertidas = {}
+    erros = []
+    
+    for campo, coluna in colunas.items():
+        if campo == 'data':
+            valores = converter_coluna_data(df[coluna], formatos_data)
+            mensagem = 'Data inválida'
+        else:
+            valores = converter_coluna_inteira(df[coluna])
+            mensagem = 'Valor numérico inválido'
+        
+        invalidas = valores.isna()
+        if invalidas.any():
+            posicoes = np.flatnonzero(invalidas.to_numpy())
+            erros.extend(
+                {'linha': int(posicao) + 1, 'coluna': coluna, 'valor': valor, 'erro': mensagem}
+                for posicao, valor in zip(posicoes, df[coluna].iloc[posicoes].tolist())
+            )
+        
+        validas &= ~invalidas
+        convertidas[campo] = valores
+    
+    tabela = pd.DataFrame(convertidas)[validas]
+    for campo in colunas:
+        if campo == 'data':
+            tabela[campo] = tabela[campo].dt.strftime('%Y-%m-%d')
+        else:
+            tabela[campo] = tabela[campo].astype('int64')
+    
+    erros.sort(key=lambda erro: erro['linha'])
+    return tabela.to_dict('records'), erros
+
+def exibir_relatorio_erros_linhas(erros: list, arquivo: str = None):
+    """
+    Exibe o relatório de linhas ignoradas na conversão
+    """
+    if not erros:
+        return
+    
+    linhas_ignoradas = len({erro['linha'] for erro in erros})
+    origem = f" em {arquivo}" if arquivo else ""
+    eventos.aviso(f"⚠️ {linhas_ignoradas} linha(s) ignorada(s){origem} por valores inválidos")
+    eventos.tabela(pd.DataFrame(erros).astype({'valor': str}))
+
+# Colunas do CSV de dados diários -> campos de dados_operacao
+COLUNAS_CSV_DADOS_DIARIOS = {
+    'data': 'Data',
+    'volume_veiculo': 'quantidade de pacotes',
+    'backlog': 'backlog',
+    'flutuantes': 'flutuantes',
+    'flutuantes_revertidos': 'encontrados',
+    'erros_sorting': 'erros segundo sorting',
+    'erros_etiquetagem': 'Erros etiquetagem'
+}
+
+def ler_csv_dados_diarios(uploaded_file) -> tuple:
+    """
+    Lê e converte um CSV de dados diários sem exibir mensagens (pode rodar em threads de trabalho)
     Mapeamento das colunas:
     - Data -> data
     - quantidade de pacotes -> volume_veiculo (pacotes do dia)
@@ -841,116 +1203,193 @@ def processar_csv_dados_diarios(uploaded_file):
     - encontrados -> flutuantes_revertidos (encontrados)
     - erros segundo sorting -> erros_sorting (gaiola errada)
     - Erros etiquetagem -> erros_etiquetagem
+    Retorna: (dados processados, relatório de erros por linha, exemplo de conversão de data)
+    Lança ValueError se o formato ou as colunas do arquivo forem inválidos
+    """
+    if not uploaded_file.name.endswith('.csv'):
+        raise ValueError("Formato de arquivo não suportado. Use .csv")
+    
+    df = pd.read_csv(uploaded_file)
+    
+    # Verificar se as colunas necessárias existem
+    colunas_necessarias = list(COLUNAS_CSV_DADOS_DIARIOS.values())
+    colunas_faltantes = [col for col in colunas_necessarias if col not in df.columns]
+    if colunas_faltantes:
+        raise ValueError(
+            f"Colunas obrigatórias não encontradas: {', '.join(colunas_faltantes)}. "
+            f"Colunas esperadas: {', '.join(colunas_necessarias)}"
+        )
+    
+    # Processar dados (conversão por coluna, formato de data detectado uma vez)
+    registros, erros = converter_tabela_dados_diarios(df, COLUNAS_CSV_DADOS_DIARIOS)
+    
+    dados_processados = [
+        {
+            'data': registro['data'],
+            'backlog': registro['backlog'],
+            'volume_veiculo': registro['volume_veiculo'],
+            'volume_diario': registro['backlog'] + registro['volume_veiculo'],
+            'flutuantes': registro['flutuantes'],
+            'flutuantes_revertidos': registro['flutuantes_revertidos'],
+            'erros_sorting': registro['erros_sorting'],
+            'erros_etiquetagem': registro['erros_etiquetagem']
+        }
+        for registro in registros
+    ]
+    
+    exemplo_data = (df['Data'].iloc[0], dados_processados[0]['data']) if dados_processados else None
+    return dados_processados, erros, exemplo_data
+
+def processar_csv_dados_diarios(uploaded_file):
+    """
+    Processa upload de CSV de dados diários de operação e retorna dados formatados
+    (ver ler_csv_dados_diarios para o mapeamento das colunas; a leitura de um conteúdo
+    já enviado é reaproveitada)
     """
     try:
-        if uploaded_file.name.endswith('.csv'):
-            df = pd.read_csv(uploaded_file)
-        else:
-            st.error("Formato de arquivo não suportado. Use .csv")
-            return None
-        
-        # Verificar se as colunas necessárias existem
-        colunas_necessarias = [
-            'Data', 'quantidade de pacotes', 'backlog', 'flutuantes', 
-            'encontrados', 'erros segundo sorting', 'Erros etiquetagem'
-        ]
-        
-        colunas_faltantes = [col for col in colunas_necessarias if col not in df.columns]
-        if colunas_faltantes:
-            st.error(f"Colunas obrigatórias não encontradas: {', '.join(colunas_faltantes)}")
-            st.info("Colunas esperadas: " + ", ".join(colunas_necessarias))
-            return None
-        
-        # Processar dados
-        dados_processados = []
-        for index, row in df.iterrows():
-            try:
-                # Converter data - tentar formato brasileiro primeiro (DD/MM/YYYY)
-                try:
-                    # Primeiro tenta formato brasileiro
-                    data = pd.to_datetime(row['Data'], format='%d/%m/%Y').strftime('%Y-%m-%d')
-                except:
-                    try:
-                        # Se falhar, tenta formato brasileiro com ano de 2 dígitos
-                        data = pd.to_datetime(row['Data'], format='%d/%m/%y').strftime('%Y-%m-%d')
-                    except:
-                        try:
-                            # Se falhar, tenta formato ISO (YYYY-MM-DD)
-                            data = pd.to_datetime(row['Data'], format='%Y-%m-%d').strftime('%Y-%m-%d')
-                        except:
-                            # Última tentativa: deixar o pandas tentar adivinhar
-                            data = pd.to_datetime(row['Data']).strftime('%Y-%m-%d')
-                
-                # Converter valores numéricos
-                quantidade_pacotes = int(row['quantidade de pacotes'])
-                backlog = int(row['backlog'])
-                flutuantes = int(row['flutuantes'])
-                encontrados = int(row['encontrados'])
-                erros_sorting = int(row['erros segundo sorting'])
-                erros_etiquetagem = int(row['Erros etiquetagem'])
-                
-                # Calcular volume diário total
-                volume_diario = backlog + quantidade_pacotes
-                
-                dados_processados.append({
-                    'data': data,
-                    'backlog': backlog,
-                    'volume_veiculo': quantidade_pacotes,
-                    'volume_diario': volume_diario,
-                    'flutuantes': flutuantes,
-                    'flutuantes_revertidos': encontrados,
-                    'erros_sorting': erros_sorting,
-                    'erros_etiquetagem': erros_etiquetagem
-                })
-                
-            except Exception as e:
-                st.warning(f"⚠️ Erro ao processar linha {index + 1}: {e}")
-                continue
+        dados_processados, erros, exemplo_data = ler_upload_em_cache(uploaded_file, 'dados_diarios', ler_csv_dados_diarios)
+        exibir_relatorio_erros_linhas(erros)
         
         if not dados_processados:
-            st.error("❌ Nenhum dado válido encontrado após processamento")
+            eventos.erro("❌ Nenhum dado válido encontrado após processamento")
             return None
         
         # Mostrar exemplo de conversão de data para o usuário
-        if dados_processados:
-            primeira_data_original = df['Data'].iloc[0] if not df.empty else None
-            primeira_data_processada = dados_processados[0]['data'] if dados_processados else None
-            
-            if primeira_data_original and primeira_data_processada:
-                st.info(f"📅 **Exemplo de conversão de data:** `{primeira_data_original}` → `{primeira_data_processada}`")
+        primeira_data_original, primeira_data_processada = exemplo_data
+        if primeira_data_original and primeira_data_processada:
+            eventos.info(f"📅 **Exemplo de conversão de data:** `{primeira_data_original}` → `{primeira_data_processada}`")
         
-        st.success(f"✅ CSV processado com sucesso! {len(dados_processados)} registros válidos")
+        eventos.sucesso(f"✅ CSV processado com sucesso! {len(dados_processados)} registros válidos")
         return dados_processados
         
+    except ValueError as e:
+        eventos.erro(f"❌ {e}")
+        return None
     except Exception as e:
-        st.error(f"❌ Erro ao processar arquivo CSV: {e}")
+        eventos.erro(f"❌ Erro ao processar arquivo CSV: {e}")
         return None
 
+def processar_arquivos_em_paralelo(uploaded_files, funcao_processamento, max_workers: int = None) -> list:
+    """
+    Executa funcao_processamento(arquivo) para vários arquivos em um pool de threads.
+    Nas threads de trabalho não há página para exibir eventos (eles vão para o log):
+    quem chama exibe as mensagens a partir do resultado.
+    Retorna, na ordem do upload: [{'arquivo', 'resultado', 'erro', 'tempo'}]
+    """
+    def executar(uploaded_file):
+        inicio = time.perf_counter()
+        try:
+            resultado, erro = funcao_processamento(uploaded_file), None
+        except Exception as e:
+            resultado, erro = None, str(e)
+        return {'arquivo': uploaded_file.name, 'resultado': resultado, 'erro': erro, 'tempo': time.perf_counter() - inicio}
+    
+    if not uploaded_files:
+        return []
+    
+    max_workers = min(max_workers or DADOS['arquivos_paralelos'], len(uploaded_files))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(executar, uploaded_files))
+
 def processar_multiplos_csvs_dados_diarios(uploaded_files):
-    """Processa múltiplos arquivos CSV de dados diários e retorna uma lista consolidada"""
+    """Processa múltiplos arquivos CSV de dados diários em paralelo e retorna uma lista consolidada"""
     todos_dados = []
     
-    for i, uploaded_file in enumerate(uploaded_files):
-        try:
-            dados = processar_csv_dados_diarios(uploaded_file)
-            if dados is not None:
-                # Adicionar identificador do arquivo
-                for dado in dados:
-                    dado['arquivo_origem'] = uploaded_file.name
-                todos_dados.extend(dados)
-                st.success(f"✅ {uploaded_file.name} processado com sucesso!")
-            else:
-                st.error(f"❌ Erro ao processar {uploaded_file.name}")
-        except Exception as e:
-            st.error(f"❌ Erro ao processar {uploaded_file.name}: {e}")
+    inicio = time.perf_counter()
+    resultados = processar_arquivos_em_paralelo(
+        uploaded_files, lambda arquivo: ler_upload_em_cache(arquivo, 'dados_diarios', ler_csv_dados_diarios)
+    )
+    tempo_total = time.perf_counter() - inicio
+    
+    for resultado in resultados:
+        nome_arquivo = resultado['arquivo']
+        if resultado['erro']:
+            eventos.erro(f"❌ Erro ao processar {nome_arquivo}: {resultado['erro']}")
+            continue
+        
+        dados, erros, _ = resultado['resultado']
+        exibir_relatorio_erros_linhas(erros, nome_arquivo)
+        if not dados:
+            eventos.erro(f"❌ {nome_arquivo}: nenhum dado válido encontrado após processamento")
+            continue
+        
+        # Adicionar identificador do arquivo
+        for dado in dados:
+            dado['arquivo_origem'] = nome_arquivo
+        todos_dados.extend(dados)
+        eventos.sucesso(f"✅ {nome_arquivo} processado com sucesso! {len(dados)} registros em {resultado['tempo']:.2f}s")
     
     if todos_dados:
-        st.success(f"🎉 **Consolidação concluída!** Total de {len(todos_dados)} registros de {len(uploaded_files)} arquivos.")
+        eventos.sucesso(f"🎉 **Consolidação concluída!** Total de {len(todos_dados)} registros de {len(uploaded_files)} arquivos em {tempo_total:.2f}s.")
         return todos_dados
     else:
-        st.error("❌ Nenhum arquivo foi processado com sucesso.")
+        eventos.erro("❌ Nenhum arquivo foi processado com sucesso.")
         return None 
 
+# Colunas obrigatórias do CSV de validação
+COLUNAS_CSV_VALIDACAO = [
+    'AT/TO', 'Corridor/Cage', 'Total Initial Orders Inside AT/TO',
+    'Total Final Orders Inside AT/TO', 'Total Scanned Orders',
+    'Missorted Orders', 'Missing Orders', 'Validation Start Time',
+    'Validation End Time', 'Validation Operator', 'Revalidation Operator',
+    'Revalidated Count', 'AT/TO Validation Status', 'Remark'
+]
+
+def ler_csv_validacao(uploaded_file) -> pd.DataFrame:
+    """
+    Lê o CSV de validação e calcula tempo e erros de sorting por AT/TO.
+    Não emite eventos (pode rodar em threads de trabalho); levanta ValueError se faltarem colunas.
+    """
+    df = pd.read_csv(uploaded_file)
+    
+    # Verificar se as colunas necessárias existem
+    colunas_faltantes = [col for col in COLUNAS_CSV_VALIDACAO if col not in df.columns]
+    if colunas_faltantes:
+        raise ValueError(f"Colunas faltantes no CSV: {', '.join(colunas_faltantes)}")
+    
+    # Converter colunas de data
+    df['Validation Start Time'] = pd.to_datetime(df['Validation Start Time'])
+    df['Validation End Time'] = pd.to_datetime(df['Validation End Time'])
+    
+    # Adicionar coluna de data
+    df['Data'] = df['Validation Start Time'].dt.date
+    
+    # Calcular tempo de validação em minutos
+    df['Tempo_Validacao_Min'] = (df['Validation End Time'] - df['Validation Start Time']).dt.total_seconds() / 60
+    
+    # Calcular erros de sorting (apenas Missorted Orders + Missing Orders)
+    # Ignorar linhas onde Total Final Orders Inside AT/TO é 0
+    df['Erros_Sorting'] = np.where(
+        df['Total Final Orders Inside AT/TO'] > 0,
+        df['Missorted Orders'] + df['Missing Orders'],
+        0
+    )
+    
+    # Calcular taxa de erro baseada no Total Final Orders (sem considerar os erros)
+    # Ignorar linhas onde Total Final Orders Inside AT/TO é 0
+    df['Taxa_Erro_Sorting'] = np.where(
+        df['Total Final Orders Inside AT/TO'] > 0,
+        (df['Erros_Sorting'] / df['Total Final Orders Inside AT/TO'] * 100),
+        0
+    )
+    
+    return df
+
+def processar_csv_validacao(uploaded_file):
+    """
+    Processa upload de CSV de validação, informando os erros de leitura
+    (a leitura de um conteúdo já enviado é reaproveitada, ver ler_upload_em_cache)
+    """
+    try:
+        return ler_upload_em_cache(uploaded_file, 'validacao', ler_csv_validacao)
+        
+    except ValueError as e:
+        eventos.erro(str(e))
+        return None
+    except Exception as e:
+        eventos.erro(f"Erro ao processar CSV: {e}")
+        return None
+
 def extrair_codigo_operador(nome_operador):
     """
     Extrai o código do operador do formato [ops67892]NOME
@@ -978,8 +1417,7 @@ def normalizar_nome_operador(nome_operador):
         nome = codigo_match.group(2).strip()
         
         # Normalizar o nome removendo acentos
-        nome_normalizado = unicodedata.normalize('NFKD', nome)
-        nome_normalizado = ''.join([c for c in nome_normalizado if not unicodedata.combining(c)])
+        nome_normalizado = remover_acentos(nome)
         
         # Capitalizar corretamente
         nome_normalizado = ' '.join([palavra.capitalize() for palavra in nome_normalizado.split()])
@@ -988,6 +1426,77 @@ def normalizar_nome_operador(nome_operador):
     
     return nome_operador
 
+def _normalizar_nomes_distintos(nomes: pd.Series) -> pd.DataFrame:
+    """
+    Aplica as regras de extrair_codigo_operador / normalizar_nome_operador a uma série de nomes
+    distintos de uma vez (str.extract), com a remoção de acentos feita uma vez por nome.
+    Retorna DataFrame com codigo_operador, operador_normalizado e nome_sem_codigo.
+    """
+    texto = nomes.where(nomes.map(lambda nome: isinstance(nome, str)))
+    texto_limpo = texto.str.strip()
+    
+    codigo = texto_limpo.str.extract(r'^\[([^\]]+)\]')[0].str.lower()
+    partes = texto_limpo.str.extract(r'^\[([^\]]+)\](.+)')
+    com_nome = partes[0].notna()
+    
+    nome_normalizado = partes.loc[com_nome, 1].str.strip().map(remover_acentos) \
+        .map(lambda nome: ' '.join([palavra.capitalize() for palavra in nome.split()]))
+    operador_normalizado = nomes.copy()
+    operador_normalizado[com_nome] = '[' + partes.loc[com_nome, 0] + ']' + nome_normalizado
+    
+    return pd.DataFrame({
+        'codigo_operador': codigo.where(codigo.notna(), None),
+        'operador_normalizado': operador_normalizado,
+        'nome_sem_codigo': nomes.astype(str).str.replace(r'\[[^\]]+\]', '', regex=True).str.strip().where(nomes.notna(), '')
+    })
+
+@lru_cache(maxsize=32)
+def _indice_operadores(contagens: tuple) -> dict:
+    """
+    Índice memoizado a partir de ((nome, quantidade), ...) na ordem de aparição.
+    Evita refazer o trabalho de regex/unicode quando o mesmo conjunto de operadores
+    é analisado de novo (reruns do Streamlit, várias abas sobre os mesmos dados).
+    """
+    nomes = pd.Series([nome for nome, _ in contagens], dtype=object)
+    indice = _normalizar_nomes_distintos(nomes)
+    indice['operador_real'] = nomes
+    indice['quantidade'] = [quantidade for _, quantidade in contagens]
+    
+    # Nome principal de cada código: a grafia normalizada mais comum (empate: a que aparece primeiro)
+    com_codigo = indice[indice['codigo_operador'].notna()]
+    nome_principal_por_codigo = {}
+    if not com_codigo.empty:
+        totais = com_codigo.groupby(['codigo_operador', 'operador_normalizado'], sort=False)['quantidade'].sum().reset_index()
+        totais = totais.sort_values('quantidade', ascending=False, kind='stable')
+        nome_principal_por_codigo = totais.drop_duplicates('codigo_operador').set_index('codigo_operador')['operador_normalizado'].to_dict()
+    
+    indice['operador_final'] = [
+        nome_principal_por_codigo.get(codigo, nome) if codigo is not None else nome
+        for codigo, nome in zip(indice['codigo_operador'], indice['operador_real'])
+    ]
+    
+    return {'nomes': indice, 'nome_principal_por_codigo': nome_principal_por_codigo}
+
+def obter_indice_operadores(operadores: pd.Series) -> dict:
+    """
+    Índice de operadores compartilhado pelas funções de agrupamento, diagnóstico e mapeamento:
+    - 'nomes': uma linha por nome distinto (operador_real, codigo_operador, operador_normalizado,
+      nome_sem_codigo, quantidade, operador_final)
+    - 'nome_principal_por_codigo': {código [ops] -> nome canônico}
+    O custo cresce com o número de operadores distintos, não com o número de pacotes.
+    O resultado é compartilhado (cache) e não deve ser modificado.
+    """
+    codigos, nomes = pd.factorize(operadores)
+    quantidades = np.bincount(codigos[codigos >= 0], minlength=len(nomes))
+    return _indice_operadores(tuple(zip(nomes.tolist(), quantidades.tolist())))
+
+def normalizar_operadores(operadores: pd.Series) -> pd.Series:
+    """
+    Versão vetorizada de normalizar_nome_operador (calcula uma vez por nome distinto)
+    """
+    nomes = obter_indice_operadores(operadores)['nomes']
+    return operadores.map(dict(zip(nomes['operador_real'], nomes['operador_normalizado']))).where(operadores.notna(), operadores)
+
 def agrupar_operadores_duplicados(df):
     """
     Agrupa operadores duplicados com base no código identificador
@@ -998,31 +1507,15 @@ def agrupar_operadores_duplicados(df):
     # Criar cópia para não modificar o original
     df_agrupado = df.copy()
     
-    # Extrair códigos e normalizar nomes
-    df_agrupado['codigo_operador'] = df_agrupado['operador_real'].apply(extrair_codigo_operador)
-    df_agrupado['operador_normalizado'] = df_agrupado['operador_real'].apply(normalizar_nome_operador)
-    
-    # Criar mapeamento de operadores duplicados
-    operadores_com_codigo = df_agrupado[df_agrupado['codigo_operador'].notna()]
+    indice = obter_indice_operadores(df_agrupado['operador_real'])
     
-    if not operadores_com_codigo.empty:
-        # Encontrar o nome "principal" para cada código (o mais comum ou o normalizado)
-        nome_principal_por_codigo = operadores_com_codigo.groupby('codigo_operador')['operador_normalizado'].agg(
-            lambda x: x.value_counts().index[0] if len(x.value_counts()) > 0 else x.iloc[0]
-        ).to_dict()
-        
-        # Mapear todos os nomes variantes para o nome principal
-        df_agrupado['operador_final'] = df_agrupado.apply(lambda row: 
-            nome_principal_por_codigo.get(row['codigo_operador'], row['operador_real'])
-            if row['codigo_operador'] is not None 
-            else row['operador_real'], axis=1
+    if indice['nome_principal_por_codigo']:
+        # Mapear todos os nomes variantes para o nome principal do código
+        nomes = indice['nomes']
+        nome_final = dict(zip(nomes['operador_real'], nomes['operador_final']))
+        df_agrupado['operador_real'] = df_agrupado['operador_real'].map(nome_final).where(
+            df_agrupado['operador_real'].notna(), df_agrupado['operador_real']
         )
-        
-        # Substituir a coluna original
-        df_agrupado['operador_real'] = df_agrupado['operador_final']
-        
-        # Remover colunas auxiliares
-        df_agrupado = df_agrupado.drop(['codigo_operador', 'operador_normalizado', 'operador_final'], axis=1)
     
     return df_agrupado
 
@@ -1033,12 +1526,8 @@ def obter_estatisticas_duplicacao_operadores(df):
     if df.empty or 'operador_real' not in df.columns:
         return {}
     
-    # Extrair códigos
-    df_temp = df.copy()
-    df_temp['codigo_operador'] = df_temp['operador_real'].apply(extrair_codigo_operador)
-    
-    # Contar operadores únicos vs códigos únicos
-    operadores_com_codigo = df_temp[df_temp['codigo_operador'].notna()]
+    nomes = obter_indice_operadores(df['operador_real'])['nomes']
+    operadores_com_codigo = nomes[nomes['codigo_operador'].notna()]
     
     if operadores_com_codigo.empty:
         return {
@@ -1048,7 +1537,7 @@ def obter_estatisticas_duplicacao_operadores(df):
             'duplicados_encontrados': 0
         }
     
-    # Encontrar duplicados
+    # Encontrar duplicados (mais de uma grafia para o mesmo código)
     duplicados_por_codigo = operadores_com_codigo.groupby('codigo_operador')['operador_real'].nunique()
     duplicados_encontrados = duplicados_por_codigo[duplicados_por_codigo > 1]
     
@@ -1070,27 +1559,31 @@ def diagnosticar_operador(df, nome_busca):
             'operadores_encontrados': []
         }
     
-    # Buscar operadores que contenham o nome
-    operadores_similar = df[df['operador_real'].str.contains(nome_busca, case=False, na=False)]['operador_real'].unique()
-    
-    # Buscar operadores com códigos similares
-    df_temp = df.copy()
-    df_temp['codigo_operador'] = df_temp['operador_real'].apply(extrair_codigo_operador)
-    df_temp['nome_sem_codigo'] = df_temp['operador_real'].apply(lambda x: 
-        re.sub(r'\[[^\]]+\]', '', str(x)).strip() if pd.notna(x) else ''
-    )
-    
-    # Buscar por nome sem código
-    nomes_similar = df_temp[df_temp['nome_sem_codigo'].str.contains(nome_busca, case=False, na=False)]['operador_real'].unique()
+    # Buscar entre os nomes distintos: com e sem o código
+    nomes = obter_indice_operadores(df['operador_real'])['nomes']
+    nomes = nomes[nomes['operador_real'].notna()]
+    operadores_similar = nomes[nomes['operador_real'].astype(str).str.contains(nome_busca, case=False, na=False)]['operador_real'].tolist()
+    nomes_similar = nomes[nomes['nome_sem_codigo'].str.contains(nome_busca, case=False, na=False)]['operador_real'].tolist()
     
     # Todos os operadores únicos
-    todos_operadores = sorted(df['operador_real'].dropna().unique())
+    todos_operadores = sorted(nomes['operador_real'])
     
     # Estatísticas do operador se encontrado
     dados_operador = {}
-    for op in set(list(operadores_similar) + list(nomes_similar)):
+    for op in set(operadores_similar + nomes_similar):
         dados_op = df[df['operador_real'] == op]
-        if not dados_op.empty:
+        if dados_op.empty:
+            continue
+        if 'total_flutuantes' in dados_op.columns:
+            # Nomes já agregados no banco (listar_operadores_flutuantes)
+            total = int(dados_op['total_flutuantes'].sum())
+            dados_operador[op] = {
+                'total_registros': total,
+                'total_flutuantes': total,
+                'encontrados': int(dados_op['flutuantes_encontrados'].sum()),
+                'datas': {'primeira': dados_op['primeira_data'].min(), 'ultima': dados_op['ultima_data'].max()}
+            }
+        else:
             dados_operador[op] = {
                 'total_registros': len(dados_op),
                 'total_flutuantes': len(dados_op),
@@ -1103,8 +1596,8 @@ def diagnosticar_operador(df, nome_busca):
     
     return {
         'nome_buscado': nome_busca,
-        'operadores_exatos': list(operadores_similar),
-        'operadores_similares': list(nomes_similar),
+        'operadores_exatos': operadores_similar,
+        'operadores_similares': nomes_similar,
         'total_operadores_base': len(todos_operadores),
         'dados_operadores': dados_operador,
         'primeiros_10_operadores': todos_operadores[:10],
@@ -1144,7 +1637,8 @@ def buscar_operadores_por_padrao(df, padrao):
     resultados.extend([('contains', op) for op in contains if op not in [x[1] for x in resultados]])
     
     # Busca por partes (sem código)
-    sem_codigo = df['operador_real'].apply(lambda x: re.sub(r'\[[^\]]+\]', '', str(x)).strip() if pd.notna(x) else '')
+    nomes = obter_indice_operadores(df['operador_real'])['nomes']
+    sem_codigo = df['operador_real'].map(dict(zip(nomes['operador_real'], nomes['nome_sem_codigo']))).fillna('')
     por_partes = df[sem_codigo.str.contains(padrao, case=False, na=False)]['operador_real'].unique()
     resultados.extend([('sem_codigo', op) for op in por_partes if op not in [x[1] for x in resultados]])
     
@@ -1158,21 +1652,18 @@ def criar_mapeamento_operadores_originais(df):
         return {}
     
     mapeamento = {}
-    operadores_originais = df['operador_real'].dropna().unique()
+    nomes = obter_indice_operadores(df['operador_real'])['nomes']
+    nomes = nomes[nomes['operador_real'].notna()]
     
-    for operador_original in operadores_originais:
-        # Normalizar o nome
-        operador_normalizado = normalizar_nome_operador(operador_original)
-        
+    for operador_original, operador_normalizado, codigo, base_nome in zip(
+        nomes['operador_real'], nomes['operador_normalizado'], nomes['codigo_operador'], nomes['nome_sem_codigo']
+    ):
         # Mapear normalizado -> original
         if operador_normalizado != operador_original:
             mapeamento[operador_normalizado] = operador_original
         
-        # Também mapear o código para facilitar busca
-        codigo = extrair_codigo_operador(operador_original)
+        # Também mapear o código para facilitar busca (variações possíveis do mesmo código)
         if codigo:
-            # Mapear variações possíveis do mesmo código
-            base_nome = re.sub(r'\[[^\]]+\]', '', operador_original).strip()
             for variacao in [base_nome.lower(), base_nome.upper(), base_nome.title()]:
                 nome_variacao = f"[{codigo}]{variacao}"
                 if nome_variacao != operador_original:
@@ -1196,46 +1687,128 @@ def mapear_operadores_para_banco(operadores_selecionados, df_original):
         if operador in mapeamento:
             operador_real = mapeamento[operador]
             operadores_mapeados.append(operador_real)
-            st.info(f"🔄 Mapeado: '{operador}' → '{operador_real}'")
+            eventos.info(f"🔄 Mapeado: '{operador}' → '{operador_real}'")
         else:
             # Usar o operador como está
             operadores_mapeados.append(operador)
     
     return operadores_mapeados
 
-def carregar_pacotes_flutuantes_com_mapeamento(limit: int = 1000, operadores_reais: list = None, data_inicio: str = None, data_fim: str = None) -> pd.DataFrame:
+def carregar_pacotes_flutuantes_com_mapeamento(limit: int = None, operadores_reais: list = None, data_inicio: str = None, data_fim: str = None,
+                                               colunas: list = None) -> pd.DataFrame:
     """
     Carrega pacotes flutuantes com mapeamento automático de operadores
     """
     try:
         if not DB_AVAILABLE or not db_manager.is_connected():
-            st.warning("⚠️ Supabase não conectado.")
+            eventos.aviso("⚠️ Supabase não conectado.")
             return pd.DataFrame()
         
         # Se há operadores selecionados, fazer mapeamento primeiro
         if operadores_reais and len(operadores_reais) > 0:
-            # Carregar dados completos para criar mapeamento
-            st.info("🔍 Carregando dados para mapeamento de operadores...")
-            df_completo = db_manager.load_pacotes_flutuantes(10000, None, None, None)
+            # O mapeamento só precisa dos nomes distintos gravados no banco
+            eventos.info("🔍 Carregando operadores para mapeamento...")
+            df_operadores = db_manager.listar_operadores_flutuantes()
             
-            if not df_completo.empty:
+            if not df_operadores.empty:
                 # Mapear operadores selecionados para nomes reais no banco
-                operadores_mapeados = mapear_operadores_para_banco(operadores_reais, df_completo)
-                st.success(f"✅ Operadores mapeados: {operadores_mapeados}")
+                operadores_mapeados = mapear_operadores_para_banco(operadores_reais, df_operadores)
+                eventos.sucesso(f"✅ Operadores mapeados: {operadores_mapeados}")
                 
                 # Usar função de múltiplos operadores com nomes mapeados
-                return db_manager.load_pacotes_flutuantes_multiplos_operadores(limit, operadores_mapeados, data_inicio, data_fim)
+                return db_manager.load_pacotes_flutuantes_multiplos_operadores(limit, operadores_mapeados, data_inicio, data_fim, colunas=colunas)
             else:
-                st.error("❌ Não foi possível carregar dados para mapeamento")
+                eventos.erro("❌ Não foi possível carregar dados para mapeamento")
                 return pd.DataFrame()
         else:
             # Sem filtro de operadores, usar função normal
-            return db_manager.load_pacotes_flutuantes(limit, None, data_inicio, data_fim)
+            return db_manager.load_pacotes_flutuantes(limit, None, data_inicio, data_fim, colunas=colunas)
             
     except Exception as e:
-        st.error(f"❌ Erro ao carregar pacotes flutuantes com mapeamento: {e}")
+        eventos.erro(f"❌ Erro ao carregar pacotes flutuantes com mapeamento: {e}")
         return pd.DataFrame()
 
+def _chaves_operadores(operadores_reais: list) -> list:
+    """
+    Converte os operadores selecionados nas chaves usadas pelas funções de agregação do banco
+    """
+    if not operadores_reais:
+        return None
+    return list(dict.fromkeys(extrair_codigo_operador(op) or op for op in operadores_reais))
+
+def obter_ranking_flutuantes_periodo(data_inicio: str = None, data_fim: str = None, operadores_reais: list = None,
+                                     data_recentes: str = None, anterior_inicio: str = None, anterior_fim: str = None,
+                                     criterio: str = 'total') -> pd.DataFrame:
+    """
+    Obtém o ranking de operadores por flutuantes já agregado no banco (uma linha por operador)
+    """
+    try:
+        if DB_AVAILABLE and db_manager.is_connected():
+            df = db_manager.obter_ranking_flutuantes_periodo(
+                data_inicio, data_fim, _chaves_operadores(operadores_reais),
+                data_recentes, anterior_inicio, anterior_fim, criterio
+            )
+            if df.empty:
+                return df
+            
+            colunas_numericas = ['total_flutuantes', 'flutuantes_encontrados', 'flutuantes_nao_encontrados',
+                                 'taxa_encontrados', 'aging_medio', 'flutuantes_recentes', 'flutuantes_anterior',
+                                 'tendencia', 'tendencia_percentual']
+            for coluna in colunas_numericas:
+                df[coluna] = pd.to_numeric(df[coluna], errors='coerce').fillna(0)
+            df['primeira_data'] = pd.to_datetime(df['primeira_data'])
+            df['ultima_data'] = pd.to_datetime(df['ultima_data'])
+            df['operador_real'] = normalizar_operadores(df['operador_real'])
+            return df
+        else:
+            eventos.aviso("⚠️ Supabase não conectado.")
+            return pd.DataFrame()
+            
+    except Exception as e:
+        eventos.erro(f"❌ Erro ao obter ranking de operadores: {e}")
+        return pd.DataFrame()
+
+def obter_flutuantes_por_data_operador(data_inicio: str = None, data_fim: str = None, operadores_reais: list = None) -> pd.DataFrame:
+    """
+    Obtém contagem de flutuantes por data de recebimento e operador agregada no banco
+    """
+    try:
+        if DB_AVAILABLE and db_manager.is_connected():
+            df = db_manager.obter_flutuantes_por_data_operador(data_inicio, data_fim, _chaves_operadores(operadores_reais))
+            if not df.empty:
+                df['operador_real'] = normalizar_operadores(df['operador_real'])
+            return df
+        else:
+            eventos.aviso("⚠️ Supabase não conectado.")
+            return pd.DataFrame()
+            
+    except Exception as e:
+        eventos.erro(f"❌ Erro ao obter flutuantes por data: {e}")
+        return pd.DataFrame()
+
+def contar_flutuantes_por_operador_na_data(data_operacao, operadores: list) -> dict:
+    """
+    Flutuantes do banco na data de recebimento para cada operador informado ({operador: total}).
+    Lê a contagem já agregada por data e operador (poucas dezenas de linhas) e casa cada
+    operador pelo código [ops] (ou pelo nome, quando não há código) num dicionário
+    """
+    if not operadores or data_operacao is None:
+        return {}
+    
+    data = pd.to_datetime(data_operacao).strftime('%Y-%m-%d')
+    df = obter_flutuantes_por_data_operador(data, data)
+    
+    # Mesma chave da função SQL chave_operador, sem diferenciar maiúsculas
+    def chave(operador):
+        return str(extrair_codigo_operador(operador) or operador).strip().lower()
+    
+    por_chave = {}
+    if not df.empty:
+        for chave_operador, total in zip(df['chave_operador'], df['total_flutuantes']):
+            por_chave[chave(chave_operador)] = por_chave.get(chave(chave_operador), 0) + int(total)
+    
+    return {operador: por_chave.get(chave(operador), 0) for operador in operadores}
+
 # ============================================================================
 # FUNÇÕES AUXILIARES PARA CONVERSÃO DE TIPOS
 # ============================================================================
@@ -1265,181 +1838,365 @@ def converter_tipos_python(dados):
 # FUNÇÕES PARA EXPEDIÇÃO CONSOLIDADO
 # ============================================================================
 
+def _eficiencia_expedicao(tempo_medio: pd.Series, total_at_to: pd.Series) -> pd.Series:
+    """
+    Score de eficiência (0-100) baseado no tempo médio por AT/TO e na quantidade de AT/TO
+    """
+    tempo_base = 50  # 50 minutos é o target
+    eficiencia_tempo = (100 - ((tempo_medio - tempo_base) / tempo_base * 100)).clip(lower=0).fillna(0)
+    eficiencia_volume = (total_at_to / 10 * 100).clip(upper=100)  # 10 AT/TO = 100%
+    return (eficiencia_tempo + eficiencia_volume) / 2
+
+def agregar_bloco_expedicao(df_expedicao: pd.DataFrame, deslocamento: int = 0) -> pd.DataFrame:
+    """
+    Agregados parciais por (data, onda, operador) de um bloco do CSV de expedição.
+    Somas, contagens, mínimos e máximos podem ser combinados entre blocos
+    (combinar_agregados_expedicao), então o arquivo não precisa estar inteiro em memória.
+    deslocamento: número de linhas dos blocos anteriores (preserva a ordem de aparição)
+    """
+    df = pd.DataFrame({
+        'inicio': pd.to_datetime(df_expedicao['Validation Start Time']),
+        'fim': pd.to_datetime(df_expedicao['Validation End Time']),
+        'operador': df_expedicao['Validation Operator'].astype(object),
+        'pacotes': df_expedicao['Total Scanned Orders'],
+        'onda': df_expedicao['Corridor Cage'].astype(object).str.extract(r'^([A-Z])')[0]
+    })
+    df['data'] = df['inicio'].dt.date
+    df['tempo'] = (df['fim'] - df['inicio']).dt.total_seconds() / 60
+    df['posicao'] = np.arange(deslocamento, deslocamento + len(df))
+    
+    # Linhas sem data ou onda não formam nenhuma onda
+    df = df[df['data'].notna() & df['onda'].notna()]
+    
+    return df.groupby(['data', 'onda', 'operador'], sort=False, dropna=False).agg(
+        inicio=('inicio', 'min'),
+        fim=('fim', 'max'),
+        total_at_to=('inicio', 'size'),
+        pacotes=('pacotes', 'sum'),
+        tempo_soma=('tempo', 'sum'),
+        tempo_contagem=('tempo', 'count'),
+        posicao=('posicao', 'min')
+    ).reset_index()
+
+def combinar_agregados_expedicao(agregados: list) -> pd.DataFrame:
+    """
+    Combina agregados parciais de vários blocos em um único conjunto por (data, onda, operador)
+    """
+    df = pd.concat(agregados, ignore_index=True)
+    return df.groupby(['data', 'onda', 'operador'], sort=False, dropna=False).agg(
+        inicio=('inicio', 'min'),
+        fim=('fim', 'max'),
+        total_at_to=('total_at_to', 'sum'),
+        pacotes=('pacotes', 'sum'),
+        tempo_soma=('tempo_soma', 'sum'),
+        tempo_contagem=('tempo_contagem', 'sum'),
+        posicao=('posicao', 'min')
+    ).reset_index()
+
+def finalizar_consolidacao_expedicao(agregados: pd.DataFrame, arquivo_origem: str) -> tuple:
+    """
+    Calcula métricas de ondas e operadores, eficiência e posição no ranking do dia a partir dos agregados
+    Retorna: (dados_ondas, dados_operadores) na ordem de aparição no arquivo
+    """
+    if agregados.empty:
+        return [], []
+    
+    com_operador = agregados[agregados['operador'].notna()]
+    
+    # Ondas: uma linha por (data, onda)
+    ondas = agregados.groupby(['data', 'onda'], sort=False).agg(
+        hora_inicio=('inicio', 'min'),
+        hora_fim=('fim', 'max'),
+        total_at_to=('total_at_to', 'sum'),
+        total_pacotes=('pacotes', 'sum'),
+        tempo_soma=('tempo_soma', 'sum'),
+        tempo_contagem=('tempo_contagem', 'sum'),
+        posicao=('posicao', 'min')
+    ).reset_index()
+    operadores_onda = com_operador.sort_values('posicao').groupby(['data', 'onda'])['operador'].agg(list)
+    ondas['operadores_utilizados'] = [operadores_onda.get((data, onda), []) for data, onda in zip(ondas['data'], ondas['onda'])]
+    ondas['operadores_ativos'] = ondas['operadores_utilizados'].str.len()
+    ondas['tempo_medio_por_at_to'] = ondas['tempo_soma'] / ondas['tempo_contagem'].where(ondas['tempo_contagem'] > 0)
+    
+    # Número da onda: posição da letra no alfabeto (A = 1). Não depende das outras ondas do arquivo,
+    # então um arquivo com parte das ondas de um dia atualiza as mesmas linhas no upsert
+    # (ondas por data e letra, operadores por data, operador e número)
+    ondas['numero_onda'] = ondas['onda'].map(lambda letra: ord(letra) - ord('A') + 1)
+    ondas['tempo_total_minutos'] = (ondas['hora_fim'] - ondas['hora_inicio']).dt.total_seconds() / 60
+    ondas['tempo_medio_por_pacote'] = np.where(
+        ondas['total_pacotes'] > 0,
+        ondas['tempo_total_minutos'] / ondas['total_pacotes'].where(ondas['total_pacotes'] > 0),
+        0
+    )
+    
+    # Ranking do dia: eficiência de cada operador considerando todas as ondas da data
+    ranking_dia = com_operador.groupby(['data', 'operador'], sort=False).agg(
+        tempo_soma=('tempo_soma', 'sum'),
+        tempo_contagem=('tempo_contagem', 'sum'),
+        total_at_to=('total_at_to', 'sum'),
+        posicao=('posicao', 'min')
+    ).reset_index().sort_values('posicao')
+    ranking_dia['tempo_medio'] = ranking_dia['tempo_soma'] / ranking_dia['tempo_contagem'].where(ranking_dia['tempo_contagem'] > 0)
+    ranking_dia['posicao_ranking'] = _eficiencia_expedicao(ranking_dia['tempo_medio'], ranking_dia['total_at_to']) \
+        .groupby(ranking_dia['data']).rank(method='first', ascending=False).astype(int)
+    
+    # Operadores: uma linha por (data, onda, operador)
+    operadores = com_operador.rename(columns={
+        'total_at_to': 'total_at_to_expedidos',
+        'pacotes': 'total_pacotes_processados',
+        'tempo_soma': 'tempo_total_trabalho_minutos'
+    })
+    operadores['tempo_medio_por_at_to'] = operadores['tempo_total_trabalho_minutos'] / operadores['tempo_contagem'].where(operadores['tempo_contagem'] > 0)
+    operadores['tempo_medio_por_pacote'] = np.where(
+        operadores['total_pacotes_processados'] > 0,
+        operadores['tempo_total_trabalho_minutos'] / operadores['total_pacotes_processados'].where(operadores['total_pacotes_processados'] > 0),
+        0
+    )
+    operadores['eficiencia_operador'] = _eficiencia_expedicao(operadores['tempo_medio_por_at_to'], operadores['total_at_to_expedidos'])
+    operadores = operadores.merge(ondas[['data', 'onda', 'numero_onda', 'posicao']].rename(columns={'posicao': 'posicao_onda'}),
+                                  on=['data', 'onda'], how='left')
+    operadores = operadores.merge(ranking_dia[['data', 'operador', 'posicao_ranking']], on=['data', 'operador'], how='left')
+    
+    # Manter a ordem de aparição: data, onda dentro da data, operador dentro da onda
+    ordem_data = ondas.groupby('data')['posicao'].min()
+    ondas['ordem_data'] = ondas['data'].map(ordem_data)
+    operadores['ordem_data'] = operadores['data'].map(ordem_data)
+    ondas = ondas.sort_values(['ordem_data', 'posicao'])
+    operadores = operadores.sort_values(['ordem_data', 'posicao_onda', 'posicao'])
+    
+    colunas_decimais = ['tempo_total_minutos', 'tempo_medio_por_at_to', 'tempo_medio_por_pacote']
+    ondas[colunas_decimais] = ondas[colunas_decimais].round(2)
+    dados_ondas = pd.DataFrame({
+        'data_operacao': ondas['data'].map(lambda d: d.strftime('%Y-%m-%d')),
+        'numero_onda': ondas['numero_onda'],
+        'letra_onda': ondas['onda'],
+        'hora_inicio': ondas['hora_inicio'].map(lambda h: h.isoformat()),
+        'hora_fim': ondas['hora_fim'].map(lambda h: h.isoformat()),
+        'tempo_total_minutos': ondas['tempo_total_minutos'],
+        'total_at_to': ondas['total_at_to'],
+        'total_pacotes': ondas['total_pacotes'],
+        'operadores_ativos': ondas['operadores_ativos'],
+        'operadores_utilizados': ondas['operadores_utilizados'],
+        'tempo_medio_por_at_to': ondas['tempo_medio_por_at_to'],
+        'tempo_medio_por_pacote': ondas['tempo_medio_por_pacote'],
+        'status_onda': 'Finalizada',
+        'observacoes': [f'Onda {letra} processada em {tempo:.1f} minutos'
+                        for letra, tempo in zip(ondas['onda'], ondas['tempo_total_minutos'])],
+        'arquivo_origem': arquivo_origem
+    }).to_dict('records')
+    
+    colunas_decimais = ['tempo_total_trabalho_minutos', 'tempo_medio_por_at_to', 'tempo_medio_por_pacote', 'eficiencia_operador']
+    operadores[colunas_decimais] = operadores[colunas_decimais].round(2)
+    dados_operadores = pd.DataFrame({
+        'data_operacao': operadores['data'].map(lambda d: d.strftime('%Y-%m-%d')),
+        'operador': operadores['operador'],
+        'numero_onda': operadores['numero_onda'],
+        'total_at_to_expedidos': operadores['total_at_to_expedidos'],
+        'total_pacotes_processados': operadores['total_pacotes_processados'],
+        'tempo_total_trabalho_minutos': operadores['tempo_total_trabalho_minutos'],
+        'tempo_medio_por_at_to': operadores['tempo_medio_por_at_to'],
+        'tempo_medio_por_pacote': operadores['tempo_medio_por_pacote'],
+        'eficiencia_operador': operadores['eficiencia_operador'],
+        'posicao_ranking': operadores['posicao_ranking'],
+        'arquivo_origem': arquivo_origem
+    }).to_dict('records')
+    
+    # Converter tipos para Python nativos antes de retornar
+    return converter_tipos_python(dados_ondas), converter_tipos_python(dados_operadores)
+
+def consolidar_expedicao(df_expedicao: pd.DataFrame, arquivo_origem: str) -> tuple:
+    """
+    Calcula métricas de ondas e operadores da expedição com agregações agrupadas (sem laços por linha)
+    Retorna: (dados_ondas, dados_operadores) na ordem de aparição no arquivo
+    """
+    return finalizar_consolidacao_expedicao(agregar_bloco_expedicao(df_expedicao), arquivo_origem)
+
 def processar_csv_expedicao_consolidado(df_expedicao: pd.DataFrame, arquivo_origem: str) -> tuple:
     """
     Processa CSV de expedição para gerar dados consolidados
     Retorna: (dados_ondas, dados_operadores)
     """
     try:
-        st.info("🔄 Processando dados para expedição consolidado...")
+        eventos.info("🔄 Processando dados para expedição consolidado...")
         
-        # Converter colunas de data
-        df_expedicao['Validation Start Time'] = pd.to_datetime(df_expedicao['Validation Start Time'])
-        df_expedicao['Validation End Time'] = pd.to_datetime(df_expedicao['Validation End Time'])
-        df_expedicao['Delivering Time'] = pd.to_datetime(df_expedicao['Delivering Time'])
+        dados_ondas, dados_operadores = consolidar_expedicao(df_expedicao, arquivo_origem)
         
-        # Adicionar coluna de data
-        df_expedicao['Data'] = df_expedicao['Validation Start Time'].dt.date
+        eventos.sucesso(f"✅ Processamento concluído!")
+        eventos.info(f"  📊 Ondas processadas: {len(dados_ondas)}")
+        eventos.info(f"  👥 Registros de operadores: {len(dados_operadores)}")
         
-        # Extrair letra da onda (primeira letra do Corridor Cage)
-        df_expedicao['Onda'] = df_expedicao['Corridor Cage'].str.extract(r'^([A-Z])')[0]
+        return dados_ondas, dados_operadores
         
-        # Calcular tempo de conferência em minutos
-        df_expedicao['Tempo_Conferencia_Min'] = (df_expedicao['Validation End Time'] - df_expedicao['Validation Start Time']).dt.total_seconds() / 60
+    except Exception as e:
+        eventos.erro(f"❌ Erro ao processar dados consolidados: {e}")
+        return [], []
+
+# Colunas obrigatórias do CSV de expedição (aba Importar CSV)
+COLUNAS_CSV_EXPEDICAO = [
+    'AT/TO', 'Corridor Cage', 'Total Scanned Orders',
+    'Validation Start Time', 'Validation End Time',
+    'Validation Operator', 'City', 'Delivering Time'
+]
+
+def ler_csv_expedicao(uploaded_file) -> pd.DataFrame:
+    """
+    Lê o CSV de expedição e calcula data, tempo de conferência, tempo no piso e letra da onda.
+    Não emite eventos; levanta ValueError se faltarem colunas.
+    """
+    df_expedicao = pd.read_csv(uploaded_file)
+    
+    colunas_faltantes = [col for col in COLUNAS_CSV_EXPEDICAO if col not in df_expedicao.columns]
+    if colunas_faltantes:
+        raise ValueError(f"Colunas faltantes no CSV: {', '.join(colunas_faltantes)}")
+    
+    # Converter colunas de data
+    df_expedicao['Validation Start Time'] = pd.to_datetime(df_expedicao['Validation Start Time'])
+    df_expedicao['Validation End Time'] = pd.to_datetime(df_expedicao['Validation End Time'])
+    df_expedicao['Delivering Time'] = pd.to_datetime(df_expedicao['Delivering Time'])
+    
+    # Adicionar coluna de data
+    df_expedicao['Data'] = df_expedicao['Validation Start Time'].dt.date
+    
+    # Calcular tempo de conferência em minutos
+    df_expedicao['Tempo_Conferencia_Min'] = (df_expedicao['Validation End Time'] - df_expedicao['Validation Start Time']).dt.total_seconds() / 60
+    
+    # Calcular tempo no piso (entre conferência e retirada)
+    df_expedicao['Tempo_No_Piso_Min'] = (df_expedicao['Delivering Time'] - df_expedicao['Validation End Time']).dt.total_seconds() / 60
+    
+    # Extrair letra da onda (primeira letra do Corridor Cage)
+    df_expedicao['Onda'] = df_expedicao['Corridor Cage'].str.extract(r'^([A-Z])')[0]
+    
+    return df_expedicao
+
+# Colunas do CSV de expedição usadas na consolidação
+COLUNAS_CONSOLIDACAO_EXPEDICAO = [
+    'Corridor Cage', 'Total Scanned Orders', 'Validation Start Time',
+    'Validation End Time', 'Validation Operator'
+]
+
+def processar_csv_expedicao_consolidado_em_blocos(uploaded_file, arquivo_origem: str, tamanho_bloco: int = None) -> tuple:
+    """
+    Consolida um CSV grande de expedição lendo apenas as colunas necessárias, em blocos.
+    Cada bloco é reduzido a agregados por (data, onda, operador) e combinado com os anteriores,
+    então a memória depende do número de ondas/operadores e não do número de linhas.
+    Retorna: (dados_ondas, dados_operadores)
+    """
+    try:
+        colunas_faltantes = verificar_colunas_csv(uploaded_file, COLUNAS_CONSOLIDACAO_EXPEDICAO)
+        if colunas_faltantes:
+            eventos.erro(f"❌ Colunas faltantes no CSV: {', '.join(colunas_faltantes)}")
+            return [], []
         
-        # Calcular tempo no piso (entre conferência e retirada)
-        df_expedicao['Tempo_No_Piso_Min'] = (df_expedicao['Delivering Time'] - df_expedicao['Validation End Time']).dt.total_seconds() / 60
+        eventos.info("🔄 Processando dados para expedição consolidado em blocos...")
+        progresso = eventos.Progresso()
         
-        # Agrupar por data e onda para consolidar
-        dados_ondas = []
-        dados_operadores = []
+        agregados = None
+        linhas_lidas = 0
+        for numero_bloco, bloco in enumerate(ler_csv_em_blocos(uploaded_file, 'expedicao', tamanho_bloco, COLUNAS_CONSOLIDACAO_EXPEDICAO), start=1):
+            parcial = agregar_bloco_expedicao(bloco, linhas_lidas)
+            agregados = parcial if agregados is None else combinar_agregados_expedicao([agregados, parcial])
+            linhas_lidas += len(bloco)
+            progresso.atualizar(f"📥 Bloco {numero_bloco}: {linhas_lidas} linhas lidas...")
         
-        # Processar cada data
-        for data_operacao in df_expedicao['Data'].unique():
-            df_data = df_expedicao[df_expedicao['Data'] == data_operacao]
-            
-            # Agrupar por onda nesta data
-            for onda_letra in df_data['Onda'].unique():
-                df_onda = df_data[df_data['Onda'] == onda_letra]
-                
-                # Calcular métricas da onda
-                hora_inicio = df_onda['Validation Start Time'].min()
-                hora_fim = df_onda['Validation End Time'].max()
-                tempo_total = (hora_fim - hora_inicio).total_seconds() / 60
-                total_at_to = len(df_onda)
-                total_pacotes = df_onda['Total Scanned Orders'].sum()
-                operadores_ativos = df_onda['Validation Operator'].nunique()
-                operadores_utilizados = df_onda['Validation Operator'].unique().tolist()
-                
-                # Calcular tempos médios
-                tempo_medio_por_at_to = df_onda['Tempo_Conferencia_Min'].mean()
-                tempo_medio_por_pacote = tempo_total / total_pacotes if total_pacotes > 0 else 0
-                
-                # Determinar número da onda (sequencial por data)
-                ondas_data = sorted(df_data['Onda'].unique())
-                numero_onda = ondas_data.index(onda_letra) + 1
-                
-                # Criar registro da onda
-                dados_onda = {
-                    'data_operacao': data_operacao.strftime('%Y-%m-%d'),
-                    'numero_onda': numero_onda,
-                    'letra_onda': onda_letra,
-                    'hora_inicio': hora_inicio.isoformat(),
-                    'hora_fim': hora_fim.isoformat(),
-                    'tempo_total_minutos': round(tempo_total, 2),
-                    'total_at_to': total_at_to,
-                    'total_pacotes': total_pacotes,
-                    'operadores_ativos': operadores_ativos,
-                    'operadores_utilizados': operadores_utilizados,
-                    'tempo_medio_por_at_to': round(tempo_medio_por_at_to, 2),
-                    'tempo_medio_por_pacote': round(tempo_medio_por_pacote, 2),
-                    'status_onda': 'Finalizada',
-                    'observacoes': f'Onda {onda_letra} processada em {tempo_total:.1f} minutos',
-                    'arquivo_origem': arquivo_origem
-                }
-                
-                dados_ondas.append(dados_onda)
-                
-                # Processar dados dos operadores nesta onda
-                for operador in df_onda['Validation Operator'].unique():
-                    df_operador = df_onda[df_onda['Validation Operator'] == operador]
-                    
-                    # Calcular métricas do operador
-                    total_at_to_operador = len(df_operador)
-                    total_pacotes_operador = df_operador['Total Scanned Orders'].sum()
-                    tempo_total_operador = df_operador['Tempo_Conferencia_Min'].sum()
-                    tempo_medio_por_at_to_operador = df_operador['Tempo_Conferencia_Min'].mean()
-                    tempo_medio_por_pacote_operador = tempo_total_operador / total_pacotes_operador if total_pacotes_operador > 0 else 0
-                    
-                    # Calcular eficiência do operador (score 0-100)
-                    # Baseado no tempo médio e quantidade de AT/TO
-                    tempo_base = 50  # 50 minutos é o target
-                    eficiencia_tempo = max(0, 100 - ((tempo_medio_por_at_to_operador - tempo_base) / tempo_base * 100))
-                    eficiencia_volume = min(100, (total_at_to_operador / 10) * 100)  # 10 AT/TO = 100%
-                    eficiencia_operador = (eficiencia_tempo + eficiencia_volume) / 2
-                    
-                    # Calcular posição no ranking do dia (baseado na eficiência)
-                    operadores_dia = df_data['Validation Operator'].unique()
-                    eficiencias_dia = []
-                    for op in operadores_dia:
-                        df_op = df_data[df_data['Validation Operator'] == op]
-                        tempo_op = df_op['Tempo_Conferencia_Min'].mean()
-                        at_to_op = len(df_op)
-                        efic_tempo = max(0, 100 - ((tempo_op - tempo_base) / tempo_base * 100))
-                        efic_volume = min(100, (at_to_op / 10) * 100)
-                        eficiencias_dia.append((op, (efic_tempo + efic_volume) / 2))
-                    
-                    # Ordenar por eficiência e encontrar posição
-                    eficiencias_dia.sort(key=lambda x: x[1], reverse=True)
-                    posicao_ranking = next((i + 1 for i, (op, _) in enumerate(eficiencias_dia) if op == operador), 999)
-                    
-                    # Criar registro do operador
-                    dados_operador = {
-                        'data_operacao': data_operacao.strftime('%Y-%m-%d'),
-                        'operador': operador,
-                        'numero_onda': numero_onda,
-                        'total_at_to_expedidos': total_at_to_operador,
-                        'total_pacotes_processados': total_pacotes_operador,
-                        'tempo_total_trabalho_minutos': round(tempo_total_operador, 2),
-                        'tempo_medio_por_at_to': round(tempo_medio_por_at_to_operador, 2),
-                        'tempo_medio_por_pacote': round(tempo_medio_por_pacote_operador, 2),
-                        'eficiencia_operador': round(eficiencia_operador, 2),
-                        'posicao_ranking': posicao_ranking,
-                        'arquivo_origem': arquivo_origem
-                    }
-                    
-                    dados_operadores.append(dados_operador)
-        
-        # Converter tipos para Python nativos antes de retornar
-        dados_ondas_convertidos = converter_tipos_python(dados_ondas)
-        dados_operadores_convertidos = converter_tipos_python(dados_operadores)
-        
-        st.success(f"✅ Processamento concluído!")
-        st.info(f"  📊 Ondas processadas: {len(dados_ondas_convertidos)}")
-        st.info(f"  👥 Registros de operadores: {len(dados_operadores_convertidos)}")
-        
-        return dados_ondas_convertidos, dados_operadores_convertidos
+        progresso.encerrar()
+        if agregados is None:
+            eventos.erro("❌ Nenhum dado encontrado no arquivo")
+            return [], []
+        
+        dados_ondas, dados_operadores = finalizar_consolidacao_expedicao(agregados, arquivo_origem)
+        
+        eventos.sucesso(f"✅ Processamento concluído! {linhas_lidas} linhas lidas")
+        eventos.info(f"  📊 Ondas processadas: {len(dados_ondas)}")
+        eventos.info(f"  👥 Registros de operadores: {len(dados_operadores)}")
+        
+        return dados_ondas, dados_operadores
         
     except Exception as e:
-        st.error(f"❌ Erro ao processar dados consolidados: {e}")
+        eventos.erro(f"❌ Erro ao processar dados consolidados: {e}")
         return [], []
 
-def salvar_expedicao_consolidado(dados_ondas: list, dados_operadores: list, arquivo_origem: str) -> bool:
+def salvar_expedicao_consolidado(dados_ondas: list, dados_operadores: list, arquivo_origem: str, incremental: bool = True) -> bool:
     """
-    Salva dados consolidados de expedição no banco de dados
+    Salva dados consolidados de expedição no banco de dados em lotes
+    (modo incremental envia apenas as linhas novas ou alteradas)
     """
     try:
         if not DB_AVAILABLE or not db_manager.is_connected():
-            st.warning("⚠️ Supabase não conectado. Dados não podem ser salvos.")
+            eventos.aviso("⚠️ Supabase não conectado. Dados não podem ser salvos.")
             return False
         
         # Salvar usando a função do database manager
-        success = db_manager.salvar_expedicao_consolidado(dados_ondas, dados_operadores, arquivo_origem)
+        success = db_manager.salvar_expedicao_consolidado(dados_ondas, dados_operadores, arquivo_origem, incremental)
         
         if success:
-            st.success("✅ Dados consolidados salvos com sucesso no banco!")
+            eventos.sucesso("✅ Dados consolidados salvos com sucesso no banco!")
             return True
         else:
-            st.error("❌ Falha ao salvar dados consolidados!")
+            eventos.erro("❌ Falha ao salvar dados consolidados!")
             return False
             
     except Exception as e:
-        st.error(f"❌ Erro ao salvar dados consolidados: {e}")
+        eventos.erro(f"❌ Erro ao salvar dados consolidados: {e}")
         return False
 
-def carregar_expedicao_consolidado(data_inicio: str = None, data_fim: str = None) -> pd.DataFrame:
+# Resultados de importar_expedicao_consolidado
+IMPORTACAO_GRAVADA = 'gravada'
+IMPORTACAO_REPETIDA = 'repetida'
+IMPORTACAO_FALHOU = 'falhou'
+
+def importar_expedicao_consolidado(uploaded_file, df_expedicao: pd.DataFrame = None, reimportar: bool = False,
+                                   hash_arquivo: str = None) -> str:
+    """
+    Consolida e grava um CSV de expedição, registrando a importação pelo hash do conteúdo.
+    Um arquivo idêntico a outro já importado não é processado de novo (a menos que reimportar=True);
+    um arquivo que cobre apenas parte dos dados existentes é gravado por upsert nas chaves naturais.
+    Usa df_expedicao se o arquivo já foi lido; senão lê o arquivo em blocos.
+    Retorna IMPORTACAO_GRAVADA, IMPORTACAO_REPETIDA (nada foi gravado) ou IMPORTACAO_FALHOU.
+    """
+    inicio = time.perf_counter()
+    hash_arquivo = hash_arquivo or hash_conteudo_arquivo(uploaded_file)
+
+    if not reimportar:
+        importacao = buscar_importacao('expedicao', hash_arquivo)
+        if importacao:
+            eventos.info(f"♻️ Arquivo já importado: {descrever_importacao(importacao)}. Nada a gravar.")
+            return IMPORTACAO_REPETIDA
+
+    if df_expedicao is None:
+        uploaded_file.seek(0)
+        dados_ondas, dados_operadores = processar_csv_expedicao_consolidado_em_blocos(uploaded_file, uploaded_file.name)
+    else:
+        dados_ondas, dados_operadores = processar_csv_expedicao_consolidado(df_expedicao, uploaded_file.name)
+
+    if not dados_ondas or not dados_operadores:
+        eventos.erro("❌ Nenhum dado válido para armazenar")
+        return IMPORTACAO_FALHOU
+
+    if not salvar_expedicao_consolidado(dados_ondas, dados_operadores, uploaded_file.name):
+        return IMPORTACAO_FALHOU
+
+    registrar_importacao(
+        'expedicao', hash_arquivo, uploaded_file.name,
+        linhas=len(df_expedicao) if df_expedicao is not None else sum(onda['total_at_to'] for onda in dados_ondas),
+        registros=len(dados_ondas) + len(dados_operadores),
+        datas=[onda['data_operacao'] for onda in dados_ondas],
+        duracao_segundos=time.perf_counter() - inicio
+    )
+    return IMPORTACAO_GRAVADA
+
+def carregar_expedicao_consolidado(data_inicio: str = None, data_fim: str = None, colunas: list = None) -> pd.DataFrame:
     """
-    Carrega dados consolidados de expedição do banco
+    Carrega dados consolidados de expedição do banco (colunas=None traz todos os campos)
     """
     try:
         if not DB_AVAILABLE or not db_manager.is_connected():
-            st.warning("⚠️ Supabase não conectado.")
+            eventos.aviso("⚠️ Supabase não conectado.")
             return pd.DataFrame()
         
-        return db_manager.carregar_expedicao_consolidado(data_inicio, data_fim)
+        return db_manager.carregar_expedicao_consolidado(data_inicio, data_fim, colunas=colunas)
         
     except Exception as e:
-        st.error(f"❌ Erro ao carregar dados consolidados: {e}")
+        eventos.erro(f"❌ Erro ao carregar dados consolidados: {e}")
         return pd.DataFrame()
 
 def obter_recomendacao_operadores_top_6(data_referencia: str = None) -> pd.DataFrame:
@@ -1449,14 +2206,14 @@ def obter_recomendacao_operadores_top_6(data_referencia: str = None) -> pd.DataF
     """
     try:
         if not DB_AVAILABLE or not db_manager.is_connected():
-            st.warning("⚠️ Supabase não conectado.")
+            eventos.aviso("⚠️ Supabase não conectado.")
             return pd.DataFrame()
         
         # Carregar ranking de operadores
         df_ranking = db_manager.obter_ranking_expedicao_operadores()
         
         if df_ranking.empty:
-            st.info("📝 Nenhum dado de ranking disponível.")
+            eventos.info("📝 Nenhum dado de ranking disponível.")
             return pd.DataFrame()
         
         # Filtrar operadores com pelo menos 1 dia de trabalho (mais flexível)
@@ -1464,12 +2221,12 @@ def obter_recomendacao_operadores_top_6(data_referencia: str = None) -> pd.DataF
         df_filtrado = df_ranking[df_ranking['dias_trabalhados'] >= dias_minimos].copy()
         
         if df_filtrado.empty:
-            st.info(f"📝 Nenhum operador com pelo menos {dias_minimos} dia(s) de trabalho encontrado.")
+            eventos.info(f"📝 Nenhum operador com pelo menos {dias_minimos} dia(s) de trabalho encontrado.")
             return pd.DataFrame()
         
         # Ajustar pesos baseado na quantidade de dias disponíveis
         if df_filtrado['dias_trabalhados'].max() < 3:
-            st.info("📊 **Atenção:** Dados limitados (menos de 3 dias). Recomendações baseadas em performance recente.")
+            eventos.info("📊 **Atenção:** Dados limitados (menos de 3 dias). Recomendações baseadas em performance recente.")
             # Ajustar pesos para dados limitados
             peso_eficiencia = 0.6  # Aumentar peso da eficiência
             peso_frequencia = 0.2  # Reduzir peso da frequência
@@ -1528,7 +2285,7 @@ def obter_recomendacao_operadores_top_6(data_referencia: str = None) -> pd.DataF
         return df_top_6
         
     except Exception as e:
-        st.error(f"❌ Erro ao obter recomendação de operadores: {e}")
+        eventos.erro(f"❌ Erro ao obter recomendação de operadores: {e}")
         return pd.DataFrame() 
 
 # ============================================================================